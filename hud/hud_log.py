@@ -0,0 +1,22 @@
+import logging
+import os
+
+# Set to DEBUG to see file watching and position details
+LOG_LEVEL_ENV = "HUD_LOG"
+
+root = logging.getLogger("hud")
+
+
+def get_logger(name):
+    """Get a child of the hud logger, which prints bare messages to stderr
+
+    The handler is added on first use, at the level in HUD_LOG (INFO if
+    unset).
+    """
+    if not root.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        root.addHandler(handler)
+        root.propagate = False
+        root.setLevel(os.environ.get(LOG_LEVEL_ENV, "INFO").upper())
+    return root.getChild(name)
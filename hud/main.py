@@ -14,6 +14,10 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtGui import QFont, QFontDatabase, QColor, QKeySequence
 from PyQt5.QtCore import Qt, QTimer, QFileSystemWatcher, QEvent, QPoint, QObject
 
+from hud_log import get_logger
+
+log = get_logger("main")
+
 # Import our widgets
 from widgets.clock.clock import ClockWidget, HAS_WIN32_MODULES
 from widgets.gmail.gmail import EmailWidget
@@ -102,7 +106,7 @@ class WidgetManager(QObject):
         if os.path.exists(path):
             self.code_watcher.addPath(path)
             self.last_modified[path] = os.path.getmtime(path)
-            print(f"Watching code file: {path}")
+            log.debug("Watching code file: %s", path)
 
     def _watch_config_file(self, widget_name, config_path):
         """Add a config file to watch for changes"""
@@ -110,7 +114,7 @@ class WidgetManager(QObject):
             self.config_files[widget_name] = config_path
             self.config_watcher.addPath(config_path)
             self.last_modified[config_path] = os.path.getmtime(config_path)
-            print(f"Watching config file: {config_path}")
+            log.debug("Watching config file: %s", config_path)
 
     def _create_widgets(self):
         """Create and show all widgets"""
@@ -131,7 +135,7 @@ class WidgetManager(QObject):
         # Show widgets and make them stay on desktop
         for name, widget in self.widgets.items():
             widget.show()
-            print(f"{name.capitalize()} widget started")
+            log.info("%s widget started", name.capitalize())
 
         # Set desktop window behavior for Windows
         if HAS_WIN32_MODULES:
@@ -139,7 +143,7 @@ class WidgetManager(QObject):
 
     def _set_desktop_behavior(self):
         """Set desktop window behavior for all widgets"""
-        print("Setting desktop window behavior for all widgets")
+        log.debug("Setting desktop window behavior for all widgets")
         for name, widget in self.widgets.items():
             try:
                 # Only make window behavior modifications during initialization,
@@ -174,9 +178,9 @@ class WidgetManager(QObject):
                     win32con.SWP_NOMOVE | win32con.SWP_NOSIZE | win32con.SWP_NOACTIVATE,
                 )
 
-                print(f"Desktop window behavior set for {name}")
+                log.debug("Desktop window behavior set for %s", name)
             except Exception as e:
-                print(f"Error setting window behavior for {name}: {e}")
+                log.error("Error setting window behavior for %s: %s", name, e)
 
     def _on_code_changed(self, path):
         """Handle code file changes by scheduling a reload after a short delay"""
@@ -201,11 +205,11 @@ class WidgetManager(QObject):
                         # Just reload the widget's config from its file
                         self.widgets[name].load_config()
                         self.widgets[name].apply_config()
-                        print(f"Applied updated configuration for {name} widget")
+                        log.info("Applied updated configuration for %s widget", name)
                     except Exception as e:
-                        print(f"Error updating {name} widget configuration: {e}")
+                        log.error("Error updating %s widget configuration: %s", name, e)
         except Exception as e:
-            print(f"Error in config file change handler: {e}")
+            log.error("Error in config file change handler: %s", e)
 
     def _reload_module(self, path):
         """Reload the module and recreate affected widgets"""
@@ -228,7 +232,7 @@ class WidgetManager(QObject):
                     :-3
                 ]  # Fallback to just the filename
 
-            print(f"Hot-reloading module: {full_module}")
+            log.info("Hot-reloading module: %s", full_module)
 
             # Reload the module
             if full_module in sys.modules:
@@ -245,7 +249,7 @@ class WidgetManager(QObject):
                     self._recreate_widget("email", EmailWidget)
 
         except Exception as e:
-            print(f"Error during hot reload: {e}")
+            log.error("Error during hot reload: %s", e)
 
     def _recreate_widget(self, name, widget_class):
         """Recreate a widget while preserving its position"""
@@ -271,7 +275,7 @@ class WidgetManager(QObject):
 
             # Show the new widget
             self.widgets[name].show()
-            print(f"{name.capitalize()} widget reloaded")
+            log.info("%s widget reloaded", name.capitalize())
 
             # Apply desktop behavior
             if HAS_WIN32_MODULES:
@@ -309,10 +313,12 @@ class WidgetManager(QObject):
             with open(config_path, "w") as f:
                 json.dump(config, f, indent=4)
 
-            print(f"Saved position for {widget_name}: X={widget.x()}, Y={widget.y()}")
+            log.debug(
+                "Saved position for %s: X=%s, Y=%s", widget_name, widget.x(), widget.y()
+            )
 
         except Exception as e:
-            print(f"Error saving position for {widget_name}: {e}")
+            log.error("Error saving position for %s: %s", widget_name, e)
 
     def _restore_positions(self):
         """Restore positions of all widgets from their config files"""
@@ -335,7 +341,9 @@ class WidgetManager(QObject):
                     if x >= 0 and y >= 0:
                         self.widgets[widget_name].move(x, y)
                         self.positions[widget_name] = QPoint(x, y)
-                        print(f"Restored position for {widget_name}: X={x}, Y={y}")
+                        log.debug(
+                            "Restored position for %s: X=%s, Y=%s", widget_name, x, y
+                        )
                     else:
                         # Center on screen
                         self._center_widget(widget_name)
@@ -344,7 +352,7 @@ class WidgetManager(QObject):
                     self._center_widget(widget_name)
 
         except Exception as e:
-            print(f"Error restoring position for {widget_name}: {e}")
+            log.error("Error restoring position for %s: %s", widget_name, e)
             # Center on screen
             self._center_widget(widget_name)
 
@@ -357,7 +365,7 @@ class WidgetManager(QObject):
                 (screen.width() - widget.width()) // 2,
                 (screen.height() - widget.height()) // 2,
             )
-            print(f"Centered {widget_name} widget on screen")
+            log.info("Centered %s widget on screen", widget_name)
 
     def eventFilter(self, obj, event):
         """Event filter to handle dragging for all widgets"""
@@ -414,7 +422,7 @@ class WidgetManager(QObject):
 
     def quit(self):
         """Clean shutdown of the application"""
-        print("Shutting down desktop widgets...")
+        log.info("Shutting down desktop widgets...")
 
         # Stop timers
         if hasattr(self, "config_check_timer"):
@@ -428,19 +436,19 @@ class WidgetManager(QObject):
             try:
                 widget.close()
             except Exception as e:
-                print(f"Error closing {name} widget: {e}")
+                log.error("Error closing %s widget: %s", name, e)
 
         # Quit the application
         self.app.quit()
 
     def run(self):
         """Run the application main loop"""
-        print("\nDesktop Widget System started with hot-reload")
-        print(
+        log.info("Desktop Widget System started with hot-reload")
+        log.info(
             "Edit widget modules to change functionality - changes apply automatically"
         )
-        print("Drag widgets to reposition them - positions are saved automatically")
-        print("Press Ctrl+Q to quit")
+        log.info("Drag widgets to reposition them - positions are saved automatically")
+        log.info("Press Ctrl+Q to quit")
 
         try:
             return self.app.exec_()
@@ -462,11 +470,12 @@ class WidgetManager(QObject):
                             # Reload the widget's config
                             self.widgets[widget_name].load_config()
                             self.widgets[widget_name].apply_config()
-                            print(
-                                f"Periodic check: Updated configuration for {widget_name} widget"
+                            log.info(
+                                "Periodic check: Updated configuration for %s widget",
+                                widget_name,
                             )
             except Exception as e:
-                print(f"Error in periodic config check for {widget_name}: {e}")
+                log.error("Error in periodic config check for %s: %s", widget_name, e)
 
 
 def main():
@@ -6,6 +6,10 @@ from PyQt5.QtWidgets import QMainWindow, QWidget
 from PyQt5.QtCore import Qt, QEvent, QTimer
 from PyQt5.QtGui import QFontDatabase, QFont
 
+from hud_log import get_logger
+
+log = get_logger("widgets")
+
 # Import Windows-specific modules if on Windows
 if os.name == "nt":
     try:
@@ -44,7 +48,7 @@ class BaseWidget(QMainWindow):
             os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
             with open(self.config_file, "w") as f:
                 json.dump(self.config, f, indent=4)
-            print(f"Created default configuration file: {self.config_file}")
+            log.info("Created default configuration file: %s", self.config_file)
 
         # Load configuration
         self.load_config()
@@ -116,7 +120,7 @@ class BaseWidget(QMainWindow):
                 win32con.SWP_NOMOVE | win32con.SWP_NOSIZE | win32con.SWP_NOACTIVATE,
             )
         except Exception as e:
-            print(f"Error setting up desktop window: {e}")
+            log.error("Error setting up desktop window: %s", e)
 
     def load_config(self):
         """Load configuration from file"""
@@ -127,9 +131,9 @@ class BaseWidget(QMainWindow):
                     # Update config with loaded values, preserving defaults for missing keys
                     for key, value in loaded_config.items():
                         self.config[key] = value
-                print(f"Loaded configuration from {self.config_file}")
+                log.debug("Loaded configuration from %s", self.config_file)
         except Exception as e:
-            print(f"Error loading configuration: {e}")
+            log.error("Error loading configuration: %s", e)
 
     def get_config_file_path(self):
         """Get the path to the config file"""
@@ -155,7 +159,7 @@ class BaseWidget(QMainWindow):
                 if os.path.exists(font_path):
                     font_id = QFontDatabase.addApplicationFont(font_path)
                     if font_id != -1:
-                        print(f"Loaded font file: {font_path}")
+                        log.debug("Loaded font file: %s", font_path)
                         font_loaded = True
                         self.font_name = QFontDatabase.applicationFontFamilies(font_id)[
                             0
@@ -170,12 +174,12 @@ class BaseWidget(QMainWindow):
                 )
                 if font_id != -1:
                     self.font_name = "Segoe UI"
-                    print(f"Using fallback font: Segoe UI")
+                    log.info("Using fallback font: Segoe UI")
                 else:
-                    print(f"Using system default font")
+                    log.info("Using system default font")
                     self.font_name = QFont().family()
             else:
-                print(f"Using system default font")
+                log.info("Using system default font")
                 self.font_name = QFont().family()
 
     def _monitor_visibility(self):
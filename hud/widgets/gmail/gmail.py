@@ -9,6 +9,9 @@ from PyQt5.QtGui import QFont, QColor
 from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QObject, QEvent
 
 from widgets.base_widget import BaseWidget, HAS_WIN32_MODULES
+from hud_log import get_logger
+
+log = get_logger("gmail")
 
 # Import IMAP client for Gmail
 from imapclient import IMAPClient
@@ -45,7 +48,7 @@ class EmailFetcher(QObject):
         while self.running:
             try:
                 if not self.email or not self.password:
-                    print("Error: Gmail credentials not available")
+                    log.error("Gmail credentials not available")
                     self.email_count_updated.emit(0)
                     time.sleep(30)  # Wait longer if no credentials
                     continue
@@ -69,7 +72,7 @@ class EmailFetcher(QObject):
                             self.email_count_updated.emit(count)
                 
             except Exception as e:
-                print(f"Email connection error: {e}")
+                log.error("Email connection error: %s", e)
                 time.sleep(5)  # Wait before retry
     
     def _get_unread_count(self, client):
@@ -79,7 +82,7 @@ class EmailFetcher(QObject):
             messages = client.search(["UNSEEN"])
             return len(messages)
         except Exception as e:
-            print(f"Error fetching unread count: {e}")
+            log.error("Error fetching unread count: %s", e)
             return 0
 
 class EmailWidget(BaseWidget):
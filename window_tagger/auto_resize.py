@@ -1,47 +1,91 @@
+import hashlib
 import json
 import os
 import time
 import sys
-import win32gui
-import win32api
-import win32con
-import win32process
-import psutil
 import keyboard
 from app_core import WindowTagger
-from ctypes import windll, byref, sizeof, c_int
-from win32api import GetSystemMetrics
+from event_trace import RecordingEventSource, RecordingSignalSource, TraceRecorder
+from latency_stats import LatencyStats
+from tag_matcher import TagMatcher
+from window_info import LazyWindowInfo
+from window_snapshot import WindowSnapshot
+from window_checkpoint import CheckpointEntry, read_checkpoint, write_checkpoint
+from window_state import WindowTable
+from tagger_config import FALLBACK_ZONE
+from tagger_log import get_logger, match_trace
+from placement_queue import (
+    PRIORITY_FOREGROUND,
+    PRIORITY_NEW,
+    PRIORITY_RESCAN,
+    PRIORITY_UNSHOWN,
+    PlacementQueue,
+)
+from placement_workers import PlacementWorkers, place_windows
+from rescan_scheduler import DEBOUNCE_DELAY, RescanScheduler
+from settle_detector import DELAYED, SETTLE_WINDOW, SettleDetector
+from window_events import (
+    CREATED,
+    DESTROYED,
+    NAME_CHANGED,
+    RESCAN,
+    SHOWN,
+    WindowEventSource,
+)
+
+log = get_logger("auto_resize")
 
 # Global variables
 zones_file = "zones.json"
 tag_definitions_file = "tag_definitions.json"
 tag_offsets_file = "tag_offsets.json"
+match_trace_file = "match_trace.log"
+checkpoint_file = "window_checkpoint.json"
+checkpoint_interval = 60  # seconds between checkpoints of the window table
+stats_file = "placement_stats.json"
+stats_interval = 60  # seconds between writes of the stats file
+safety_net_interval = 30  # seconds between full scans when events are flowing
+poll_interval = 1  # seconds between polls when window events aren't available
+rescan_delay = DEBOUNCE_DELAY  # quiet seconds after a wake/unlock before rescanning
+new_window_age = 5  # seconds a window counts as new for placement priority
+pending_age = 5  # seconds a new window not ready yet is retried on every poll
+parked_interval = 10  # seconds between retries of the parked windows
+settle_window = SETTLE_WINDOW  # seconds a placed rect must hold to count as settled
 
 zones = {}
 tag_definitions = []
+tag_matcher = TagMatcher([])
 tag_offsets = {}
-monitored_windows = set()
-
-# Taskbar state
-taskbar_hidden = False
-taskbar_window = None
+window_table = WindowTable()
+window_snapshot = WindowSnapshot()  # last enumeration, used when polling
+pending_windows = {}  # enumerated but not ready to be checked yet -> first seen
+parked_windows = set()  # pending for over pending_age, e.g. hidden for good
+parked_checked_at = 0.0  # when the parked windows were last retried
+placement_queue = PlacementQueue()
+placement_workers = None  # PlacementWorkers while monitoring, else moves run inline
+checkpoint_signature = None  # table state at the last checkpoint
+target_rects = {}  # (tag name, offsets) -> target rect, for target_rects_version
+target_rects_version = None  # match cache version the rects were computed for
+latency_stats = LatencyStats()  # placement, match, process and native call times
+settle_detector = SettleDetector(settle_window)  # windows resizing themselves
+early_placements = 0  # windows placed before they were first shown
 
 
 def load_configs():
     """Load all configuration files"""
-    global zones, tag_definitions, tag_offsets
+    global zones, tag_definitions, tag_matcher, tag_offsets
 
     # Load zones
     if os.path.exists(zones_file):
         try:
             with open(zones_file, "r") as f:
                 zones = json.load(f)
-            print(f"Loaded {len(zones)} zones")
+            log.info("Loaded %s zones", len(zones))
         except Exception as e:
-            print(f"Error loading zones: {e}")
+            log.error("Error loading zones: %s", e)
             return False
     else:
-        print(f"Zones file not found: {zones_file}")
+        log.warning("Zones file not found: %s", zones_file)
         return False
 
     # Load tag definitions
@@ -49,12 +93,13 @@ def load_configs():
         try:
             with open(tag_definitions_file, "r") as f:
                 tag_definitions = json.load(f)
-            print(f"Loaded {len(tag_definitions)} tag definitions")
+            tag_matcher = TagMatcher(tag_definitions)
+            log.info("Loaded %s tag definitions", len(tag_definitions))
         except Exception as e:
-            print(f"Error loading tag definitions: {e}")
+            log.error("Error loading tag definitions: %s", e)
             return False
     else:
-        print(f"Tag definitions file not found: {tag_definitions_file}")
+        log.warning("Tag definitions file not found: %s", tag_definitions_file)
         return False
 
     # Load tag offsets
@@ -62,103 +107,190 @@ def load_configs():
         try:
             with open(tag_offsets_file, "r") as f:
                 tag_offsets = json.load(f)
-            print(f"Loaded {len(tag_offsets)} tag offsets")
+            log.info("Loaded %s tag offsets", len(tag_offsets))
         except Exception as e:
-            print(f"Error loading tag offsets: {e}")
+            log.error("Error loading tag offsets: %s", e)
             return False
     else:
-        print(f"Tag offsets file not found: {tag_offsets_file}")
+        log.warning("Tag offsets file not found: %s", tag_offsets_file)
         return False
 
     return True
 
 
-def is_valid_window(hwnd):
+def reset_window_state():
+    """Forget every tracked window, as if the daemon had just started"""
+    global window_table, window_snapshot, placement_queue, checkpoint_signature
+    global early_placements, latency_stats, settle_detector, parked_checked_at
+    window_table = WindowTable()
+    window_snapshot = WindowSnapshot()
+    placement_queue = PlacementQueue()
+    checkpoint_signature = None
+    pending_windows.clear()
+    parked_windows.clear()
+    parked_checked_at = 0.0
+    latency_stats = LatencyStats()
+    settle_detector = SettleDetector(settle_window)
+    early_placements = 0
+
+
+def rules_fingerprint(tagger):
+    """Get a digest of the tagger's rules, zones and offsets"""
+    data = json.dumps(
+        [tagger.definitions, tagger.zones, tagger.tag_zones, tagger.offsets],
+        sort_keys=True,
+    )
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+def save_window_checkpoint(tagger):
+    """Write the checked windows to the checkpoint file if anything changed"""
+    global checkpoint_signature
+
+    latest = max((record.updated_at for record in window_table), default=0)
+    signature = (len(window_table), latest)
+    if signature == checkpoint_signature:
+        return
+
+    processes = tagger.backend.processes
+    entries = []
+    for record in window_table:
+        if not record.checked:
+            continue
+        process = processes.lookup(record.pid)
+        if process is None:
+            continue
+        entries.append(
+            CheckpointEntry(
+                record.hwnd,
+                record.pid,
+                process.create_time,
+                record.tag_name,
+                record.last_title,
+                record.applied_rect,
+            )
+        )
+
+    try:
+        write_checkpoint(checkpoint_file, entries, rules_fingerprint(tagger))
+        checkpoint_signature = signature
+        log.debug("Checkpointed %s windows", len(entries))
+    except Exception as e:
+        log.error("Error writing checkpoint: %s", e)
+
+
+def restore_window_checkpoint(tagger):
+    """Take back the windows handled before a restart; get how many
+
+    A window is restored only if its hwnd still belongs to the same
+    process. Restored windows count as checked, so the startup scan
+    leaves them, and any window moved by hand since, where they are.
+    """
+    entries = read_checkpoint(checkpoint_file, rules_fingerprint(tagger))
+    if not entries:
+        return 0
+
+    backend = tagger.backend
+    restored = 0
+    for entry in entries:
+        try:
+            hwnd = entry.hwnd
+            if not backend.is_window(hwnd) or backend.get_pid(hwnd) != entry.pid:
+                continue
+            process = backend.processes.lookup(entry.pid)
+            if process is None or process.create_time != entry.create_time:
+                continue
+
+            class_name = backend.get_class_name(hwnd)
+            record = window_table.add(hwnd, entry.pid, class_name)
+            record.tag_name = entry.tag_name
+            record.applied_rect = entry.rect
+            # A title changed while we were down is picked up as a change
+            record.last_title = entry.title
+            record.checked = True
+
+            window_info = LazyWindowInfo(
+                entry.pid,
+                processes=backend.processes,
+                hwnd=hwnd,
+                class_name=class_name,
+                window_title=entry.title,
+            )
+            if tagger.matcher.has_title_rules(window_info["process_name"], class_name):
+                window_table.set_title_watch(record, TitleWatch(tagger, window_info))
+            restored += 1
+        except Exception as e:
+            log.error("Error restoring window: %s", e)
+
+    log.info("Restored %s of %s windows from checkpoint", restored, len(entries))
+    return restored
+
+
+def is_valid_window(backend, hwnd):
     """Check if window is valid for processing"""
-    if not win32gui.IsWindowVisible(hwnd):
+    if not backend.is_visible(hwnd):
         return False
 
-    if not win32gui.IsWindow(hwnd):
+    if not backend.is_window(hwnd):
         return False
 
     # Ignore windows with no title
-    title = win32gui.GetWindowText(hwnd)
+    title = backend.get_title(hwnd)
     if not title:
         return False
 
     # Ignore minimized windows
-    if win32gui.IsIconic(hwnd):
+    if backend.is_minimized(hwnd):
         return False
 
     return True
 
 
-def get_window_tag(hwnd):
+def get_window_tag(backend, hwnd):
     """Get tag for a window based on the tag definitions"""
-    global tag_definitions
-
     try:
         # Get window info
-        title = win32gui.GetWindowText(hwnd)
-        class_name = win32gui.GetClassName(hwnd)
+        title = backend.get_title(hwnd)
+        class_name = backend.get_class_name(hwnd)
 
         # Get process name
-        _, process_id = win32process.GetWindowThreadProcessId(hwnd)
-
-        # This requires psutil which you might need to install
-        # For now, we'll just use a simpler approach
-        process_name = None
-
-        # Check each tag definition
-        for tag_def in tag_definitions:
-            match = True
-
-            # Check class name if defined
-            if "class_name" in tag_def and tag_def["class_name"] != class_name:
-                match = False
-
-            # Check process name if defined and available
-            if (
-                process_name
-                and "process_name" in tag_def
-                and tag_def["process_name"] != process_name
-            ):
-                match = False
-
-            # Check title substring if defined
-            if "title_substring" in tag_def and tag_def["title_substring"] not in title:
-                match = False
+        window_info = LazyWindowInfo(
+            backend.get_pid(hwnd), processes=backend.processes, window_title=title
+        )
 
-            if match:
-                return tag_def["name"]
+        # All title substrings are checked in a single pass over the title
+        rule = tag_matcher.match(
+            window_info["process_name"], class_name, title, window_info
+        )
+        if rule:
+            return rule.name
 
     except Exception as e:
-        print(f"Error getting window tag: {e}")
+        log.error("Error getting window tag: %s", e)
 
     return None
 
 
-def get_window_geometry(hwnd):
+def get_window_geometry(backend, hwnd):
     """Get window geometry"""
-    rect = RECT()
-    windll.user32.GetWindowRect(hwnd, byref(rect))
+    x, y, width, height = backend.get_rect(hwnd)
 
     return {
-        "x": rect.left,
-        "y": rect.top,
-        "width": rect.right - rect.left,
-        "height": rect.bottom - rect.top,
+        "x": x,
+        "y": y,
+        "width": width,
+        "height": height,
     }
 
 
-def apply_zone_with_offsets(hwnd, tag_name):
+def apply_zone_with_offsets(backend, hwnd, tag_name):
     """Apply a zone to a window with tag-specific offsets"""
     global zones, tag_offsets
 
     # Default to "centered" zone
     zone_name = "centered"
     if zone_name not in zones:
-        print(f"Zone '{zone_name}' not found")
+        log.warning("Zone '%s' not found", zone_name)
         return False
 
     zone = zones[zone_name]
@@ -171,11 +303,10 @@ def apply_zone_with_offsets(hwnd, tag_name):
         )
 
         # Get window geometry
-        geo = get_window_geometry(hwnd)
+        geo = get_window_geometry(backend, hwnd)
 
         # Calculate screen center
-        screen_width = win32api.GetSystemMetrics(win32con.SM_CXSCREEN)
-        screen_height = win32api.GetSystemMetrics(win32con.SM_CYSCREEN)
+        screen_width, screen_height = backend.get_screen_size()
 
         # Calculate new position
         new_width = zone.get("width", screen_width * 0.8) + offsets["width_offset"]
@@ -190,184 +321,719 @@ def apply_zone_with_offsets(hwnd, tag_name):
             new_y = (screen_height - new_height) // 2 + offsets["y_offset"]
 
         # Print details
-        title = win32gui.GetWindowText(hwnd)
-        print(f"Applying zone to '{title}' with tag '{tag_name}'")
-        print(f"  Position: ({new_x}, {new_y})")
-        print(f"  Size: {new_width}x{new_height}")
-        print(
-            f"  Offsets: x:{offsets['x_offset']}, y:{offsets['y_offset']}, w:{offsets['width_offset']}, h:{offsets['height_offset']}"
+        title = backend.get_title(hwnd)
+        log.info("Applying zone to '%s' with tag '%s'", title, tag_name)
+        log.debug("  Position: (%s, %s)", new_x, new_y)
+        log.debug("  Size: %sx%s", new_width, new_height)
+        log.debug(
+            "  Offsets: x:%s, y:%s, w:%s, h:%s",
+            offsets["x_offset"],
+            offsets["y_offset"],
+            offsets["width_offset"],
+            offsets["height_offset"],
         )
 
         # Set window position
-        win32gui.SetWindowPos(
-            hwnd,
-            win32con.HWND_TOP,
-            int(new_x),
-            int(new_y),
-            int(new_width),
-            int(new_height),
-            win32con.SWP_SHOWWINDOW,
+        backend.move_window(
+            hwnd, int(new_x), int(new_y), int(new_width), int(new_height)
         )
 
-        # Add to monitored windows
-        monitored_windows.add(hwnd)
+        # Remember what was applied
+        record = window_table.get(hwnd)
+        if record is not None:
+            record.applied_rect = (
+                int(new_x),
+                int(new_y),
+                int(new_width),
+                int(new_height),
+            )
+            record.touch()
         return True
     except Exception as e:
-        print(f"Error applying zone: {e}")
+        log.error("Error applying zone: %s", e)
         return False
 
 
 def enum_windows_callback(hwnd, tagger):
-    """Process each window"""
-    if hwnd not in monitored_windows and is_valid_window(hwnd):
-        try:
-            # Get window info
-            _, pid = win32process.GetWindowThreadProcessId(hwnd)
+    """Process each window
+
+    Returns False if the window can't be processed yet (hidden, untitled
+    or minimized), True once it has been checked.
+    """
+    backend = tagger.backend
+    record = window_table.get(hwnd)
+    if record is not None and record.checked:
+        return True
+    if not is_valid_window(backend, hwnd):
+        return False
 
-            try:
-                process = psutil.Process(pid)
-                process_name = process.name()
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                process_name = "unknown"
-
-            window_title = win32gui.GetWindowText(hwnd)
-            class_name = win32gui.GetClassName(hwnd)
-
-            # Get window position and size
-            rect = win32gui.GetWindowRect(hwnd)
-            x = rect[0]
-            y = rect[1]
-            width = rect[2] - x
-            height = rect[3] - y
-
-            window_info = {
-                "hwnd": hwnd,
-                "process_name": process_name,
-                "window_title": window_title,
-                "class_name": class_name,
-                "x": x,
-                "y": y,
-                "width": width,
-                "height": height,
-            }
-
-            # Try to find a matching tag using the exact same function as in app_core.py
-            tag_info = tagger.get_existing_tag_info(window_info)
-
-            if tag_info:
-                tag_name, offsets = tag_info
-
-                # Get the centered zone
-                centered = tagger.get_centered_zone()
-
-                # Get offsets for this tag
-                x_offset = offsets.get("x_offset", 0)
-                y_offset = offsets.get("y_offset", 0)
-                width_offset = offsets.get("width_offset", 0)
-                height_offset = offsets.get("height_offset", 0)
-
-                print(f"Tagged window: '{window_title}' (Class: {class_name})")
-                print(f"  Tag: {tag_name}")
-                print(
-                    f"  Applying offsets: x:{x_offset}, y:{y_offset}, w:{width_offset}, h:{height_offset}"
-                )
-
-                # Apply centering with offsets using the exact same function from app_core.py
-                tagger.position_window_with_offsets(
-                    hwnd,
-                    centered.get("x", 0),
-                    centered.get("y", 0),
-                    centered.get("width", 0),
-                    centered.get("height", 0),
-                    x_offset,
-                    y_offset,
-                    width_offset,
-                    height_offset,
-                )
-
-                # Flash the window to indicate success
-                win32gui.FlashWindow(hwnd, True)
-
-            # Add to monitored windows regardless of whether we centered it
-            monitored_windows.add(hwnd)
+    try:
+        # The pid and class never change, so they are read once per window
+        if record is None:
+            record = window_table.add(
+                hwnd, backend.get_pid(hwnd), backend.get_class_name(hwnd)
+            )
+        class_name = record.class_name
 
-        except Exception as e:
-            print(f"Error processing window: {e}")
+        # psutil is only consulted for the attributes the rules ask for
+        window_info = LazyWindowInfo(
+            record.pid, processes=backend.processes, hwnd=hwnd, class_name=class_name
+        )
 
+        start = time.perf_counter()
+        process_name = window_info["process_name"]
+        process_time = time.perf_counter() - start
+
+        # Most windows match nothing; skip those before doing any more work
+        if tagger.is_known_untagged(process_name, class_name):
+            latency_stats.record("process", None, process_time)
+            record.tag_name = None
+            record.checked = True
+            record.touch()
+            return True
+
+        window_title = backend.get_title(hwnd)
+        record.last_title = window_title
+
+        # Get window position and size
+        x, y, width, height = backend.get_rect(hwnd)
+        window_info.update(
+            window_title=window_title,
+            x=x,
+            y=y,
+            width=width,
+            height=height,
+        )
 
-def get_system_power_status():
-    """Get current system power status"""
-    SYSTEM_POWER_STATUS = c_int * 6
-    power_status = SYSTEM_POWER_STATUS()
-    windll.kernel32.GetSystemPowerStatus(byref(power_status))
-    return power_status[0]  # 0 = AC, 1 = DC, 255 = Unknown
+        # Try to find a matching tag using the exact same function as in app_core.py
+        start = time.perf_counter()
+        tag_info = tagger.get_existing_tag_info(window_info)
+        record.tag_name = tag_info[0] if tag_info else None
+        latency_stats.record("match", record.tag_name, time.perf_counter() - start)
+        latency_stats.record("process", record.tag_name, process_time)
+
+        if tag_info:
+            tag_name, offsets = tag_info
+            place_tagged_window(
+                tagger,
+                hwnd,
+                tag_name,
+                offsets,
+                window_title,
+                class_name,
+                placement_priority(tagger, record),
+            )
 
+        # Windows that could be re-tagged by a title change keep being watched
+        if tagger.matcher.has_title_rules(window_info["process_name"], class_name):
+            window_table.set_title_watch(record, TitleWatch(tagger, window_info))
+        else:
+            window_table.set_title_watch(record, None)
 
-def handle_wake_event(tagger):
-    """Handle system wake event by rechecking all windows"""
-    global monitored_windows
-    print("System wake detected - rechecking windows...")
-    monitored_windows.clear()  # Clear monitored windows to force recheck
-    win32gui.EnumWindows(lambda hwnd, param: enum_windows_callback(hwnd, tagger), None)
+        # Mark as checked regardless of whether we centered it
+        record.checked = True
+        record.touch()
 
+    except Exception as e:
+        log.error("Error processing window: %s", e)
+    return True
 
-def monitor_windows(tagger):
-    """Monitor for windows and apply tags to new ones"""
-    print("Monitoring for new windows...")
-    print("Press Ctrl+C to stop")
 
-    last_power_status = get_system_power_status()
+def placement_priority(tagger, record):
+    """The active window goes first, then windows that just appeared"""
+    if record.hwnd == tagger.backend.get_foreground_window():
+        return PRIORITY_FOREGROUND
+    if time.time() - record.created_at < new_window_age:
+        return PRIORITY_NEW
+    return PRIORITY_RESCAN
+
+
+def place_tagged_window(
+    tagger,
+    hwnd,
+    tag_name,
+    offsets,
+    window_title,
+    class_name,
+    priority=PRIORITY_NEW,
+):
+    """Queue a tagged window for its zone with its offsets
+
+    Returns the target rect. The move itself happens in apply_placements.
+    Windows of a tag known to resize itself after placement are held back
+    by the tag's learned settle delay first.
+    """
+    rect = get_target_rect(tagger, tag_name, offsets)
+
+    log.info("Tagged window: '%s' (Class: %s)", window_title, class_name)
+    log.debug("  Tag: %s", tag_name)
+    log.debug("  Target rect: %s", rect)
+
+    # Windows only moved back by a rescan aren't flashed
+    flash = priority != PRIORITY_RESCAN
+    if flash and settle_detector.delay(hwnd, tag_name, rect, priority, flash):
+        log.debug("  Delayed until the app settles")
+        return rect
+    placement_queue.push(hwnd, rect, priority, flash)
+    return rect
+
+
+def get_target_rect(tagger, tag_name, offsets):
+    """Get a tag's zone with its offsets, computed once per ruleset
+
+    Tags without a default zone go to the fallback zone.
+    """
+    global target_rects_version
+
+    # The version changes whenever the rules, offsets or zones are reloaded
+    if target_rects_version != tagger.match_cache.version:
+        target_rects.clear()
+        target_rects_version = tagger.match_cache.version
+
+    key = tag_name, tuple(offsets.items())
+    rect = target_rects.get(key)
+    if rect is None:
+        _, rect = tagger.get_target_rect(tag_name, offsets, FALLBACK_ZONE)
+        target_rects[key] = rect
+    return rect
+
+
+def place_before_shown(tagger, event):
+    """Place a window on its create event, before it is first painted
+
+    The title is often still empty at this point, so only windows whose
+    tag can't change with the title are placed this early. Everything
+    else waits for the show event as usual. When that comes, a window
+    placed here is already where it belongs and isn't moved again.
+    """
+    global early_placements
+
+    backend = tagger.backend
+    hwnd = event.hwnd
+    if hwnd in window_table or not backend.is_window(hwnd):
+        return
+    if backend.is_visible(hwnd):
+        return  # Too late; the show event takes it from here
 
     try:
-        while True:
-            # Check for power status changes (sleep/wake)
-            current_power_status = get_system_power_status()
-            if current_power_status != last_power_status:
-                if current_power_status == 0:  # AC power (wake)
-                    handle_wake_event(tagger)
-                last_power_status = current_power_status
-
-            # Check for new windows
-            win32gui.EnumWindows(
-                lambda hwnd, param: enum_windows_callback(hwnd, tagger), None
+        record = window_table.add(
+            hwnd, backend.get_pid(hwnd), backend.get_class_name(hwnd)
+        )
+        record.detected_at = event.timestamp
+        class_name = record.class_name
+
+        window_info = LazyWindowInfo(
+            record.pid,
+            processes=backend.processes,
+            hwnd=hwnd,
+            class_name=class_name,
+            window_title=backend.get_title(hwnd),
+        )
+        process_name = window_info["process_name"]
+        if tagger.is_known_untagged(process_name, class_name):
+            return
+        if tagger.matcher.has_title_rules(process_name, class_name):
+            return
+
+        start = time.perf_counter()
+        tag_info = tagger.get_existing_tag_info(window_info)
+        tag_name = tag_info[0] if tag_info else None
+        latency_stats.record("match", tag_name, time.perf_counter() - start)
+        if not tag_info:
+            return
+        if settle_detector.learned_delay(tag_info[0]):
+            return  # The app would undo it; placed late from the show event
+
+        # Applied right away rather than on the next frame, which could
+        # come after the first paint. Only this window jumps the line; the
+        # rest of the queue keeps its pace
+        tag_name, offsets = tag_info
+        rect = get_target_rect(tagger, tag_name, offsets)
+        placement_queue.push(hwnd, rect, PRIORITY_UNSHOWN, flash=False)
+        apply_requests(tagger, [placement_queue.pop(hwnd)])
+        early_placements += 1
+        log.debug("Placed window %s before it was shown", hwnd)
+    except Exception as e:
+        log.error("Error placing new window: %s", e)
+
+
+def apply_placements(tagger, paced=True):
+    """Apply the queued moves that are due this frame; get how many
+
+    With placement workers, the moves are only started here and their
+    results are picked up by a later call.
+    """
+    if placement_workers is not None:
+        collect_placements()
+
+    requests = placement_queue.pop_frame(paced)
+    apply_requests(tagger, requests)
+    return len(requests)
+
+
+def apply_requests(tagger, requests):
+    """Move the windows of popped requests that still exist"""
+    backend = tagger.backend
+    live = [request for request in requests if backend.is_window(request.hwnd)]
+    if not live:
+        return
+
+    # The frame's moves go out as one transaction
+    try:
+        if placement_workers is not None:
+            placement_workers.submit(live)
+        else:
+            rects = place_windows(backend, live)
+            for request in live:
+                placement_done(request, rects[request.hwnd])
+    except Exception as e:
+        log.error("Error placing windows: %s", e)
+
+
+def placement_done(request, rect):
+    """Remember the rect a placement left its window at"""
+    record = window_table.get(request.hwnd)
+    if record is not None:
+        record.applied_rect = rect
+        record.touch()
+        latency_stats.record("native", record.tag_name, request.native_time)
+        if record.detected_at is not None:
+            latency_stats.record(
+                "placement", record.tag_name, time.perf_counter() - record.detected_at
             )
+            record.detected_at = None
 
-            # Sleep to reduce CPU usage
-            time.sleep(1)
-    except KeyboardInterrupt:
-        print("Monitoring stopped")
+        # Watch new placements in case the app resizes itself right after
+        if request.priority != PRIORITY_RESCAN and record.tag_name:
+            settle_detector.watch(
+                request.hwnd, record.tag_name, rect, request.priority
+            )
 
 
-def toggle_taskbar():
-    """Toggle the visibility of the Windows taskbar"""
-    global taskbar_window, taskbar_hidden
+def collect_placements():
+    """Pick up finished moves and queue the retries of hung windows"""
+    for request, rect, error in placement_workers.collect():
+        if error is not None:
+            log.error("Error placing window: %s", error)
+        else:
+            placement_done(request, rect)
+
+    for request in placement_workers.due_retries():
+        # A newer target queued since then wins
+        if request.hwnd not in placement_queue:
+            placement_queue.push(
+                request.hwnd, request.rect, request.priority, request.flash
+            )
+
+
+def check_settling(tagger):
+    """Place held back windows that are due and look at watched ones
+
+    A watched window the app moved away from its target gets the
+    placement again, without a flash.
+    """
+    backend = tagger.backend
+    for entry in settle_detector.pop_due():
+        hwnd = entry.hwnd
+        if not backend.is_window(hwnd) or backend.is_minimized(hwnd):
+            settle_detector.forget(hwnd)
+        elif entry.state == DELAYED:
+            placement_queue.push(hwnd, entry.rect, entry.priority, entry.flash)
+        elif hwnd not in placement_queue:
+            try:
+                if settle_detector.check(entry, backend.get_rect(hwnd)):
+                    log.debug("Window %s moved itself, placing it again", hwnd)
+                    placement_queue.push(hwnd, entry.rect, entry.priority, False)
+            except Exception as e:
+                settle_detector.forget(hwnd)
+                log.error("Error checking window rect: %s", e)
+
+
+def drain_placements(tagger):
+    """Apply every queued move now, without pacing
+
+    Moves to hung windows stay deferred rather than being waited for.
+    """
+    while placement_queue:
+        apply_placements(tagger, paced=False)
+    if placement_workers is not None:
+        placement_workers.wait(placement_workers.timeout)
+        collect_placements()
+
+
+def write_stats():
+    """Write the latency histograms and placement counters to stats_file"""
+    try:
+        latency_stats.write(
+            stats_file,
+            queue=placement_queue.stats(),
+            workers=placement_workers.stats() if placement_workers else None,
+            early_placements=early_placements,
+            settle=settle_detector.stats(),
+            windows=len(window_table),
+        )
+    except Exception as e:
+        log.error("Error writing stats: %s", e)
+
+
+def log_placement_stats():
+    """Log the placement queue metrics"""
+    stats = placement_queue.stats()
+    log.info(
+        "Placement queue: %s queued (max %s), "
+        "%s applied, %s superseded, "
+        "wait %.1f ms avg / %.1f ms max",
+        stats["depth"],
+        stats["max_depth"],
+        stats["applied"],
+        stats["superseded"],
+        stats["avg_wait_ms"],
+        stats["max_wait_ms"],
+    )
+    placement = latency_stats.get("placement")
+    if placement is not None:
+        summary = placement.summary()
+        log.info(
+            "New window placement: %.1f ms p50, "
+            "%.1f ms p99 from the window event, "
+            "%s placed before being shown",
+            summary["p50_ms"],
+            summary["p99_ms"],
+            early_placements,
+        )
+    if placement_workers is not None:
+        stats = placement_workers.stats()
+        log.info(
+            "Placement workers: %s moves, %s deferred for hung windows, %s timed out",
+            stats["submitted"],
+            stats["deferrals"],
+            stats["timed_out"],
+        )
+    stats = settle_detector.stats()
+    if stats["reapplied"]:
+        delays = ", ".join(
+            f"{tag_name} {delay:.0f} ms"
+            for tag_name, delay in stats["tag_delays_ms"].items()
+        )
+        log.info(
+            "Self-resizing windows: %s placements re-applied, "
+            "%s given up on; learned delays: %s",
+            stats["reapplied"],
+            stats["given_up"],
+            delays or "none",
+        )
+
+
+class TitleWatch:
+    """Title tracking for a window whose tag can change with its title
+
+    The title independent part of the match is computed once, so a title
+    change only re-runs the pair's title rules that come before it.
+    """
+
+    def __init__(self, tagger, window_info):
+        self.window_info = window_info
+        self.matcher = None
+        self.base_rule = None
+        self.refresh_base(tagger)
+
+    def refresh_base(self, tagger):
+        """Recompute the title independent match for the current ruleset"""
+        self.matcher = tagger.matcher
+        self.base_rule = self.matcher.match_title_independent(
+            self.window_info["process_name"],
+            self.window_info.get("class_name", ""),
+            self.window_info,
+        )
+
+    def match(self, tagger, window_title):
+        """Get the tag name for the window under a new title"""
+        if self.matcher is not tagger.matcher:
+            self.refresh_base(tagger)
+
+        rule = self.matcher.match_title_rules(
+            self.window_info["process_name"],
+            self.window_info.get("class_name", ""),
+            window_title,
+            self.window_info,
+            before=self.base_rule.index if self.base_rule else None,
+        )
+        rule = rule or self.base_rule
+        return rule.name if rule else None
+
+
+def check_title_changes(tagger):
+    """Re-tag watched windows whose title changed since the last check"""
+    for record in window_table.watched():
+        check_title_change(tagger, record)
+
+
+def check_title_change(tagger, record):
+    """Re-tag one watched window if its title changed since the last check"""
+    watch = record.title_watch
+    hwnd = record.hwnd
+    if watch is None:
+        return
+
+    try:
+        if not tagger.backend.is_window(hwnd):
+            window_table.remove(hwnd)
+            return
 
-    # Find taskbar window if not already found
-    if not taskbar_window:
-        taskbar_window = win32gui.FindWindow("Shell_TrayWnd", None)
-        if not taskbar_window:
-            print("Taskbar window not found")
+        window_title = tagger.backend.get_title(hwnd)
+        if window_title == record.last_title:
             return
+        record.last_title = window_title
+        record.touch()
+
+        start = time.perf_counter()
+        tag_name = watch.match(tagger, window_title)
+        latency_stats.record("match", tag_name, time.perf_counter() - start)
+        match_trace.record(
+            "title",
+            hwnd,
+            watch.window_info["process_name"],
+            record.class_name,
+            window_title,
+            tag_name,
+        )
+        if tag_name is None or tag_name == record.tag_name:
+            return
+        record.tag_name = tag_name
+
+        place_tagged_window(
+            tagger,
+            hwnd,
+            tag_name,
+            tagger.offsets.get(tag_name, {}),
+            window_title,
+            record.class_name,
+            placement_priority(tagger, record),
+        )
+
+    except Exception as e:
+        log.error("Error checking title change: %s", e)
+
+
+def handle_window_event(tagger, event):
+    """React to a single window event instead of rescanning every window"""
+    if event.kind == DESTROYED:
+        window_table.remove(event.hwnd)
+        placement_queue.discard(event.hwnd)
+        settle_detector.forget(event.hwnd)
+        if placement_workers is not None:
+            placement_workers.discard(event.hwnd)
+    elif event.kind == CREATED:
+        place_before_shown(tagger, event)
+    elif event.kind == SHOWN:
+        known = event.hwnd in window_table
+        enum_windows_callback(event.hwnd, tagger)
+        record = window_table.get(event.hwnd)
+        if not known and record is not None:
+            record.detected_at = event.timestamp
+    elif event.kind == NAME_CHANGED:
+        record = window_table.get(event.hwnd)
+        if record is not None and record.checked:
+            check_title_change(tagger, record)
+        else:
+            # Windows often get their title only after being shown
+            enum_windows_callback(event.hwnd, tagger)
+    elif event.kind == RESCAN:
+        handle_rescan(tagger)
+
+
+def scan_all_windows(tagger):
+    """Full pass over every top-level window"""
+    # One sweep of the process table instead of a lookup per window
+    tagger.backend.processes.refresh()
+
+    hwnds = tagger.backend.enum_windows()
+    for hwnd in hwnds:
+        enum_windows_callback(hwnd, tagger)
+
+    # Windows that weren't enumerated are gone
+    window_table.prune(set(hwnds))
+    check_title_changes(tagger)
+
+
+def poll_windows(tagger):
+    """Polling pass for when window events aren't available
+
+    Only windows that appeared or disappeared since the last poll are
+    looked at, plus the ones that appeared but weren't ready to be checked
+    yet (hidden or still untitled). Those are retried on every poll for
+    pending_age seconds, then parked and retried every parked_interval
+    seconds, since most hidden windows never show.
+    """
+    global parked_checked_at
+
+    added, removed = window_snapshot.update(tagger.backend.enum_windows())
+
+    for hwnd in removed:
+        window_table.remove(hwnd)
+        pending_windows.pop(hwnd, None)
+        parked_windows.discard(hwnd)
+    now = time.monotonic()
+    for hwnd in added:
+        pending_windows[hwnd] = now
+
+    for hwnd, first_seen in list(pending_windows.items()):
+        if enum_windows_callback(hwnd, tagger):
+            del pending_windows[hwnd]
+        elif now - first_seen >= pending_age:
+            del pending_windows[hwnd]
+            parked_windows.add(hwnd)
+
+    if parked_windows and now - parked_checked_at >= parked_interval:
+        parked_checked_at = now
+        for hwnd in list(parked_windows):
+            if enum_windows_callback(hwnd, tagger):
+                parked_windows.discard(hwnd)
+
+    check_title_changes(tagger)
+    if added or removed:
+        log.debug(
+            "Poll: %s added, %s removed, %s pending, %s parked",
+            len(added),
+            len(removed),
+            len(pending_windows),
+            len(parked_windows),
+        )
 
-    # Toggle visibility
-    if taskbar_hidden:
-        win32gui.ShowWindow(taskbar_window, win32con.SW_SHOW)
-        taskbar_hidden = False
-        print("Taskbar shown")
-    else:
-        win32gui.ShowWindow(taskbar_window, win32con.SW_HIDE)
-        taskbar_hidden = True
-        print("Taskbar hidden")
 
+def handle_rescan(tagger):
+    """Recheck all windows after a wake, unlock or display change"""
+    log.info("Rechecking windows...")
+    window_table.uncheck_all()  # Force a recheck but keep what we know
+    scan_all_windows(tagger)
 
-def hide_taskbar_on_startup():
-    """Hide the taskbar when the application starts"""
-    global taskbar_window, taskbar_hidden
-    taskbar_window = win32gui.FindWindow("Shell_TrayWnd", None)
-    if taskbar_window:
-        win32gui.ShowWindow(taskbar_window, win32con.SW_HIDE)
-        taskbar_hidden = True
-        print("Taskbar hidden on startup")
+    stats = tagger.match_cache.stats()
+    log.info(
+        "Match cache: %s hits, %s misses, %s/%s entries",
+        stats["hits"],
+        stats["misses"],
+        stats["size"],
+        stats["maxsize"],
+    )
+    log_placement_stats()
+
+
+def handle_pending_events(tagger, event_source, timeout=1):
+    """Wait up to timeout seconds for window events and handle them all"""
+    event = event_source.get(timeout=timeout)
+    if event is None:
+        return 0
+    handle_window_event(tagger, event)
+    events = event_source.drain()
+    for event in events:
+        handle_window_event(tagger, event)
+    return len(events) + 1
+
+
+def monitor_windows(tagger, event_source=None, stop=None, signal_source=None):
+    """Monitor for windows and apply tags to new ones
+
+    Window events drive the loop. A full scan still runs every
+    safety_net_interval seconds to catch anything the events missed.
+    If the event source can't deliver events, the loop polls once a
+    second and only handles the windows that changed. Runs until Ctrl+C,
+    or until the stop event (a threading.Event) is set.
+
+    Placements go through the placement queue, which the loop drains a
+    few moves per frame. The moves themselves run on placement workers,
+    so a window that stopped responding can't stall the loop. Placed
+    windows are watched by the settle detector until their rect holds, so
+    apps that resize themselves right after placement get placed again.
+
+    The window table is checkpointed every checkpoint_interval seconds
+    and on exit, and restored at startup, so a restart doesn't move every
+    window again.
+
+    Wake, unlock and display change signals go through a rescan
+    scheduler, which turns each burst of them into one RESCAN event.
+    The rescan itself runs here, in order with the window events.
+    """
+    global placement_workers
+
+    log.info("Monitoring for new windows...")
+    log.info("Press Ctrl+C to stop")
+
+    backend = tagger.backend
+    placement_workers = PlacementWorkers(backend)
+    if event_source is None:
+        event_source = backend.create_event_source()
+    if signal_source is None:
+        signal_source = backend.create_signal_source()
+    event_source.start()
+    scheduler = RescanScheduler(
+        lambda reasons: event_source.emit(RESCAN, 0), delay=rescan_delay
+    )
+    scheduler.start()
+    signal_source.start(scheduler.request)
+
+    restore_window_checkpoint(tagger)
+    check_title_changes(tagger)
+
+    polling = not event_source.delivers_events
+    if polling:
+        log.info("Window events unavailable - polling for changes")
+        backend.processes.refresh()
+        poll_windows(tagger)
+    else:
+        scan_all_windows(tagger)
+    last_full_scan = last_poll = last_checkpoint = last_stats = time.monotonic()
+
+    try:
+        while True:
+            # Wait for window events, waking up at least once a second, or
+            # sooner when queued placements are due or moves need checking
+            if placement_queue:
+                timeout = placement_queue.time_until_frame()
+            else:
+                timeout = 1
+                for check in (
+                    placement_workers.next_check(placement_queue.frame_interval),
+                    settle_detector.time_until_due(),
+                ):
+                    if check is not None:
+                        timeout = min(timeout, check)
+            handle_pending_events(tagger, event_source, timeout)
+            check_settling(tagger)
+            apply_placements(tagger)
+
+            # The loop wakes up at frame rate while placements are due, but
+            # polling stays at its own pace
+            if polling:
+                if time.monotonic() - last_poll >= poll_interval:
+                    poll_windows(tagger)
+                    last_poll = time.monotonic()
+            elif time.monotonic() - last_full_scan >= safety_net_interval:
+                # Low-rate safety net in case an event was missed
+                scan_all_windows(tagger)
+                last_full_scan = time.monotonic()
+
+            if time.monotonic() - last_checkpoint >= checkpoint_interval:
+                save_window_checkpoint(tagger)
+                last_checkpoint = time.monotonic()
+
+            if time.monotonic() - last_stats >= stats_interval:
+                write_stats()
+                last_stats = time.monotonic()
+
+            if stop is not None and stop.is_set():
+                drain_placements(tagger)
+                break
+    except KeyboardInterrupt:
+        log.info("Monitoring stopped")
+    finally:
+        save_window_checkpoint(tagger)
+        write_stats()
+        log_placement_stats()
+        signal_source.stop()
+        scheduler.stop()
+        event_source.stop()
+        placement_workers.shutdown()
+        placement_workers = None
 
 
 def center_active_window_with_tag(tagger):
@@ -379,17 +1045,24 @@ def center_active_window_with_tag(tagger):
     tag_info = tagger.get_existing_tag_info(window_info)
 
     if not tag_info:
-        print("No matching tag found for the active window.")
+        log.info("No matching tag found for the active window.")
         # Flash the window to indicate error
-        win32gui.FlashWindow(window_info["hwnd"], True)
+        tagger.backend.flash_window(window_info["hwnd"])
         return False
 
     tag_name, offsets = tag_info
 
+    # Moving a window that isn't responding could block the hotkey
+    if tagger.backend.is_hung(window_info["hwnd"]):
+        log.info("The active window is not responding. Window will not be resized.")
+        return False
+
     # Get the zone for this tag
     zone_name = tagger.get_tag_zone(tag_name)
     if zone_name is None:
-        print(f"Tag '{tag_name}' has no default zone set. Window will not be resized.")
+        log.info(
+            "Tag '%s' has no default zone set. Window will not be resized.", tag_name
+        )
         return False
 
     zone = zones.get(zone_name, tagger.get_centered_zone())
@@ -414,36 +1087,64 @@ def center_active_window_with_tag(tagger):
     )
 
     # Flash the window to indicate success
-    win32gui.FlashWindow(window_info["hwnd"], True)
+    tagger.backend.flash_window(window_info["hwnd"])
 
-    print(f"Centered window using tag '{tag_name}' and zone '{zone_name}'")
+    log.info("Centered window using tag '%s' and zone '%s'", tag_name, zone_name)
     return True
 
 
+def dump_match_trace():
+    """Write the recent match decisions to a file"""
+    count = match_trace.dump(match_trace_file)
+    log.info("Dumped %s match decisions to %s", count, match_trace_file)
+
+
 def main():
     """Main function"""
     if not load_configs():
-        print("Failed to load configurations")
+        log.error("Failed to load configurations")
         return
 
     # Create WindowTagger instance
     tagger = WindowTagger()
+    backend = tagger.backend
 
     # Register hotkeys
     keyboard.add_hotkey("ctrl+alt+t", tagger.show_tag_dialog)
     keyboard.add_hotkey("win+c", lambda: center_active_window_with_tag(tagger))
-    keyboard.add_hotkey("win+f12", toggle_taskbar)
+    keyboard.add_hotkey("win+f12", backend.toggle_taskbar)
+    keyboard.add_hotkey("ctrl+alt+d", dump_match_trace)
 
-    print("Hotkeys registered:")
-    print("  Ctrl+Alt+T: Open tagging interface")
-    print("  Win+C: Center active window (if it has a tag definition)")
-    print("  Win+F12: Toggle taskbar visibility")
+    log.info("Hotkeys registered:")
+    log.info("  Ctrl+Alt+T: Open tagging interface")
+    log.info("  Win+C: Center active window (if it has a tag definition)")
+    log.info("  Win+F12: Toggle taskbar visibility")
+    log.info("  Ctrl+Alt+D: Dump recent match decisions")
 
     # Hide taskbar on startup
-    hide_taskbar_on_startup()
+    backend.hide_taskbar()
 
-    # Start monitoring windows
-    monitor_windows(tagger)
+    # Poll instead of using events if asked
+    args = sys.argv[1:]
+    if "--poll" in args:
+        event_source = WindowEventSource()
+    else:
+        event_source = backend.create_event_source()
+    signal_source = backend.create_signal_source()
+
+    # Record what the monitor sees for replay_trace.py if asked
+    recorder = None
+    if "--record" in args and args.index("--record") + 1 < len(args):
+        recorder = TraceRecorder(args[args.index("--record") + 1], backend)
+        recorder.record_desktop()
+        event_source = RecordingEventSource(event_source, recorder)
+        signal_source = RecordingSignalSource(signal_source, recorder)
+
+    try:
+        monitor_windows(tagger, event_source, signal_source=signal_source)
+    finally:
+        if recorder is not None:
+            recorder.close()
 
 
 if __name__ == "__main__":
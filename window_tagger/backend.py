@@ -0,0 +1,169 @@
+import os
+from typing import List, Tuple
+
+from process_cache import process_cache
+from window_events import SystemSignalSource, WindowEventSource
+from window_info import LazyWindowInfo
+
+
+class PlacementTransaction:
+    """Window moves collected to be applied in one go
+
+    move() leaves out windows that are already at their target rect and
+    commit() hands the rest to the backend's move_windows() at once.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.moves = []
+        self.skipped = 0
+
+    def move(self, hwnd: int, x: int, y: int, width: int, height: int) -> bool:
+        """Add a move; returns False if the window is already there"""
+        if tuple(self.backend.get_rect(hwnd)) == (x, y, width, height):
+            self.skipped += 1
+            return False
+        self.moves.append((hwnd, x, y, width, height))
+        return True
+
+    def commit(self) -> int:
+        """Apply the moves; get how many there were"""
+        moves, self.moves = self.moves, []
+        if moves:
+            self.backend.move_windows(moves)
+        return len(moves)
+
+
+class DesktopBackend:
+    """Interface to the desktop that windows are tagged and placed on
+
+    Windows are identified by integer handles and rects are always
+    (x, y, width, height). Process attributes are looked up through
+    processes, which has the refresh()/lookup() interface of ProcessCache.
+
+    Backends must be thread-safe: placement workers move windows from
+    their own threads while the monitor loop and the hotkeys use the same
+    backend.
+    """
+
+    processes = process_cache
+
+    def enum_windows(self) -> List[int]:
+        """Get the handles of all top-level windows"""
+        raise NotImplementedError()
+
+    def is_window(self, hwnd: int) -> bool:
+        """Check if the handle still refers to a window"""
+        raise NotImplementedError()
+
+    def is_visible(self, hwnd: int) -> bool:
+        """Check if the window is visible"""
+        raise NotImplementedError()
+
+    def is_minimized(self, hwnd: int) -> bool:
+        """Check if the window is minimized"""
+        raise NotImplementedError()
+
+    def get_title(self, hwnd: int) -> str:
+        """Get the window title"""
+        raise NotImplementedError()
+
+    def get_class_name(self, hwnd: int) -> str:
+        """Get the window class name"""
+        raise NotImplementedError()
+
+    def get_pid(self, hwnd: int) -> int:
+        """Get the id of the process owning the window"""
+        raise NotImplementedError()
+
+    def get_rect(self, hwnd: int) -> Tuple[int, int, int, int]:
+        """Get the window rect"""
+        raise NotImplementedError()
+
+    def move_window(self, hwnd: int, x: int, y: int, width: int, height: int) -> None:
+        """Move and resize the window"""
+        raise NotImplementedError()
+
+    def move_windows(self, moves: List[Tuple[int, int, int, int, int]]) -> None:
+        """Apply (hwnd, x, y, width, height) moves together
+
+        Backends that can batch moves override this; the default moves the
+        windows one at a time.
+        """
+        for hwnd, x, y, width, height in moves:
+            self.move_window(hwnd, x, y, width, height)
+
+    def begin_placement(self) -> PlacementTransaction:
+        """Start a transaction for moving several windows at once"""
+        return PlacementTransaction(self)
+
+    def is_hung(self, hwnd: int) -> bool:
+        """Check if the thread owning the window has stopped responding"""
+        return False
+
+    def flash_window(self, hwnd: int) -> None:
+        """Flash the window to acknowledge a hotkey or placement"""
+        raise NotImplementedError()
+
+    def get_foreground_window(self) -> int:
+        """Get the handle of the active window"""
+        raise NotImplementedError()
+
+    def get_screen_size(self) -> Tuple[int, int]:
+        """Get the (width, height) of the primary screen"""
+        raise NotImplementedError()
+
+    def toggle_taskbar(self) -> None:
+        """Toggle the visibility of the taskbar, where there is one"""
+
+    def hide_taskbar(self) -> None:
+        """Hide the taskbar, where there is one"""
+
+    def create_event_source(self) -> WindowEventSource:
+        """Get a source of window events for this desktop
+
+        The default source is inert, which makes the monitor poll.
+        """
+        return WindowEventSource()
+
+    def create_signal_source(self) -> SystemSignalSource:
+        """Get a source of wake, unlock and display change signals
+
+        The default source is inert, so nothing triggers a rescan.
+        """
+        return SystemSignalSource()
+
+    def get_window_info(self, hwnd: int) -> LazyWindowInfo:
+        """Get the title, class and rect of a window as window info"""
+        x, y, width, height = self.get_rect(hwnd)
+        return LazyWindowInfo(
+            self.get_pid(hwnd),
+            processes=self.processes,
+            hwnd=hwnd,
+            window_title=self.get_title(hwnd),
+            class_name=self.get_class_name(hwnd),
+            x=x,
+            y=y,
+            width=width,
+            height=height,
+        )
+
+
+def default_backend():
+    """Get the backend for the desktop this is running on"""
+    if os.name == "nt":
+        from win32_backend import Win32Backend
+
+        return Win32Backend()
+
+    from i3_ipc import get_socket_path
+
+    # Under sway or i3, the IPC socket beats going through X11
+    if get_socket_path():
+        from i3_backend import I3Backend
+
+        return I3Backend()
+
+    from x11_backend import X11Backend
+
+    return X11Backend()
@@ -0,0 +1,137 @@
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+
+from tagger_config import FALLBACK_ZONE, TagConfig
+
+RECT_FIELDS = ("x", "y", "width", "height")
+
+
+def read_records(stream):
+    """Yield window records from a JSONL stream, skipping blank lines"""
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            print(f"Skipping line {line_number}: {e}", file=sys.stderr)
+
+
+def evaluate(config, records):
+    """Match each record and compute where the daemon would place it
+
+    Returns the result records and the per-tag hit counts.
+    """
+    results = []
+    hits = Counter()
+    for record in records:
+        tag_info = config.get_existing_tag_info(record)
+        result = {
+            "process_name": record.get("process_name"),
+            "class_name": record.get("class_name"),
+            "window_title": record.get("window_title"),
+            "tag": None,
+            "zone": None,
+            "rect": None,
+        }
+        if tag_info:
+            tag_name, offsets = tag_info
+            hits[tag_name] += 1
+            result["tag"] = tag_name
+            zone_name, rect = config.get_target_rect(tag_name, offsets, FALLBACK_ZONE)
+            result["zone"], result["rect"] = zone_name, list(rect)
+        else:
+            hits[None] += 1
+
+        if all(field in record for field in RECT_FIELDS):
+            current = [record[field] for field in RECT_FIELDS]
+            result["moved"] = result["rect"] is not None and result["rect"] != current
+        results.append(result)
+    return results, hits
+
+
+def report_rate(label, evaluated, elapsed):
+    rate = evaluated / elapsed if elapsed > 0 else float("inf")
+    print(
+        f"{label}: {evaluated} windows in {elapsed:.3f}s ({rate:,.0f} windows/sec)",
+        file=sys.stderr,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Match window records against the tag configuration"
+    )
+    parser.add_argument(
+        "windows",
+        nargs="?",
+        default="-",
+        help="JSONL file of window records, or - for stdin (default)",
+    )
+    parser.add_argument(
+        "--config-dir",
+        default="",
+        help="Directory holding the tag and zone JSON files",
+    )
+    parser.add_argument(
+        "--output", "-o", help="Write results here instead of stdout"
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=1,
+        help="Run the matching this many times for steadier throughput numbers",
+    )
+    args = parser.parse_args()
+    repeat = max(1, args.repeat)
+
+    if args.windows == "-":
+        records = list(read_records(sys.stdin))
+    else:
+        with open(args.windows, "r", encoding="utf-8") as f:
+            records = list(read_records(f))
+
+    # Each cold pass gets a fresh config, so it starts with an empty match
+    # cache and no known untagged pairs
+    cold = 0.0
+    for _ in range(repeat):
+        config = TagConfig(args.config_dir, save_defaults=False)
+        start = time.perf_counter()
+        results, hits = evaluate(config, records)
+        cold += time.perf_counter() - start
+
+    # The same passes again against the caches the last one filled
+    start = time.perf_counter()
+    for _ in range(repeat):
+        evaluate(config, records)
+    warm = time.perf_counter() - start
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for result in results:
+            output.write(json.dumps(result) + "\n")
+    finally:
+        if args.output:
+            output.close()
+
+    # The report goes to stderr so results can be piped on
+    evaluated = len(records) * repeat
+    print(f"{len(config.matcher)} rules", file=sys.stderr)
+    report_rate("Cold caches", evaluated, cold)
+    report_rate("Warm caches", evaluated, warm)
+    stats = config.match_cache.stats()
+    print(
+        f"Match cache: {stats['hits']} hits, {stats['misses']} misses",
+        file=sys.stderr,
+    )
+    print("Rule hits:", file=sys.stderr)
+    for tag_name, count in hits.most_common():
+        print(f"  {tag_name or '(untagged)':<20} {count}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
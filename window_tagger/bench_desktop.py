@@ -0,0 +1,332 @@
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import auto_resize
+from app_core import WindowTagger
+from bench_matcher import CLASS_NAMES
+from latency_stats import LatencyStats
+from placement_queue import PRIORITY_FOREGROUND, PRIORITY_RESCAN, PlacementQueue
+from placement_workers import PlacementWorkers
+from rescan_scheduler import RescanScheduler
+from settle_detector import SettleDetector
+from simulated_desktop import SimulatedDesktop
+from tagger_log import configure
+
+CHURN_FRACTION = 0.1
+
+
+def build_profiles(definitions, rng, untagged=50):
+    """(process, class, title) profiles, one per rule plus untagged apps"""
+    profiles = []
+    for definition in definitions:
+        profiles.append(
+            (
+                definition.get("process_name") or "explorer.exe",
+                definition.get("class_name") or rng.choice(CLASS_NAMES),
+                f"{definition.get('title_substring') or ''} Window",
+            )
+        )
+    for i in range(untagged):
+        profiles.append((f"untagged{i}.exe", rng.choice(CLASS_NAMES), "Untitled"))
+    return profiles
+
+
+def make_desktop(config_dir, count, profiles, seed):
+    """A simulated desktop with count windows and a tagger on top of it"""
+    desktop = SimulatedDesktop(seed=seed)
+    desktop.populate(count, profiles)
+    tagger = WindowTagger(backend=desktop, config_dir=config_dir)
+    auto_resize.reset_window_state()
+    return desktop, tagger
+
+
+def timed(func, *args):
+    """Run func once and get its wall time in milliseconds"""
+    start = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def settled(tagger, func, *args):
+    """Run a scenario and apply every placement it queued"""
+    func(tagger, *args)
+    auto_resize.drain_placements(tagger)
+
+
+def bench_size(config_dir, count, profiles):
+    """Time each scenario against a desktop of count windows
+
+    Each result is (scenario, items, ms, moves, native calls).
+    """
+    results = []
+    churn = max(1, int(count * CHURN_FRACTION))
+
+    def run(scenario, items, func, *args):
+        moves, calls = desktop.moves, desktop.native_calls
+        elapsed = timed(func, *args)
+        results.append(
+            (
+                scenario,
+                items,
+                elapsed,
+                desktop.moves - moves,
+                desktop.native_calls - calls,
+            )
+        )
+
+    # Daemon start: a full scan that places every tagged window
+    desktop, tagger = make_desktop(config_dir, count, profiles, count)
+    run("startup scan", count, settled, tagger, auto_resize.scan_all_windows)
+
+    # Window events for a burst of closed and opened windows
+    source = desktop.create_event_source()
+    desktop.churn(churn, profiles)
+    run("events", churn, settled, tagger, auto_resize.handle_pending_events, source, 0)
+
+    # Wake recovery: every known window is checked again; those still in
+    # their zone aren't moved
+    run("wake recovery", count, settled, tagger, auto_resize.handle_rescan)
+
+    # The same after a display change knocked half the windows out of place
+    for hwnd in list(desktop.windows)[::2]:
+        x, y, width, height = desktop.windows[hwnd].rect
+        desktop.windows[hwnd].rect = (x + 40, y + 40, width, height)
+    run("wake (displaced)", count, settled, tagger, auto_resize.handle_rescan)
+
+    # Polling mode: an unchanged desktop, then one after a burst
+    desktop, tagger = make_desktop(config_dir, count, profiles, count)
+    settled(tagger, auto_resize.poll_windows)
+    run("poll (no change)", count, settled, tagger, auto_resize.poll_windows)
+    desktop.churn(churn, profiles)
+    run("poll (churn)", churn, settled, tagger, auto_resize.poll_windows)
+
+    # One monitor_windows pass: startup scan plus the queued events
+    if os.path.exists(auto_resize.checkpoint_file):
+        os.remove(auto_resize.checkpoint_file)
+    desktop, tagger = make_desktop(config_dir, count, profiles, count)
+    source = desktop.create_event_source()
+    desktop.churn(churn, profiles)
+    stop = threading.Event()
+    stop.set()
+    monitor = auto_resize.monitor_windows
+    run("monitor_windows", count + churn, monitor, tagger, source, stop)
+
+    # A restart: the checkpoint written on exit is restored before the scan
+    auto_resize.reset_window_state()
+    run("restart", count, restart, tagger)
+
+    # The Win+C hotkey on a tagged active window
+    desktop.foreground = next(
+        record.hwnd for record in auto_resize.window_table if record.tag_name
+    )
+    rounds = 200
+    run(
+        "center active",
+        rounds,
+        lambda: [
+            auto_resize.center_active_window_with_tag(tagger) for _ in range(rounds)
+        ],
+    )
+    return results
+
+
+def restart(tagger):
+    """What monitor_windows does at startup, with a checkpoint to restore"""
+    auto_resize.restore_window_checkpoint(tagger)
+    settled(tagger, auto_resize.scan_all_windows)
+
+
+def check_placement_storm(count=1000):
+    """A rescan storm is paced per frame and the active window goes first"""
+    queue = PlacementQueue()
+    for hwnd in range(1, count + 1):
+        queue.push(hwnd, (0, 0, 800, 600), PRIORITY_RESCAN, flash=False)
+    queue.push(count, (10, 10, 800, 600), PRIORITY_FOREGROUND)
+    queue.push(1, (20, 20, 800, 600), PRIORITY_RESCAN, flash=False)
+
+    first = queue.pop_frame()
+    assert first[0].hwnd == count and first[0].rect == (10, 10, 800, 600)
+    assert len(first) == queue.max_per_frame
+    assert queue.pop_frame() == []  # the next frame isn't due yet
+
+    frames = 1
+    while queue:
+        frames += len(queue.pop_frame(paced=False)) > 0
+    stats = queue.stats()
+    assert stats["applied"] == count and stats["superseded"] == 2, stats
+    print(
+        f"placement storm: {count} moves in {frames} frames, "
+        f"{stats['superseded']} superseded"
+    )
+
+
+def check_hung_window(config_dir, profiles, count=200):
+    """A hung window is deferred and retried; the rest are placed at once"""
+    desktop, tagger = make_desktop(config_dir, count, profiles, count)
+    auto_resize.scan_all_windows(tagger)
+    hung = next(record.hwnd for record in auto_resize.window_table if record.tag_name)
+    desktop.hang_window(hung)
+
+    workers = PlacementWorkers(desktop, retry_delay=0.05)
+    auto_resize.placement_workers = workers
+    try:
+        elapsed = timed(auto_resize.drain_placements, tagger)
+        assert elapsed < desktop.hang_time * 1000, elapsed
+        assert auto_resize.window_table.get(hung).applied_rect is None
+        placed = desktop.moves
+
+        desktop.hang_window(hung, False)
+        time.sleep(0.1)
+        auto_resize.collect_placements()
+        auto_resize.drain_placements(tagger)
+        assert auto_resize.window_table.get(hung).applied_rect is not None
+    finally:
+        auto_resize.placement_workers = None
+        workers.shutdown()
+    print(
+        f"hung window: {placed} moves in {elapsed:.1f} ms around it, "
+        f"{workers.deferrals} deferral, placed on retry"
+    )
+
+
+def check_new_windows(config_dir, profiles, count=200):
+    """Windows placed on their create event never jump after being shown"""
+    desktop, tagger = make_desktop(config_dir, count, profiles, count)
+    settled(tagger, auto_resize.scan_all_windows)
+    source = desktop.create_event_source()
+
+    def open_windows(visible):
+        hwnds = []
+        for i in range(count):
+            process_name, class_name, title = desktop.random.choice(profiles)
+            hwnds.append(
+                desktop.create_window(process_name, class_name, title, visible=visible)
+            )
+        settled(tagger, auto_resize.handle_pending_events, source, 0)
+        if not visible:
+            for hwnd in hwnds:
+                desktop.show_window(hwnd)
+            settled(tagger, auto_resize.handle_pending_events, source, 0)
+
+        placed = [
+            desktop.windows[hwnd]
+            for hwnd in hwnds
+            if auto_resize.window_table.get(hwnd).applied_rect is not None
+        ]
+        jumps = sum(1 for window in placed if window.shown_rect != window.rect)
+        return len(placed), jumps
+
+    placed, jumps = open_windows(visible=True)
+    print(f"new windows shown first: {jumps} of {placed} placed windows jumped")
+
+    early = auto_resize.early_placements
+    auto_resize.latency_stats = LatencyStats()
+    placed, jumps = open_windows(visible=False)
+    early = auto_resize.early_placements - early
+    latency = auto_resize.latency_stats.get("placement").summary()
+    print(
+        f"new windows created hidden: {early} of {placed} placed before being "
+        f"shown, {jumps} with title rules jumped, created -> placed "
+        f"{latency['p50_ms']:.2f} ms p50 / {latency['p99_ms']:.2f} ms p99"
+    )
+
+
+def check_self_resizing(config_dir, profiles, windows=6, duration=0.15):
+    """An app that undoes early moves is re-placed, then placed late once"""
+    desktop, tagger = make_desktop(config_dir, 20, profiles, windows)
+    settled(tagger, auto_resize.scan_all_windows)
+    source = desktop.create_event_source()
+    auto_resize.settle_detector = detector = SettleDetector(settle_window=0.05)
+    profile = next(
+        profile
+        for profile in profiles
+        if tagger.get_existing_tag_info(
+            {"process_name": profile[0], "class_name": profile[1]}
+        )
+    )
+
+    moves = []
+    for i in range(windows):
+        hwnd = desktop.create_window(*profile)
+        desktop.resize_itself(hwnd, desktop.windows[hwnd].rect, duration)
+        before = desktop.moves
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            auto_resize.handle_pending_events(tagger, source, 0)
+            auto_resize.check_settling(tagger)
+            auto_resize.apply_placements(tagger, paced=False)
+            if hwnd not in detector and hwnd not in auto_resize.placement_queue:
+                break
+            time.sleep(0.005)
+        record = auto_resize.window_table.get(hwnd)
+        assert desktop.windows[hwnd].rect == record.applied_rect, i
+        moves.append(desktop.moves - before)
+
+    tag_name = auto_resize.window_table.get(hwnd).tag_name
+    assert moves[-1] == 1, moves
+    print(
+        f"self-resizing app: moves per window {moves}, learned delay "
+        f"{detector.learned_delay(tag_name) * 1000:.0f} ms for {duration * 1000:.0f} "
+        f"ms of resizing"
+    )
+
+
+def check_signal_burst():
+    """A wake arrives with an unlock and display changes; one rescan runs"""
+    desktop = SimulatedDesktop()
+    signals = desktop.create_signal_source()
+    runs = []
+    scheduler = RescanScheduler(runs.append, delay=0.05, max_delay=1.0)
+    scheduler.start()
+    signals.start(scheduler.request)
+
+    signals.wake()
+    signals.display_change()
+    signals.unlock()
+    signals.display_change()
+    signals.display_change()
+    time.sleep(0.3)
+    scheduler.stop()
+
+    assert len(runs) == 1, runs
+    print(f"signal burst: {scheduler.requests} signals -> {len(runs)} rescan")
+
+
+def main():
+    config_dir = sys.argv[1] if len(sys.argv) > 1 else "."
+    configure("WARNING")
+    temp_dir = tempfile.mkdtemp()
+    auto_resize.checkpoint_file = os.path.join(temp_dir, "window_checkpoint.json")
+    auto_resize.stats_file = os.path.join(temp_dir, "placement_stats.json")
+    check_signal_burst()
+    check_placement_storm()
+
+    rng = random.Random(1234)
+    tagger = WindowTagger(backend=SimulatedDesktop(), config_dir=config_dir)
+    profiles = build_profiles(tagger.definitions, rng)
+    check_hung_window(config_dir, profiles)
+    check_new_windows(config_dir, profiles)
+    check_self_resizing(config_dir, profiles)
+
+    print(
+        f"{'windows':>8} {'scenario':<18} {'items':>7} {'total ms':>10} "
+        f"{'us/item':>9} {'moves':>7} {'calls':>7}"
+    )
+    for count in (100, 1000, 5000):
+        for scenario, items, elapsed, moves, calls in bench_size(
+            config_dir, count, profiles
+        ):
+            per_item = elapsed * 1000 / items
+            print(
+                f"{count:>8} {scenario:<18} {items:>7} {elapsed:>10.2f} "
+                f"{per_item:>9.1f} {moves:>7} {calls:>7}"
+            )
+    print(f"Latency stats of the last monitor_windows pass: {auto_resize.stats_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import json
+import random
+import sys
+import time
+
+from tag_matcher import TagMatcher
+
+CLASS_NAMES = [
+    "Chrome_WidgetWin_1",
+    "MozillaWindowClass",
+    "ApplicationFrameWindow",
+    "CASCADIA_HOSTING_WINDOW_CLASS",
+    "Notepad",
+    "SDL_app",
+]
+
+
+def linear_match(definitions, window_info):
+    """The original scan from WindowTagger.get_existing_tag_info"""
+    process_name = window_info.get("process_name", "")
+    for tag in definitions:
+        if tag.get("process_name"):
+            if tag.get("process_name").lower() != process_name.lower():
+                continue
+        if tag.get("class_name"):
+            if tag.get("class_name") != window_info.get("class_name", ""):
+                continue
+        if tag.get("title_substring"):
+            window_title = window_info.get("window_title", "").lower()
+            if tag.get("title_substring").lower() not in window_title:
+                continue
+        return tag.get("name")
+    return None
+
+
+def generate_definitions(base, count, rng):
+    """Pad the real definitions with synthetic rules up to count entries"""
+    definitions = list(base)
+    i = 0
+    while len(definitions) < count:
+        definition = {
+            "name": f"synthetic-{i}",
+            "process_name": f"App{i}.exe",
+        }
+        if rng.random() < 0.7:
+            definition["class_name"] = rng.choice(CLASS_NAMES)
+        if rng.random() < 0.2:
+            definition["title_substring"] = f"Document {i}"
+        definitions.append(definition)
+        i += 1
+    return definitions
+
+
+def generate_windows(definitions, count, rng):
+    """Build window records, half of them hitting a rule and half missing"""
+    windows = []
+    for i in range(count):
+        if i % 2 == 0:
+            tag = rng.choice(definitions)
+            windows.append(
+                {
+                    "process_name": tag.get("process_name") or "explorer.exe",
+                    "class_name": tag.get("class_name") or rng.choice(CLASS_NAMES),
+                    "window_title": f"{tag.get('title_substring') or ''} - Window {i}",
+                }
+            )
+        else:
+            windows.append(
+                {
+                    "process_name": f"untagged{i}.exe",
+                    "class_name": rng.choice(CLASS_NAMES),
+                    "window_title": f"Untitled {i}",
+                }
+            )
+    return windows
+
+
+def time_lookups(lookup, windows, rounds):
+    """Average cost of one lookup in microseconds"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for window_info in windows:
+            lookup(window_info)
+    elapsed = time.perf_counter() - start
+    return elapsed / (rounds * len(windows)) * 1e6
+
+
+def main():
+    definitions_file = sys.argv[1] if len(sys.argv) > 1 else "tag_definitions.json"
+    with open(definitions_file, "r") as f:
+        base = json.load(f)
+
+    rng = random.Random(1234)
+    print(f"{'rules':>8} {'linear us':>12} {'indexed us':>12} {'speedup':>9}")
+
+    for count in (len(base), 100, 1000, 10000):
+        definitions = generate_definitions(base, count, rng)
+        windows = generate_windows(definitions, 200, rng)
+        matcher = TagMatcher(definitions)
+
+        # Both implementations must agree before their timings mean anything
+        for window_info in windows:
+            rule = matcher.match(
+                window_info["process_name"],
+                window_info["class_name"],
+                window_info["window_title"],
+            )
+            expected = linear_match(definitions, window_info)
+            assert (rule.name if rule else None) == expected, window_info
+
+        rounds = max(1, 20000 // count)
+        linear = time_lookups(
+            lambda w: linear_match(definitions, w), windows, rounds
+        )
+        indexed = time_lookups(
+            lambda w: matcher.match(
+                w["process_name"], w["class_name"], w["window_title"]
+            ),
+            windows,
+            50,
+        )
+        print(f"{count:>8} {linear:>12.2f} {indexed:>12.2f} {linear / indexed:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
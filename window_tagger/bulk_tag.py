@@ -0,0 +1,113 @@
+import argparse
+import json
+import os
+
+from tagger_config import TagConfig
+
+
+def suggest_rules(config, windows):
+    """Propose one tag definition per (process, class) group of untagged windows
+
+    Returns a list of (definition, windows) pairs in first-seen order.
+    Definition names come from the process name and never clash with
+    existing tags or with each other.
+    """
+    groups = {}
+    for window_info in windows:
+        process_name = window_info.get("process_name")
+        class_name = window_info.get("class_name", "")
+        if not process_name or process_name == "unknown":
+            continue
+        if config.get_existing_tag_info(window_info):
+            continue
+        groups.setdefault((process_name.lower(), class_name), []).append(window_info)
+
+    # Processes with several untagged classes get the class in their name
+    stems = {}
+    for process_name, _ in groups:
+        stem = os.path.splitext(process_name)[0]
+        stems[stem] = stems.get(stem, 0) + 1
+
+    used_names = {definition.get("name") for definition in config.definitions}
+    suggestions = []
+    for (_, class_name), group in groups.items():
+        process_name = group[0]["process_name"]
+        stem = os.path.splitext(process_name)[0].lower()
+        name = stem if stems[stem] == 1 else f"{stem}-{class_name.lower()}"
+        candidate, suffix = name, 2
+        while candidate in used_names:
+            candidate = f"{name}-{suffix}"
+            suffix += 1
+        used_names.add(candidate)
+
+        definition = {"name": candidate, "process_name": process_name}
+        if class_name:
+            definition["class_name"] = class_name
+        suggestions.append((definition, group))
+    return suggestions
+
+
+def read_windows(path):
+    """Read window records from a JSONL dump"""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Propose tags for every untagged window in one pass"
+    )
+    parser.add_argument(
+        "--windows",
+        help="Read window records from a JSONL dump instead of the live desktop",
+    )
+    parser.add_argument(
+        "--zone",
+        default="centered",
+        help="Default zone for the new tags, or None to leave windows in place",
+    )
+    parser.add_argument(
+        "--yes", "-y", action="store_true", help="Save without asking"
+    )
+    args = parser.parse_args()
+
+    if args.windows:
+        config = TagConfig()
+        windows = read_windows(args.windows)
+    else:
+        # Only the live desktop needs the win32 side
+        from app_core import WindowTagger
+
+        config = WindowTagger()
+        windows = config.get_visible_windows()
+
+    suggestions = suggest_rules(config, windows)
+    if not suggestions:
+        print(f"All {len(windows)} windows already have a tag")
+        return
+
+    print(f"{len(suggestions)} proposed tags for {len(windows)} windows:")
+    for definition, group in suggestions:
+        print(
+            f"  {definition['name']:<24} {definition['process_name']:<28} "
+            f"{definition.get('class_name', ''):<32} "
+            f"{len(group)}x e.g. '{group[0].get('window_title', '')}'"
+        )
+
+    if not args.yes:
+        answer = input("Save these tags? [y/N] ").strip().lower()
+        if answer != "y":
+            print("Nothing saved")
+            return
+
+    definitions = [definition for definition, _ in suggestions]
+    config.save_tag_definitions(definitions)
+    if args.zone != "None":
+        config.save_tag_zones_for(
+            [definition["name"] for definition in definitions], args.zone
+        )
+    print(f"Saved {len(definitions)} tags to {config.definitions_file}")
+
+
+if __name__ == "__main__":
+    main()
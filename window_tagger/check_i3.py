@@ -0,0 +1,204 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import auto_resize
+from app_core import WindowTagger
+from fake_i3_server import FakeI3Server, load_events
+from i3_backend import I3Backend
+from tagger_config import FALLBACK_ZONE
+from tagger_log import configure
+
+ZONES = {
+    "centered": {"x": 320, "y": 90, "width": 1280, "height": 900},
+    "left": {"x": 0, "y": 0, "width": 960, "height": 1080},
+}
+DEFINITIONS = [
+    {"name": "editor", "class_name": "Code"},
+    {"name": "terminal", "class_name": "foot"},
+]
+OFFSETS = {"editor": {"x_offset": -8, "width_offset": 16}}
+TAG_ZONES = {"terminal": {"default_zone": "left"}}
+
+
+def container(con_id, name, app_id, focused=False):
+    """A leaf container the way sway sends it, owned by this process"""
+    return {
+        "id": con_id,
+        "type": "con",
+        "name": name,
+        "app_id": app_id,
+        "pid": os.getpid(),
+        "focused": focused,
+        "rect": {"x": 100, "y": 100, "width": 640, "height": 480},
+        "nodes": [],
+        "floating_nodes": [],
+    }
+
+
+# An editor that was open before the tagger started, then a stream of new
+# windows, a title change, a focus change and a window closing again
+WINDOWS = [container(10, "notes.txt - Code", "Code")]
+EVENTS = [
+    {"change": "new", "container": container(20, "foot", "foot")},
+    {"change": "new", "container": container(21, "Mozilla Firefox", "firefox")},
+    {"change": "title", "container": container(20, "~/src - foot", "foot")},
+    {"change": "new", "container": container(22, "main.py - Code", "Code")},
+    {"change": "focus", "container": container(22, "main.py - Code", "Code", True)},
+    {"change": "new", "container": container(23, "foot", "foot")},
+    {"change": "close", "container": container(23, "foot", "foot")},
+]
+# Where each window that is still open must end up; None means untouched
+EXPECTED_TAGS = {10: "editor", 20: "terminal", 21: None, 22: "editor"}
+
+
+def write_config(config_dir):
+    files = {
+        "tag_definitions.json": DEFINITIONS,
+        "tag_offsets.json": OFFSETS,
+        "zones.json": ZONES,
+        "tag_zones.json": TAG_ZONES,
+    }
+    for name, data in files.items():
+        with open(os.path.join(config_dir, name), "w") as f:
+            json.dump(data, f)
+
+
+def target_rect(tag_name):
+    """The rect a tag's windows are placed at, worked out by hand"""
+    zone = ZONES[TAG_ZONES.get(tag_name, {}).get("default_zone", FALLBACK_ZONE)]
+    offsets = OFFSETS.get(tag_name, {})
+    return (
+        zone["x"] + offsets.get("x_offset", 0),
+        zone["y"] + offsets.get("y_offset", 0),
+        zone["width"] + offsets.get("width_offset", 0),
+        zone["height"] + offsets.get("height_offset", 0),
+    )
+
+
+def replay(config_dir, work_dir, events, windows, interval=0.01):
+    """Run monitor_windows against a fake compositor replaying events
+
+    The socket, checkpoint and stats go to work_dir. Returns the fake
+    server once the loop has stopped, and the tagger.
+    """
+    socket_path = os.path.join(work_dir, "fake-i3.sock")
+    server = FakeI3Server(socket_path, events, windows)
+    server.interval = interval
+    server.start()
+    try:
+        backend = I3Backend(socket_path)
+        tagger = WindowTagger(backend=backend, config_dir=config_dir)
+        auto_resize.checkpoint_file = os.path.join(work_dir, "checkpoint.json")
+        auto_resize.stats_file = os.path.join(work_dir, "stats.json")
+        auto_resize.reset_window_state()
+
+        stop = threading.Event()
+        monitor = threading.Thread(
+            target=auto_resize.monitor_windows,
+            args=(tagger, backend.create_event_source()),
+            kwargs={"stop": stop},
+        )
+        monitor.start()
+        assert server.replay_done.wait(timeout=10), "replay didn't finish"
+        # Let the last events through the queue before stopping the loop
+        time.sleep(0.2)
+        stop.set()
+        monitor.join(timeout=10)
+        assert not monitor.is_alive(), "monitor_windows didn't stop"
+    finally:
+        server.stop()
+    return server, tagger
+
+
+def rect_of(container):
+    rect = container["rect"]
+    return rect["x"], rect["y"], rect["width"], rect["height"]
+
+
+def moved_ids(server):
+    """Container ids that any RUN_COMMAND addressed"""
+    return {
+        int(command.split("]")[0].split("=")[1])
+        for payload in server.commands
+        for command in payload.split(";")
+    }
+
+
+def check_builtin(work_dir):
+    """Replay the built-in stream and check every window against EXPECTED_TAGS"""
+    write_config(work_dir)
+    server, tagger = replay(work_dir, work_dir, EVENTS, WINDOWS)
+    moved = moved_ids(server)
+
+    assert set(server.windows) == set(EXPECTED_TAGS), sorted(server.windows)
+    for con_id, tag_name in EXPECTED_TAGS.items():
+        record = auto_resize.window_table.get(con_id)
+        assert record is not None, con_id
+        assert record.tag_name == tag_name, (con_id, record.tag_name, tag_name)
+        if tag_name is None:
+            assert con_id not in moved, con_id
+            continue
+        rect = rect_of(server.windows[con_id])
+        assert rect == target_rect(tag_name), (con_id, rect, target_rect(tag_name))
+        assert server.windows[con_id]["type"] == "floating_con", con_id
+    assert 23 not in auto_resize.window_table, "closed window still tracked"
+    assert tagger.backend.focused == 22, tagger.backend.focused
+    print(
+        f"i3 replay: {len(EVENTS)} events, {len(EXPECTED_TAGS)} windows, "
+        f"{len(moved)} moved with {len(server.commands)} RUN_COMMANDs"
+    )
+
+
+def check_recording(config_dir, work_dir, path):
+    """Replay a recorded stream against the tag config in config_dir
+
+    Every window the tagger tagged must end at its tag's target rect, and
+    no untagged window may have been moved.
+    """
+    events = load_events(path)
+    server, tagger = replay(config_dir, work_dir, events, ())
+    moved = moved_ids(server)
+
+    tagged = 0
+    for con_id, window in server.windows.items():
+        record = auto_resize.window_table.get(con_id)
+        if record is None or record.tag_name is None:
+            assert con_id not in moved, con_id
+            continue
+        tagged += 1
+        offsets = tagger.offsets.get(record.tag_name, {})
+        _, expected = tagger.get_target_rect(record.tag_name, offsets, FALLBACK_ZONE)
+        assert rect_of(window) == expected, (con_id, rect_of(window), expected)
+    print(
+        f"i3 replay of {path}: {len(events)} events, {len(server.windows)} "
+        f"windows open, {tagged} tagged and placed"
+    )
+
+
+def main():
+    """Drive monitor_windows through the i3 backend against a fake compositor
+
+    With no arguments the built-in stream is replayed. Given a JSONL file
+    recorded with `swaymsg -t subscribe -m -r '["window"]'` and the config
+    directory to match it against, that stream is replayed instead.
+    """
+    configure("WARNING")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        if len(sys.argv) > 1:
+            config_dir = sys.argv[2] if len(sys.argv) > 2 else "."
+            check_recording(config_dir, temp_dir, sys.argv[1])
+        else:
+            check_builtin(temp_dir)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
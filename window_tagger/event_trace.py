@@ -0,0 +1,199 @@
+import json
+import threading
+import time
+
+from tagger_log import get_logger
+from window_events import (
+    CREATED,
+    NAME_CHANGED,
+    SHOWN,
+    SystemSignalSource,
+    WindowEventSource,
+)
+from window_info import ATTRIBUTE_RESOLVERS, LazyWindowInfo
+
+log = get_logger("event_trace")
+
+TRACE_VERSION = 1
+
+# Trace record kinds besides the window event kinds
+WINDOW = "window"  # a window that was already open when recording started
+PROCESS = "process"
+FOREGROUND = "foreground"
+SIGNAL = "signal"
+
+PROCESS_ATTRIBUTES = tuple(ATTRIBUTE_RESOLVERS)
+
+
+class TraceRecorder:
+    """Writes what the tagger sees of the desktop to a trace file
+
+    The first line is a header. Every other line is a compact JSON array
+    [seconds, kind, hwnd, data]:
+
+    - window, create, show: data is [pid, class, title, rect, visible,
+      minimized] as read when the monitor received the event
+    - name_change: data is the new title
+    - destroy: data is null
+    - process: hwnd is the pid, data holds the name and the attributes
+      rules can ask for, written before the first window of the process
+    - foreground: the active window changed to hwnd
+    - signal: data is the wake/unlock/display change signal
+    """
+
+    def __init__(self, path, backend):
+        self.backend = backend
+        self.events = 0
+        self._file = open(path, "w", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._pids = set()
+        self._foreground = None
+        self._write_line(
+            {
+                "version": TRACE_VERSION,
+                "screen": list(backend.get_screen_size()),
+                "recorded_at": time.time(),
+            }
+        )
+
+    def _write_line(self, data):
+        self._file.write(json.dumps(data, separators=(",", ":")) + "\n")
+
+    def _write(self, timestamp, kind, hwnd, data=None):
+        self._write_line([round(timestamp - self._start, 6), kind, hwnd, data])
+
+    def _window_data(self, timestamp, hwnd):
+        """Get the data of a window, writing its process first if it's new"""
+        backend = self.backend
+        if not backend.is_window(hwnd):
+            return None
+        pid = backend.get_pid(hwnd)
+        if pid not in self._pids:
+            self._pids.add(pid)
+            info = LazyWindowInfo(pid, processes=backend.processes)
+            process = backend.processes.lookup(pid)
+            self._write(
+                timestamp,
+                PROCESS,
+                pid,
+                {
+                    "create_time": process.create_time if process else None,
+                    **{key: info[key] for key in PROCESS_ATTRIBUTES},
+                },
+            )
+        return [
+            pid,
+            backend.get_class_name(hwnd),
+            backend.get_title(hwnd),
+            list(backend.get_rect(hwnd)),
+            backend.is_visible(hwnd),
+            backend.is_minimized(hwnd),
+        ]
+
+    def _record_foreground(self, timestamp):
+        foreground = self.backend.get_foreground_window()
+        if foreground != self._foreground:
+            self._foreground = foreground
+            self._write(timestamp, FOREGROUND, foreground)
+
+    def record_desktop(self):
+        """Record the windows that are open now"""
+        with self._lock:
+            now = time.perf_counter()
+            for hwnd in self.backend.enum_windows():
+                try:
+                    data = self._window_data(now, hwnd)
+                    if data is not None:
+                        self._write(now, WINDOW, hwnd, data)
+                except Exception as e:
+                    log.error("Error recording window: %s", e)
+            self._record_foreground(now)
+
+    def record_event(self, event):
+        """Record a window event with what the window looks like now"""
+        with self._lock:
+            try:
+                if event.kind in (CREATED, SHOWN):
+                    data = self._window_data(event.timestamp, event.hwnd)
+                elif event.kind == NAME_CHANGED:
+                    data = self.backend.get_title(event.hwnd)
+                else:
+                    data = None
+                self._write(event.timestamp, event.kind, event.hwnd, data)
+                self._record_foreground(event.timestamp)
+                self.events += 1
+            except Exception as e:
+                log.error("Error recording event: %s", e)
+
+    def record_signal(self, signal):
+        with self._lock:
+            self._write(time.perf_counter(), SIGNAL, 0, signal)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+        log.info("Recorded %s window events", self.events)
+
+
+class RecordingEventSource(WindowEventSource):
+    """Passes the events of another source on, recording each one
+
+    Events are recorded as the monitor takes them, so the window
+    attributes in the trace are the ones the tagger saw.
+    """
+
+    def __init__(self, source, recorder):
+        self.source = source
+        self.recorder = recorder
+        self.delivers_events = source.delivers_events
+
+    def start(self):
+        self.source.start()
+        self.delivers_events = self.source.delivers_events
+
+    def stop(self):
+        self.source.stop()
+
+    def emit(self, kind, hwnd):
+        self.source.emit(kind, hwnd)
+
+    def get(self, timeout=None):
+        event = self.source.get(timeout=timeout)
+        if event is not None:
+            self.recorder.record_event(event)
+        return event
+
+    def drain(self):
+        events = self.source.drain()
+        for event in events:
+            self.recorder.record_event(event)
+        return events
+
+
+class RecordingSignalSource(SystemSignalSource):
+    """Passes the signals of another source on, recording each one"""
+
+    def __init__(self, source, recorder):
+        self.source = source
+        self.recorder = recorder
+
+    def start(self, callback):
+        def record(signal):
+            self.recorder.record_signal(signal)
+            callback(signal)
+
+        self.source.start(record)
+
+    def stop(self):
+        self.source.stop()
+
+
+def load_trace(path):
+    """Get the (header, records) of a trace file"""
+    with open(path, "r", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("version") != TRACE_VERSION:
+            raise ValueError(f"Unsupported trace version: {header.get('version')}")
+        records = [json.loads(line) for line in f if line.strip()]
+    return header, records
@@ -0,0 +1,214 @@
+import argparse
+import json
+import os
+import re
+import socket
+import tempfile
+import threading
+import time
+
+from i3_ipc import (
+    EVENT_WINDOW,
+    GET_OUTPUTS,
+    GET_TREE,
+    GET_WORKSPACES,
+    RUN_COMMAND,
+    SUBSCRIBE,
+    read_message,
+    write_message,
+)
+
+CON_ID = re.compile(r"\[con_id=(\d+)\]")
+RESIZE = re.compile(r"resize set width (\d+) px height (\d+) px")
+MOVE = re.compile(r"move absolute position (-?\d+) px (-?\d+) px")
+
+
+def load_events(path):
+    """Read recorded window events, one JSON payload per line
+
+    This is what `swaymsg -t subscribe -m -r '["window"]'` prints.
+    """
+    with open(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class FakeI3Server:
+    """Local stand-in for the i3/sway IPC socket
+
+    Answers GET_TREE and GET_OUTPUTS from its own window list, applies
+    the moves and resizes of RUN_COMMAND to it and keeps every command in
+    commands. When a client subscribes, the recorded window events are
+    replayed to it interval seconds apart, updating the window list as
+    they go. replay_done is set once they have all been sent.
+    """
+
+    def __init__(self, socket_path, events, windows=(), screen_size=(1920, 1080)):
+        self.socket_path = socket_path
+        self.events = list(events)
+        self.windows = {container["id"]: container for container in windows}
+        self.screen_size = screen_size
+        self.interval = 0.0
+        self.commands = []
+        self.replay_done = threading.Event()
+        self._lock = threading.Lock()
+        self._server = None
+        self._connections = []
+
+    def start(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self.socket_path)
+        self._server.listen()
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def stop(self):
+        for sock in [self._server] + self._connections:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def _accept(self):
+        while True:
+            try:
+                sock, _ = self._server.accept()
+            except OSError:
+                return
+            self._connections.append(sock)
+            threading.Thread(target=self._serve, args=(sock,), daemon=True).start()
+
+    def _serve(self, sock):
+        handlers = {
+            GET_TREE: lambda payload: self.tree(),
+            GET_OUTPUTS: lambda payload: self.outputs(),
+            GET_WORKSPACES: lambda payload: [],
+            RUN_COMMAND: self.run_command,
+        }
+        while True:
+            try:
+                message_type, payload = read_message(sock)
+            except (ConnectionError, OSError):
+                return
+            if message_type == SUBSCRIBE:
+                write_message(sock, SUBSCRIBE, {"success": True})
+                if "window" in json.loads(payload or "[]"):
+                    threading.Thread(
+                        target=self._replay, args=(sock,), daemon=True
+                    ).start()
+            elif message_type in handlers:
+                write_message(sock, message_type, handlers[message_type](payload))
+            else:
+                write_message(sock, message_type, {"success": False})
+
+    def _replay(self, sock):
+        for payload in self.events:
+            if self.interval:
+                time.sleep(self.interval)
+            self.apply_event(payload)
+            try:
+                write_message(sock, EVENT_WINDOW, payload)
+            except OSError:
+                return
+        self.replay_done.set()
+
+    def apply_event(self, payload):
+        """Update the window list the way the compositor would"""
+        container = payload.get("container") or {}
+        with self._lock:
+            if payload.get("change") == "close":
+                self.windows.pop(container.get("id"), None)
+            elif "id" in container:
+                if container.get("focused"):
+                    for other in self.windows.values():
+                        other["focused"] = False
+                self.windows[container["id"]] = dict(container)
+
+    def run_command(self, payload):
+        """Record the commands of a payload and apply their moves and resizes
+
+        Commands are separated by ";", each with its own criteria.
+        """
+        with self._lock:
+            self.commands.append(payload)
+            return [self._apply_command(command) for command in payload.split(";")]
+
+    def _apply_command(self, command):
+        match = CON_ID.search(command)
+        container = self.windows.get(int(match.group(1))) if match else None
+        if container is None:
+            return {"success": False, "error": "No matching node"}
+
+        rect = dict(container.get("rect") or {"x": 0, "y": 0})
+        resize = RESIZE.search(command)
+        if resize:
+            rect["width"], rect["height"] = map(int, resize.groups())
+        move = MOVE.search(command)
+        if move:
+            rect["x"], rect["y"] = map(int, move.groups())
+        container["rect"] = rect
+        container["type"] = "floating_con"
+        return {"success": True}
+
+    def tree(self):
+        """A minimal tree: one output, one workspace, every window floating"""
+        with self._lock:
+            floating = [dict(container) for container in self.windows.values()]
+        width, height = self.screen_size
+        rect = {"x": 0, "y": 0, "width": width, "height": height}
+        workspace = {
+            "id": 2,
+            "type": "workspace",
+            "name": "1",
+            "rect": rect,
+            "nodes": [],
+            "floating_nodes": floating,
+        }
+        output = {"id": 1, "type": "output", "name": "FAKE-1", "nodes": [workspace]}
+        return {"id": 0, "type": "root", "nodes": [output], "floating_nodes": []}
+
+    def outputs(self):
+        width, height = self.screen_size
+        return [
+            {
+                "name": "FAKE-1",
+                "active": True,
+                "focused": True,
+                "rect": {"x": 0, "y": 0, "width": width, "height": height},
+            }
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve recorded i3/sway window events on a local IPC socket."
+    )
+    parser.add_argument("events", help="JSONL file of recorded window events")
+    parser.add_argument("--socket", help="Socket path (default: a temp file)")
+    parser.add_argument(
+        "--interval", type=float, default=0.0, help="Seconds between events"
+    )
+    args = parser.parse_args()
+
+    socket_path = args.socket or os.path.join(tempfile.gettempdir(), "fake-i3.sock")
+    server = FakeI3Server(socket_path, load_events(args.events))
+    server.interval = args.interval
+    server.start()
+    print(f"SWAYSOCK={socket_path}")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        for command in server.commands:
+            print(command)
+
+
+if __name__ == "__main__":
+    main()
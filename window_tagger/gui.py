@@ -1,6 +1,9 @@
 import tkinter as tk
 from tkinter import ttk
 from tagger_interface import TaggerInterface
+from tagger_log import get_logger
+
+log = get_logger("gui")
 
 
 class TaggerGUI:
@@ -211,12 +214,12 @@ class TaggerGUI:
                     self.tagger.save_offset(
                         tag_name, x_offset, y_offset, width_offset, height_offset
                     )
-                    print(f"Saved offsets for tag '{tag_name}'")
+                    log.info("Saved offsets for tag '%s'", tag_name)
                 except ValueError:
-                    print("Invalid offset values")
+                    log.warning("Invalid offset values")
 
         except ValueError:
-            print("Invalid offset value")
+            log.warning("Invalid offset value")
 
     def reset_offsets(self):
         """Reset all offsets to zero"""
@@ -230,7 +233,7 @@ class TaggerGUI:
         tag_name = self.tag_name_var.get().strip()
         if tag_name:
             self.tagger.save_offset(tag_name, 0, 0, 0, 0)
-            print(f"Reset and saved offsets for tag '{tag_name}'")
+            log.info("Reset and saved offsets for tag '%s'", tag_name)
 
     def center_window(self):
         """Center the window with current offsets"""
@@ -258,7 +261,7 @@ class TaggerGUI:
             )
 
         except ValueError:
-            print("Invalid offset values")
+            log.warning("Invalid offset values")
 
     def load_existing_tag_info(self):
         """Load existing tag information if available"""
@@ -297,7 +300,7 @@ class TaggerGUI:
         """Save the tag definition and offsets"""
         tag_name = self.tag_name_var.get().strip()
         if not tag_name:
-            print("Please enter a tag name")
+            log.warning("Please enter a tag name")
             return
 
         # Create tag definition
@@ -341,8 +344,8 @@ class TaggerGUI:
                 tag_name, x_offset, y_offset, width_offset, height_offset
             )
 
-            print(f"Tag '{tag_name}' saved successfully")
+            log.info("Tag '%s' saved successfully", tag_name)
             self.root.destroy()
 
         except ValueError:
-            print("Please enter valid numbers for offsets")
+            log.warning("Please enter valid numbers for offsets")
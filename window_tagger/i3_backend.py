@@ -0,0 +1,175 @@
+import threading
+
+from backend import DesktopBackend
+from i3_events import I3EventSource
+from i3_ipc import GET_OUTPUTS, GET_TREE, RUN_COMMAND, I3Connection, get_socket_path
+from tagger_config import DEFAULT_SCREEN_SIZE
+from tagger_log import get_logger
+
+log = get_logger("i3_backend")
+
+SCRATCHPAD = "__i3_scratch"
+
+
+class I3Backend(DesktopBackend):
+    """A tiling compositor that speaks the i3/sway IPC protocol
+
+    Window handles are container ids. The containers are cached from the
+    last tree and kept current by the event source, so looking at a
+    window doesn't cost a GET_TREE. The focused window is kept current by
+    the event source's focus events too. The event source updates the
+    cache from its own thread, so the cache is only touched under _lock.
+    Placing a window makes it floating and sets its absolute position
+    and size.
+    """
+
+    def __init__(self, socket_path=None):
+        self.socket_path = socket_path or get_socket_path()
+        if not self.socket_path:
+            raise ConnectionError("No i3/sway IPC socket (SWAYSOCK/I3SOCK not set)")
+        self.connection = I3Connection(self.socket_path)
+        self.windows = {}  # container id -> container
+        self.scratchpad = set()  # container ids stashed in the scratchpad
+        self.focused = 0
+        self.focus_tracked = False  # set while an event source follows focus
+        self._lock = threading.Lock()
+
+    def refresh_tree(self):
+        """Rebuild the container cache from the current tree"""
+        tree = self.connection.request(GET_TREE)
+        windows = {}
+        scratchpad = set()
+        focused = self._walk(tree, None, windows, scratchpad)
+        with self._lock:
+            self.windows = windows
+            self.scratchpad = scratchpad
+            self.focused = focused
+
+    def _walk(self, node, workspace, windows, scratchpad):
+        """Collect the windows under node; get the focused one's id or 0"""
+        focused = 0
+        if node.get("type") == "workspace":
+            workspace = node.get("name")
+        children = node.get("nodes", []) + node.get("floating_nodes", [])
+        # Leaves holding an X11 window (i3, Xwayland) or a Wayland app
+        if not children and (node.get("window") or node.get("app_id")):
+            windows[node["id"]] = node
+            if workspace == SCRATCHPAD:
+                scratchpad.add(node["id"])
+            if node.get("focused"):
+                focused = node["id"]
+        for child in children:
+            focused = self._walk(child, workspace, windows, scratchpad) or focused
+        return focused
+
+    def remember(self, container):
+        """Update the cached container from an event"""
+        with self._lock:
+            self.windows[container["id"]] = container
+            if container.get("focused"):
+                self.focused = container["id"]
+
+    def forget(self, con_id):
+        """Drop a closed container from the cache"""
+        with self._lock:
+            self.windows.pop(con_id, None)
+            self.scratchpad.discard(con_id)
+            if self.focused == con_id:
+                self.focused = 0
+
+    def _container(self, hwnd):
+        with self._lock:
+            container = self.windows.get(hwnd)
+        if container is None:
+            self.refresh_tree()
+            with self._lock:
+                container = self.windows.get(hwnd)
+        return container
+
+    def enum_windows(self):
+        self.refresh_tree()
+        with self._lock:
+            return list(self.windows)
+
+    def is_window(self, hwnd):
+        return self._container(hwnd) is not None
+
+    def is_visible(self, hwnd):
+        # Tiling layouts don't hide windows; the scratchpad counts as
+        # minimized, like an iconic window on Windows
+        return self._container(hwnd) is not None
+
+    def is_minimized(self, hwnd):
+        with self._lock:
+            return hwnd in self.scratchpad
+
+    def get_title(self, hwnd):
+        container = self._container(hwnd)
+        return (container.get("name") or "") if container else ""
+
+    def get_class_name(self, hwnd):
+        # X11 windows have WM_CLASS; native Wayland ones only an app_id
+        container = self._container(hwnd)
+        properties = container.get("window_properties") or {}
+        return properties.get("class") or container.get("app_id") or ""
+
+    def get_pid(self, hwnd):
+        return self._container(hwnd).get("pid") or 0
+
+    def get_rect(self, hwnd):
+        rect = self._container(hwnd)["rect"]
+        return rect["x"], rect["y"], rect["width"], rect["height"]
+
+    def move_window(self, hwnd, x, y, width, height):
+        self.move_windows([(hwnd, x, y, width, height)])
+
+    def move_windows(self, moves):
+        # Commands separated by ";" run in one RUN_COMMAND round trip
+        command = "; ".join(
+            f"[con_id={hwnd}] floating enable, "
+            f"resize set width {width} px height {height} px, "
+            f"move absolute position {x} px {y} px"
+            for hwnd, x, y, width, height in moves
+        )
+        replies = self.connection.request(RUN_COMMAND, command) or []
+        if not all(reply.get("success") for reply in replies):
+            errors = [reply.get("error") for reply in replies if reply.get("error")]
+            log.warning("Error moving windows: %s", "; ".join(errors))
+            return
+
+        with self._lock:
+            for hwnd, x, y, width, height in moves:
+                container = self.windows.get(hwnd)
+                if container is not None:
+                    container["rect"] = {
+                        "x": x,
+                        "y": y,
+                        "width": width,
+                        "height": height,
+                    }
+
+    def flash_window(self, hwnd):
+        # An urgency hint would stay until the window is focused
+        pass
+
+    def get_foreground_window(self):
+        # Called for every placement, so the tree is only fetched when no
+        # event source is following focus
+        if not self.focus_tracked:
+            self.refresh_tree()
+        with self._lock:
+            return self.focused
+
+    def get_screen_size(self):
+        outputs = [
+            output
+            for output in self.connection.request(GET_OUTPUTS) or []
+            if output.get("active")
+        ]
+        if not outputs:
+            return DEFAULT_SCREEN_SIZE
+        output = next((o for o in outputs if o.get("focused")), outputs[0])
+        return output["rect"]["width"], output["rect"]["height"]
+
+    def create_event_source(self):
+        return I3EventSource(self.socket_path, self)
@@ -0,0 +1,85 @@
+import threading
+
+from i3_ipc import EVENT_WINDOW, SUBSCRIBE, I3Connection
+from window_events import (
+    CREATED,
+    DESTROYED,
+    NAME_CHANGED,
+    SHOWN,
+    WindowEventSource,
+)
+from tagger_log import get_logger
+
+log = get_logger("i3_events")
+
+EVENT_KINDS = {
+    "new": (CREATED, SHOWN),
+    "title": (NAME_CHANGED,),
+    "close": (DESTROYED,),
+    "focus": (),  # only updates the backend's focused window
+}
+
+
+class I3EventSource(WindowEventSource):
+    """Window events from an i3/sway "window" subscription
+
+    Runs on its own IPC connection and thread. The container sent with
+    each event is handed to the backend first, so the monitor sees the
+    new title, window or focus without asking for the tree again.
+    """
+
+    delivers_events = True
+
+    def __init__(self, socket_path, backend=None):
+        super().__init__()
+        self.socket_path = socket_path
+        self.backend = backend
+        self._connection = None
+        self._thread = None
+
+    def start(self):
+        self._connection = I3Connection(self.socket_path)
+        reply = self._connection.request(SUBSCRIBE, ["window"])
+        if not reply or not reply.get("success"):
+            log.error("Error subscribing to window events")
+            self.delivers_events = False
+            return
+        if self.backend is not None:
+            self.backend.focus_tracked = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self.backend is not None:
+            self.backend.focus_tracked = False
+        if self._connection:
+            # Closing the socket ends the blocking read in _run
+            self._connection.close()
+            self._connection = None
+        if self._thread:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def _run(self):
+        connection = self._connection
+        while True:
+            try:
+                message_type, payload = connection.receive()
+            except (ConnectionError, OSError):
+                return
+            if message_type == EVENT_WINDOW and payload:
+                self._on_window_event(payload)
+
+    def _on_window_event(self, payload):
+        container = payload.get("container") or {}
+        con_id = container.get("id")
+        kinds = EVENT_KINDS.get(payload.get("change"))
+        if con_id is None or kinds is None:
+            return
+        if self.backend is not None:
+            if DESTROYED in kinds:
+                self.backend.forget(con_id)
+            else:
+                self.backend.remember(container)
+        for kind in kinds:
+            self.emit(kind, con_id)
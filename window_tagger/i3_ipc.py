@@ -0,0 +1,87 @@
+import json
+import os
+import socket
+import struct
+import threading
+
+# Message types of the i3/sway IPC protocol
+RUN_COMMAND = 0
+GET_WORKSPACES = 1
+SUBSCRIBE = 2
+GET_OUTPUTS = 3
+GET_TREE = 4
+
+# Events have the high bit set
+EVENT_MASK = 0x80000000
+EVENT_WINDOW = EVENT_MASK | 3
+
+MAGIC = b"i3-ipc"
+HEADER = struct.Struct("=6sII")  # magic, payload length, message type
+
+
+def get_socket_path():
+    """Get the IPC socket of the running sway or i3, or None"""
+    for name in ("SWAYSOCK", "I3SOCK"):
+        path = os.environ.get(name)
+        if path:
+            return path
+    return None
+
+
+def _read_exactly(sock, size):
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("IPC socket closed")
+        data += chunk
+    return data
+
+
+def read_message(sock):
+    """Read one message and get its (type, payload text)"""
+    magic, length, message_type = HEADER.unpack(_read_exactly(sock, HEADER.size))
+    if magic != MAGIC:
+        raise ConnectionError(f"Bad IPC magic: {magic!r}")
+    payload = _read_exactly(sock, length) if length else b""
+    return message_type, payload.decode("utf-8")
+
+
+def write_message(sock, message_type, payload=""):
+    """Send one message; payloads that aren't strings are sent as JSON"""
+    if not isinstance(payload, str):
+        payload = json.dumps(payload)
+    data = payload.encode("utf-8")
+    sock.sendall(HEADER.pack(MAGIC, len(data), message_type) + data)
+
+
+class I3Connection:
+    """One connection to the i3/sway IPC socket"""
+
+    def __init__(self, socket_path):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(socket_path)
+        self._lock = threading.Lock()
+
+    def request(self, message_type, payload=""):
+        """Send a request and wait for its reply"""
+        with self._lock:
+            write_message(self.sock, message_type, payload)
+            while True:
+                reply_type, reply = read_message(self.sock)
+                # Events only arrive on subscribed connections, but skip
+                # them rather than mistake one for the reply
+                if not reply_type & EVENT_MASK:
+                    return json.loads(reply) if reply else None
+
+    def receive(self):
+        """Wait for the next message, e.g. an event after SUBSCRIBE"""
+        message_type, payload = read_message(self.sock)
+        return message_type, json.loads(payload) if payload else None
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
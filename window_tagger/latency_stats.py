@@ -0,0 +1,117 @@
+import json
+import os
+import time
+
+# Each power of two is split into 2**(SUB_BUCKET_BITS - 1) buckets, so a
+# recorded value is off by at most 1/64 (about two significant digits)
+SUB_BUCKET_BITS = 7
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+HALF_SUB_BUCKETS = SUB_BUCKETS >> 1
+
+ALL_TAGS = "*"
+PERCENTILES = (50, 90, 99)
+
+
+def bucket_index(value):
+    """Get the bucket of a non-negative integer value"""
+    if value < SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return (shift << (SUB_BUCKET_BITS - 1)) + (value >> shift)
+
+
+def bucket_range(index):
+    """Get the (lowest, highest) value that lands in a bucket"""
+    if index < SUB_BUCKETS:
+        return index, index
+    shift = (index >> (SUB_BUCKET_BITS - 1)) - 1
+    lowest = (index - (shift << (SUB_BUCKET_BITS - 1))) << shift
+    return lowest, lowest + (1 << shift) - 1
+
+
+class LatencyHistogram:
+    """Durations bucketed log-linearly, in the manner of HdrHistogram
+
+    Values are kept in microseconds with a fixed relative precision, so
+    the memory used depends on the range of the values, not their number,
+    and percentiles can be read at any time.
+    """
+
+    def __init__(self):
+        self.counts = {}  # bucket index -> count
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def record(self, seconds):
+        value = max(0, int(seconds * 1_000_000))
+        index = bucket_index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.min = value if self.min is None else min(self.min, value)
+
+    def percentile(self, percent):
+        """Get the value at a percentile in microseconds, 0 if empty"""
+        if not self.count:
+            return 0
+        rank = max(1, -(-self.count * percent // 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(bucket_range(index)[1], self.max)
+        return self.max
+
+    def summary(self):
+        """Get the count, mean, percentiles and extremes in milliseconds"""
+        summary = {
+            "count": self.count,
+            "mean_ms": self.total / self.count / 1000 if self.count else 0.0,
+            "min_ms": (self.min or 0) / 1000,
+            "max_ms": self.max / 1000,
+        }
+        for percent in PERCENTILES:
+            summary[f"p{percent}_ms"] = self.percentile(percent) / 1000
+        return summary
+
+
+class LatencyStats:
+    """A histogram per metric and tag, plus one per metric over all tags"""
+
+    def __init__(self):
+        self.histograms = {}  # metric -> {tag -> LatencyHistogram}
+        self.started_at = time.time()
+
+    def record(self, metric, tag, seconds):
+        by_tag = self.histograms.setdefault(metric, {})
+        for key in (ALL_TAGS, tag or "(untagged)"):
+            histogram = by_tag.get(key)
+            if histogram is None:
+                histogram = by_tag[key] = LatencyHistogram()
+            histogram.record(seconds)
+
+    def get(self, metric, tag=ALL_TAGS):
+        """Get the histogram of a metric for a tag, or None"""
+        return self.histograms.get(metric, {}).get(tag)
+
+    def summary(self):
+        return {
+            metric: {tag: histogram.summary() for tag, histogram in by_tag.items()}
+            for metric, by_tag in self.histograms.items()
+        }
+
+    def write(self, path, **extra):
+        """Write the summary, plus any extra sections, to a JSON file"""
+        data = {
+            "written_at": time.time(),
+            "uptime_s": time.time() - self.started_at,
+            "latency": self.summary(),
+            **extra,
+        }
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(temp_path, path)
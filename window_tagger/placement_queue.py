@@ -0,0 +1,150 @@
+import heapq
+import time
+
+# Lower runs first
+PRIORITY_UNSHOWN = 0  # not shown yet, so moving it now avoids a visible jump
+PRIORITY_FOREGROUND = 1
+PRIORITY_NEW = 2
+PRIORITY_RESCAN = 3
+
+MAX_MOVES_PER_FRAME = 4
+FRAME_INTERVAL = 1 / 60
+
+
+class PlacementRequest:
+    """A pending move of one window to a target rect"""
+
+    __slots__ = (
+        "hwnd",
+        "rect",
+        "priority",
+        "flash",
+        "queued_at",
+        "seq",
+        "native_time",
+    )
+
+    def __init__(self, hwnd, rect, priority, flash, queued_at, seq):
+        self.hwnd = hwnd
+        self.rect = rect
+        self.priority = priority
+        self.flash = flash
+        self.queued_at = queued_at
+        self.seq = seq
+        self.native_time = 0.0  # seconds of native calls spent placing it
+
+
+class PlacementQueue:
+    """Window moves waiting to be applied, a few per frame
+
+    Requests are ordered by priority, then by arrival. A window has at
+    most one pending request: pushing it again replaces the target and
+    keeps the earlier place in line (or a better one, if the new priority
+    is higher). pop_frame() hands out at most max_per_frame requests per
+    frame_interval, so a login or wake storm is spread over a few frames
+    instead of stalling the shell.
+    """
+
+    def __init__(
+        self, max_per_frame=MAX_MOVES_PER_FRAME, frame_interval=FRAME_INTERVAL
+    ):
+        self.max_per_frame = max_per_frame
+        self.frame_interval = frame_interval
+        self._heap = []  # (priority, seq, hwnd), stale entries skipped
+        self._pending = {}  # hwnd -> PlacementRequest
+        self._seq = 0
+        self._next_frame = 0.0
+        self.pushed = 0
+        self.superseded = 0
+        self.applied = 0
+        self.max_depth = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def __contains__(self, hwnd):
+        return hwnd in self._pending
+
+    def push(self, hwnd, rect, priority, flash=True):
+        """Queue a move, replacing any pending one for the same window"""
+        self.pushed += 1
+        self._seq += 1
+        request = self._pending.get(hwnd)
+        if request is not None:
+            self.superseded += 1
+            request.rect = rect
+            request.flash = request.flash or flash
+            if priority >= request.priority:
+                return
+            request.priority = priority
+            request.seq = self._seq
+        else:
+            request = PlacementRequest(
+                hwnd, rect, priority, flash, time.perf_counter(), self._seq
+            )
+            self._pending[hwnd] = request
+            self.max_depth = max(self.max_depth, len(self._pending))
+        heapq.heappush(self._heap, (priority, self._seq, hwnd))
+
+    def discard(self, hwnd):
+        """Drop the pending move of a window, e.g. when it was destroyed"""
+        self._pending.pop(hwnd, None)
+
+    def pop(self, hwnd):
+        """Take the pending request of one window out of line, or None
+
+        The frame pacing is left alone, so a move applied this way
+        doesn't use up or delay the next frame.
+        """
+        request = self._pending.pop(hwnd, None)
+        if request is not None:
+            wait = time.perf_counter() - request.queued_at
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.applied += 1
+        return request
+
+    def time_until_frame(self):
+        """Seconds until pop_frame() will hand out requests again"""
+        return max(0.0, self._next_frame - time.perf_counter())
+
+    def pop_frame(self, paced=True):
+        """Get the requests to apply this frame, best first
+
+        With paced=False, the frame interval is ignored.
+        """
+        now = time.perf_counter()
+        if paced and now < self._next_frame:
+            return []
+
+        requests = []
+        while self._heap and len(requests) < self.max_per_frame:
+            _, seq, hwnd = heapq.heappop(self._heap)
+            request = self._pending.get(hwnd)
+            if request is None or request.seq != seq:
+                continue
+            del self._pending[hwnd]
+            wait = now - request.queued_at
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            requests.append(request)
+        self.applied += len(requests)
+        if requests:
+            self._next_frame = now + self.frame_interval
+        return requests
+
+    def stats(self):
+        """Get queue metrics: depth, counts and wait times in milliseconds"""
+        return {
+            "depth": len(self._pending),
+            "max_depth": self.max_depth,
+            "pushed": self.pushed,
+            "superseded": self.superseded,
+            "applied": self.applied,
+            "avg_wait_ms": (
+                self.total_wait / self.applied * 1000 if self.applied else 0.0
+            ),
+            "max_wait_ms": self.max_wait * 1000,
+        }
@@ -0,0 +1,159 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from tagger_log import get_logger
+
+log = get_logger("placement_workers")
+
+WORKERS = 4
+MOVE_TIMEOUT = 0.5  # seconds before a move counts as stuck
+HUNG_RETRY_DELAY = 2.0  # seconds before a hung window is tried again
+
+
+def place_windows(backend, requests):
+    """Move windows to the rects of placement requests in one transaction
+
+    Windows already at their rect are neither moved nor flashed. Returns
+    the rect of every request by hwnd. The time taken is shared out over
+    the requests' native_time.
+    """
+    start = time.perf_counter()
+    transaction = backend.begin_placement()
+    moved = [
+        request for request in requests if transaction.move(request.hwnd, *request.rect)
+    ]
+    transaction.commit()
+    if transaction.skipped:
+        log.debug("Skipped %s windows already in place", transaction.skipped)
+
+    for request in moved:
+        if request.flash:
+            backend.flash_window(request.hwnd)
+
+    share = (time.perf_counter() - start) / len(requests)
+    for request in requests:
+        request.native_time = share
+    return {request.hwnd: request.rect for request in requests}
+
+
+class PlacementWorkers:
+    """Runs window moves on a small thread pool
+
+    A move to a window whose owner thread is hung can block until that
+    thread wakes up. submit() never waits for a move: windows the backend
+    reports as hung are deferred for retry_delay seconds, and a window
+    with a move still in flight gets no second one. The rest of a frame's
+    requests go out as one transaction. A transaction that takes longer
+    than timeout is logged and its windows are treated as hung from then
+    on. Only the worker it landed on is tied up.
+    """
+
+    def __init__(
+        self,
+        backend,
+        workers=WORKERS,
+        timeout=MOVE_TIMEOUT,
+        retry_delay=HUNG_RETRY_DELAY,
+    ):
+        self.backend = backend
+        self.timeout = timeout
+        self.retry_delay = retry_delay
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="placement")
+        self._in_flight = {}  # hwnd -> (future, started, request)
+        self._deferred = {}  # hwnd -> (retry_at, request)
+        self._stuck = set()  # hwnds whose move is past its timeout
+        self.submitted = 0
+        self.deferrals = 0
+        self.timed_out = 0
+
+    def __len__(self):
+        """Moves in flight, plus those waiting to be retried"""
+        return len(self._in_flight) + len(self._deferred)
+
+    def submit(self, requests):
+        """Start moving windows together; get how many weren't deferred"""
+        ready = []
+        for request in requests:
+            hwnd = request.hwnd
+            if hwnd in self._in_flight or self.backend.is_hung(hwnd):
+                self._defer(request)
+            else:
+                self._deferred.pop(hwnd, None)
+                ready.append(request)
+        if not ready:
+            return 0
+
+        future = self._executor.submit(place_windows, self.backend, ready)
+        started = time.monotonic()
+        for request in ready:
+            self._in_flight[request.hwnd] = (future, started, request)
+        self.submitted += len(ready)
+        return len(ready)
+
+    def _defer(self, request):
+        # Only the latest target matters when the retry comes
+        self.deferrals += 1
+        self._deferred[request.hwnd] = (time.monotonic() + self.retry_delay, request)
+
+    def next_check(self, frame_interval):
+        """Seconds until collect() or due_retries() may have work, or None"""
+        if self._in_flight:
+            return frame_interval
+        if self._deferred:
+            retry_at = min(retry_at for retry_at, _ in self._deferred.values())
+            return max(0.0, retry_at - time.monotonic())
+        return None
+
+    def discard(self, hwnd):
+        """Drop a deferred move, e.g. when its window was destroyed"""
+        self._deferred.pop(hwnd, None)
+
+    def collect(self):
+        """Get (request, rect, error) for every move that has finished"""
+        now = time.monotonic()
+        finished = []
+        for hwnd, (future, started, request) in list(self._in_flight.items()):
+            if future.done():
+                del self._in_flight[hwnd]
+                self._stuck.discard(hwnd)
+                error = future.exception()
+                rect = None if error else future.result()[hwnd]
+                finished.append((request, rect, error))
+            elif now - started > self.timeout and hwnd not in self._stuck:
+                self._stuck.add(hwnd)
+                self.timed_out += 1
+                log.warning("Moving window %s is taking over %ss", hwnd, self.timeout)
+        return finished
+
+    def due_retries(self):
+        """Get the deferred requests whose retry time has come"""
+        now = time.monotonic()
+        due = [
+            request
+            for retry_at, request in self._deferred.values()
+            if retry_at <= now
+        ]
+        for request in due:
+            del self._deferred[request.hwnd]
+        return due
+
+    def wait(self, timeout):
+        """Wait up to timeout seconds for the moves in flight"""
+        futures = [future for future, _, _ in self._in_flight.values()]
+        if futures:
+            wait(futures, timeout=timeout)
+
+    def shutdown(self):
+        """Stop the pool without waiting for stuck moves"""
+        self._deferred.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        return {
+            "in_flight": len(self._in_flight),
+            "stuck": len(self._stuck),
+            "deferred": len(self._deferred),
+            "submitted": self.submitted,
+            "deferrals": self.deferrals,
+            "timed_out": self.timed_out,
+        }
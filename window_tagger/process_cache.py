@@ -0,0 +1,119 @@
+import time
+
+import psutil
+
+# Entries from the latest sweep are trusted without reopening the process
+# for this long; later lookups check the create time again
+SWEEP_TRUST = 1.0
+
+
+class ProcessEntry:
+    """Metadata for one process, identified by (pid, create_time)
+
+    The name comes with the entry. Costlier attributes are fetched the
+    first time any window of the process asks for them and are shared by
+    every window of that process afterwards.
+    """
+
+    __slots__ = ("pid", "create_time", "name", "sweep", "_attributes")
+
+    def __init__(self, pid, create_time, name):
+        self.pid = pid
+        self.create_time = create_time
+        self.name = name
+        self.sweep = 0  # the refresh() that last saw this process
+        self._attributes = {}
+
+    @property
+    def key(self):
+        return self.pid, self.create_time
+
+    def get_attribute(self, key, fetch):
+        """Get a memoized attribute, calling fetch(process) on first use
+
+        Returns None without memoizing if the PID now belongs to another
+        process.
+        """
+        if key not in self._attributes:
+            try:
+                process = psutil.Process(self.pid)
+                if process.create_time() != self.create_time:
+                    return None
+                self._attributes[key] = fetch(process)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                self._attributes[key] = None
+        return self._attributes[key]
+
+
+class ProcessCache:
+    """Shared process metadata cache for window enumeration
+
+    refresh() rebuilds the whole table from one process_iter sweep and
+    evicts processes that have exited. lookup() serves single PIDs in
+    between. Entries the latest sweep saw are trusted for SWEEP_TRUST
+    seconds after it; any other lookup reads the process's create time,
+    which is far cheaper than its name or other attributes, so a reused
+    PID never gets the entry of the process that had it before.
+    """
+
+    def __init__(self):
+        self._by_pid = {}  # pid -> ProcessEntry
+        self.sweep = 0
+        self.swept_at = None
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._by_pid)
+
+    def refresh(self):
+        """Sweep the process table once, keeping entries for live processes"""
+        self.sweep += 1
+        by_pid = {}
+        for process in psutil.process_iter(["pid", "name", "create_time"]):
+            info = process.info
+            pid = info["pid"]
+            entry = self._by_pid.get(pid)
+            if entry is None or entry.create_time != info["create_time"]:
+                name = info["name"] or "unknown"
+                entry = ProcessEntry(pid, info["create_time"], name)
+            entry.sweep = self.sweep
+            by_pid[pid] = entry
+        # Anything not seen in the sweep has exited
+        self._by_pid = by_pid
+        self.swept_at = time.monotonic()
+
+    def lookup(self, pid):
+        """Get the entry for a PID, or None if the process is gone"""
+        entry = self._by_pid.get(pid)
+        if (
+            entry is not None
+            and entry.sweep == self.sweep
+            and time.monotonic() - self.swept_at < SWEEP_TRUST
+        ):
+            self.hits += 1
+            return entry
+
+        try:
+            # psutil reads the create time when the Process is made
+            process = psutil.Process(pid)
+            create_time = process.create_time()
+            if entry is not None and entry.create_time == create_time:
+                self.hits += 1
+                return entry
+            self.misses += 1
+            entry = ProcessEntry(pid, create_time, process.name())
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            self._by_pid.pop(pid, None)
+            return None
+
+        self._by_pid[pid] = entry
+        return entry
+
+    def evict(self, pid):
+        """Forget a PID, e.g. when its process is known to have exited"""
+        self._by_pid.pop(pid, None)
+
+
+# Shared by every module that looks up processes for windows
+process_cache = ProcessCache()
@@ -0,0 +1,145 @@
+import argparse
+import sys
+import time
+from collections import Counter
+
+import auto_resize
+from app_core import WindowTagger
+from event_trace import FOREGROUND, PROCESS, SIGNAL, WINDOW, load_trace
+from simulated_desktop import SimulatedDesktop, SimulatedProcess, SimulatedWindow
+from tagger_log import configure
+from window_events import CREATED, DESTROYED, NAME_CHANGED, SHOWN
+
+
+def apply_record(desktop, record):
+    """Bring the simulated desktop to the state a trace record describes
+
+    Returns the window event to deliver for the record, or None.
+    """
+    _, kind, hwnd, data = record
+    if kind == PROCESS:
+        attributes = {key: value for key, value in data.items() if value is not None}
+        name = attributes.pop("process_name", None) or "unknown"
+        create_time = attributes.pop("create_time", None)
+        process = SimulatedProcess(hwnd, name, attributes)
+        if create_time is not None:
+            process.create_time = create_time
+        desktop.processes.by_pid[hwnd] = process
+        return None
+    if kind == FOREGROUND:
+        desktop.foreground = hwnd
+        return None
+    if kind == SIGNAL:
+        # The rescan they led to is in the trace as its own event
+        return None
+
+    if kind in (WINDOW, CREATED, SHOWN) and data is not None:
+        pid, class_name, title, rect, visible, minimized = data
+        window = SimulatedWindow(hwnd, pid, class_name, title, tuple(rect), visible)
+        window.minimized = minimized
+        desktop.windows[hwnd] = window
+    elif kind == NAME_CHANGED and hwnd in desktop.windows:
+        desktop.windows[hwnd].title = data
+    elif kind == DESTROYED:
+        desktop.windows.pop(hwnd, None)
+    return None if kind == WINDOW else kind
+
+
+def replay(header, records, config_dir="", realtime=False):
+    """Feed a trace through auto_resize on a simulated desktop
+
+    The windows open at the start of the recording are scanned first,
+    then the events are handled in order. At maximum speed every
+    placement is applied before the next event; with realtime, events
+    are spaced as recorded and placements are paced per frame, as in the
+    daemon. Returns the stats of the run.
+    """
+    desktop = SimulatedDesktop(screen_size=tuple(header["screen"]))
+    tagger = WindowTagger(backend=desktop, config_dir=config_dir)
+    auto_resize.reset_window_state()
+
+    # Windows that were already open, and their processes
+    start = 0
+    while start < len(records) and records[start][1] in (WINDOW, PROCESS):
+        apply_record(desktop, records[start])
+        start += 1
+
+    source = desktop.create_event_source()
+    kinds = Counter()
+    began = time.perf_counter()
+    auto_resize.scan_all_windows(tagger)
+    auto_resize.drain_placements(tagger)
+    scanned = time.perf_counter()
+
+    for record in records[start:]:
+        if realtime:
+            delay = record[0] - (time.perf_counter() - began)
+            while delay > 0:
+                auto_resize.apply_placements(tagger)
+                queue = auto_resize.placement_queue
+                time.sleep(min(delay, queue.time_until_frame()) if queue else delay)
+                delay = record[0] - (time.perf_counter() - began)
+
+        kind = apply_record(desktop, record)
+        if kind is None:
+            continue
+        kinds[kind] += 1
+        source.emit(kind, record[2])
+        auto_resize.handle_pending_events(tagger, source, 0)
+        if realtime:
+            auto_resize.apply_placements(tagger)
+        else:
+            auto_resize.drain_placements(tagger)
+    auto_resize.drain_placements(tagger)
+
+    finished = time.perf_counter()
+    return {
+        "windows": sum(1 for record in records[:start] if record[1] == WINDOW),
+        "events": sum(kinds.values()),
+        "kinds": dict(kinds),
+        "scan_ms": (scanned - began) * 1000,
+        "events_ms": (finished - scanned) * 1000,
+        "moves": desktop.moves,
+        "tagged": sum(1 for record in auto_resize.window_table if record.tag_name),
+        "placement": auto_resize.placement_queue.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay a recorded window event trace through auto_resize."
+    )
+    parser.add_argument("trace", help="Trace file written by auto_resize --record")
+    parser.add_argument(
+        "--config-dir",
+        default="",
+        help="Directory holding the tag and zone JSON files",
+    )
+    parser.add_argument(
+        "--realtime",
+        action="store_true",
+        help="Space the events as recorded instead of replaying at full speed",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=1,
+        help="Replay this many times for steadier timings",
+    )
+    args = parser.parse_args()
+
+    configure("WARNING")
+    header, records = load_trace(args.trace)
+    for _ in range(max(1, args.repeat)):
+        stats = replay(header, records, args.config_dir, args.realtime)
+        print(
+            f"{stats['windows']} windows scanned in {stats['scan_ms']:.2f} ms, "
+            f"{stats['events']} events in {stats['events_ms']:.2f} ms, "
+            f"{stats['tagged']} tagged, {stats['moves']} moves"
+        )
+    kinds = ", ".join(f"{kind}: {count}" for kind, count in stats["kinds"].items())
+    print(f"Events: {kinds or 'none'}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
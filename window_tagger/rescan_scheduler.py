@@ -0,0 +1,89 @@
+import threading
+import time
+
+from tagger_log import get_logger
+
+log = get_logger("rescan_scheduler")
+
+# Seconds without a new request before a rescan runs, and the longest a
+# rescan can be pushed back by a steady stream of requests
+DEBOUNCE_DELAY = 2.0
+MAX_DELAY = 10.0
+
+
+class RescanScheduler:
+    """Coalesces bursts of rescan requests into a single rescan
+
+    A wake typically comes with a session unlock and a display change or
+    two. request() only notes the reason; a worker thread waits until the
+    requests have stopped for delay seconds (or max_delay has passed since
+    the first one) and then calls run(reasons) once.
+    """
+
+    def __init__(self, run, delay=DEBOUNCE_DELAY, max_delay=MAX_DELAY):
+        self.run = run
+        self.delay = delay
+        self.max_delay = max_delay
+        self.requests = 0
+        self.runs = 0
+        self._reasons = set()
+        self._first = None
+        self._last = None
+        self._stopping = False
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def request(self, reason):
+        """Ask for a rescan; safe to call from any thread"""
+        with self._condition:
+            now = time.monotonic()
+            if self._first is None:
+                self._first = now
+            self._last = now
+            self._reasons.add(reason)
+            self.requests += 1
+            self._condition.notify()
+
+    def _wait_until_due(self):
+        """Wait for a burst of requests to end; get its reasons"""
+        with self._condition:
+            while not self._reasons and not self._stopping:
+                self._condition.wait()
+            while not self._stopping:
+                due = min(self._last + self.delay, self._first + self.max_delay)
+                remaining = due - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            if self._stopping:
+                return None
+
+            reasons = self._reasons
+            self._reasons = set()
+            self._first = self._last = None
+            return reasons
+
+    def _run(self):
+        while True:
+            reasons = self._wait_until_due()
+            if reasons is None:
+                return
+            self.runs += 1
+            log.info("Rescanning after %s", ", ".join(sorted(reasons)))
+            try:
+                self.run(reasons)
+            except Exception as e:
+                log.error("Error scheduling rescan: %s", e)
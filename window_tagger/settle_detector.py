@@ -0,0 +1,256 @@
+import heapq
+import time
+
+from tagger_log import get_logger
+
+log = get_logger("settle_detector")
+
+SETTLE_WINDOW = 0.5  # seconds a rect must hold to count as settled
+FIRST_CHECK = 0.05  # seconds after a placement before the first look
+MAX_BACKOFF = 2.0  # longest wait before re-applying a placement
+MAX_REAPPLIES = 6  # re-applies before leaving a window to itself
+
+# Learning the per-tag delay
+MIN_SAMPLES = 2  # settled placements of a tag before its delay is used
+SMOOTHING = 0.3  # weight of the newest settle time in the average
+MARGIN = 1.25  # delay = average settle time * MARGIN
+SHRINK = 0.9  # a delayed placement that never moved probes a shorter delay
+MIN_DELAY = 0.02  # shorter learned delays aren't worth waiting for
+
+DELAYED = "delayed"
+WATCHING = "watching"
+
+
+class SettleEntry:
+    """One window being placed late or watched after its placement"""
+
+    __slots__ = (
+        "hwnd",
+        "tag_name",
+        "rect",
+        "priority",
+        "flash",
+        "state",
+        "requested_at",
+        "delay",
+        "due_at",
+        "stable_since",
+        "last_drift",
+        "backoff",
+        "reapplies",
+    )
+
+    def __init__(self, hwnd, tag_name, rect, priority, flash, now):
+        self.hwnd = hwnd
+        self.tag_name = tag_name
+        self.rect = rect
+        self.priority = priority
+        self.flash = flash
+        self.state = WATCHING
+        self.requested_at = now  # when the placement was first asked for
+        self.delay = 0.0
+        self.due_at = now
+        self.stable_since = None
+        self.last_drift = None
+        self.backoff = FIRST_CHECK
+        self.reapplies = 0
+
+
+class TagSettleStats:
+    """How long after placement the windows of one tag keep moving"""
+
+    __slots__ = ("samples", "average", "reapplies")
+
+    def __init__(self):
+        self.samples = 0
+        self.average = 0.0
+        self.reapplies = 0
+
+    def add(self, settle_time):
+        if self.samples:
+            self.average += SMOOTHING * (settle_time - self.average)
+        else:
+            self.average = settle_time
+        self.samples += 1
+
+    @property
+    def delay(self):
+        if self.samples < MIN_SAMPLES:
+            return 0.0
+        delay = self.average * MARGIN
+        return delay if delay >= MIN_DELAY else 0.0
+
+
+class SettleDetector:
+    """Watches placed windows until their rect stops changing
+
+    Some apps resize themselves right after being placed. After a
+    placement the window's rect is checked; while the app keeps moving it
+    away from the target, the placement is re-applied with exponential
+    backoff, and once the rect has held for settle_window seconds the
+    window is left alone. How long each tag's windows kept moving is
+    learned, and later placements of that tag are delayed by about that
+    long, so they land once, after the app is done.
+    """
+
+    def __init__(self, settle_window=SETTLE_WINDOW, max_reapplies=MAX_REAPPLIES):
+        self.settle_window = settle_window
+        self.max_reapplies = max_reapplies
+        self.tags = {}  # tag name -> TagSettleStats
+        self._entries = {}  # hwnd -> SettleEntry
+        self._heap = []  # (due_at, seq, hwnd), stale entries skipped
+        self._seq = 0
+        self.settled = 0
+        self.reapplied = 0
+        self.given_up = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, hwnd):
+        return hwnd in self._entries
+
+    def _schedule(self, entry, due_at):
+        entry.due_at = due_at
+        self._seq += 1
+        heapq.heappush(self._heap, (due_at, self._seq, entry.hwnd))
+
+    def learned_delay(self, tag_name):
+        """Seconds to hold back a new placement of a tag, 0 if none"""
+        stats = self.tags.get(tag_name)
+        return stats.delay if stats else 0.0
+
+    def delay(self, hwnd, tag_name, rect, priority, flash):
+        """Hold a placement back by its tag's learned delay
+
+        Returns False, without holding anything, if the tag has no delay.
+        """
+        delay = self.learned_delay(tag_name)
+        if not delay:
+            return False
+        now = time.monotonic()
+        entry = self._entries.get(hwnd)
+        if entry is None:
+            entry = self._entries[hwnd] = SettleEntry(
+                hwnd, tag_name, rect, priority, flash, now
+            )
+        entry.tag_name = tag_name
+        entry.rect = rect
+        entry.state = DELAYED
+        entry.delay = delay
+        self._schedule(entry, now + delay)
+        return True
+
+    def watch(self, hwnd, tag_name, rect, priority):
+        """Start or go on watching a window that was just placed at rect"""
+        now = time.monotonic()
+        entry = self._entries.get(hwnd)
+        if entry is None:
+            entry = self._entries[hwnd] = SettleEntry(
+                hwnd, tag_name, rect, priority, False, now
+            )
+        entry.tag_name = tag_name
+        entry.rect = rect
+        entry.priority = priority
+        entry.state = WATCHING
+        entry.stable_since = None
+        self._schedule(entry, now + entry.backoff)
+
+    def forget(self, hwnd):
+        """Stop watching a window, e.g. when it was destroyed"""
+        self._entries.pop(hwnd, None)
+
+    def time_until_due(self):
+        """Seconds until the next entry is due, or None if there are none"""
+        while self._heap:
+            due_at, seq, hwnd = self._heap[0]
+            entry = self._entries.get(hwnd)
+            if entry is not None and entry.due_at == due_at:
+                return max(0.0, due_at - time.monotonic())
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self):
+        """Get the entries whose time has come, delayed or watched"""
+        now = time.monotonic()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due_at, _, hwnd = heapq.heappop(self._heap)
+            entry = self._entries.get(hwnd)
+            if entry is not None and entry.due_at == due_at:
+                due.append(entry)
+        return due
+
+    def check(self, entry, rect):
+        """Look at a watched window's current rect
+
+        Returns True if the placement should be re-applied now. Windows
+        that settle, or that keep fighting past max_reapplies, are
+        dropped.
+        """
+        now = time.monotonic()
+        if tuple(rect) == tuple(entry.rect):
+            if entry.stable_since is None:
+                entry.stable_since = now
+            if now - entry.stable_since >= self.settle_window:
+                self._settle(entry)
+            else:
+                self._schedule(entry, entry.stable_since + self.settle_window)
+            return False
+
+        # The app moved or resized itself away from the target
+        entry.last_drift = now
+        entry.stable_since = None
+        if entry.reapplies >= self.max_reapplies:
+            self.given_up += 1
+            self._entries.pop(entry.hwnd, None)
+            log.info(
+                "Window %s with tag '%s' keeps moving "
+                "itself; leaving it after %s re-applies",
+                entry.hwnd,
+                entry.tag_name,
+                entry.reapplies,
+            )
+            return False
+
+        # Wait a little longer each time before fighting it again
+        entry.reapplies += 1
+        self.reapplied += 1
+        self._schedule(entry, now + entry.backoff)
+        entry.backoff = min(entry.backoff * 2, MAX_BACKOFF)
+        return True
+
+    def _settle(self, entry):
+        self._entries.pop(entry.hwnd, None)
+        self.settled += 1
+        stats = self.tags.get(entry.tag_name)
+        if stats is None:
+            stats = self.tags[entry.tag_name] = TagSettleStats()
+        stats.reapplies += entry.reapplies
+
+        if entry.last_drift is not None:
+            settle_time = entry.last_drift - entry.requested_at
+        else:
+            # Nothing moved: the app was done before the (possibly delayed)
+            # placement, so try a little less delay next time
+            settle_time = entry.delay * SHRINK
+        stats.add(settle_time)
+        log.debug(
+            "Window %s settled after %s re-applies, tag delay now %.3fs",
+            entry.hwnd,
+            entry.reapplies,
+            stats.delay,
+        )
+
+    def stats(self):
+        return {
+            "watching": len(self._entries),
+            "settled": self.settled,
+            "reapplied": self.reapplied,
+            "given_up": self.given_up,
+            "tag_delays_ms": {
+                tag_name: stats.delay * 1000
+                for tag_name, stats in self.tags.items()
+                if stats.delay
+            },
+        }
@@ -0,0 +1,257 @@
+import random
+import time
+
+from backend import DesktopBackend
+from window_events import (
+    CREATED,
+    DESTROYED,
+    NAME_CHANGED,
+    SHOWN,
+    SimulatedEventSource,
+    SimulatedSignalSource,
+)
+
+
+class SimulatedWindow:
+    """One window of a SimulatedDesktop"""
+
+    __slots__ = (
+        "hwnd",
+        "pid",
+        "class_name",
+        "title",
+        "rect",
+        "visible",
+        "minimized",
+        "hung",
+        "shown_rect",
+        "own_rect",
+        "settles_at",
+    )
+
+    def __init__(self, hwnd, pid, class_name, title, rect, visible=True):
+        self.hwnd = hwnd
+        self.pid = pid
+        self.class_name = class_name
+        self.title = title
+        self.rect = rect
+        self.visible = visible
+        self.minimized = False
+        self.hung = False
+        self.shown_rect = rect if visible else None  # where it was first seen
+        self.own_rect = None  # where the app puts itself until settles_at
+        self.settles_at = 0.0
+
+
+class SimulatedProcess:
+    """Process entry with the ProcessEntry interface and fixed attributes"""
+
+    __slots__ = ("pid", "create_time", "name", "attributes")
+
+    def __init__(self, pid, name, attributes):
+        self.pid = pid
+        self.create_time = time.time()
+        self.name = name
+        self.attributes = attributes
+
+    def get_attribute(self, key, fetch):
+        return self.attributes.get(key)
+
+
+class SimulatedProcesses:
+    """Process table with the ProcessCache interface"""
+
+    def __init__(self):
+        self.by_pid = {}
+
+    def __len__(self):
+        return len(self.by_pid)
+
+    def refresh(self):
+        pass
+
+    def lookup(self, pid):
+        return self.by_pid.get(pid)
+
+
+class SimulatedDesktop(DesktopBackend):
+    """In-memory desktop for running the tagger without a window system
+
+    Windows are created, renamed and destroyed by hand or in bulk with
+    populate() and churn(). Once create_event_source() has been called,
+    every change is also delivered as the window event a real desktop
+    would send. System signals are sent through signals, the source
+    from create_signal_source(). moves and flashes count the calls made
+    by the tagger. native_calls counts the calls that would reach the
+    window system: each move, batch of moves and flash. Moving a hung
+    window blocks for hang_time seconds, and a window set up with
+    resize_itself() snaps back to its own rect when moved too early.
+    """
+
+    def __init__(self, screen_size=(1920, 1080), seed=None):
+        self.screen_size = screen_size
+        self.windows = {}  # hwnd -> SimulatedWindow, oldest first
+        self.processes = SimulatedProcesses()
+        self.foreground = 0
+        self.events = None
+        self.signals = None
+        self.moves = 0
+        self.flashes = 0
+        self.native_calls = 0
+        self.hang_time = 1.0
+        self.random = random.Random(seed)
+        self._next_hwnd = 0x10000
+        self._next_pid = 1000
+        self._pids_by_name = {}
+
+    def add_process(self, name, **attributes):
+        """Start a process and get its pid"""
+        pid = self._next_pid
+        self._next_pid += 4
+        self.processes.by_pid[pid] = SimulatedProcess(pid, name, attributes)
+        self._pids_by_name.setdefault(name, pid)
+        return pid
+
+    def create_window(self, process_name, class_name, title, rect=None, visible=True):
+        """Open a window, starting its process if it isn't running yet"""
+        pid = self._pids_by_name.get(process_name)
+        if pid is None:
+            pid = self.add_process(process_name)
+        if rect is None:
+            width, height = self.screen_size
+            rect = (
+                self.random.randrange(0, width // 2),
+                self.random.randrange(0, height // 2),
+                self.random.randrange(200, width // 2),
+                self.random.randrange(150, height // 2),
+            )
+
+        hwnd = self._next_hwnd
+        self._next_hwnd += 2
+        window = SimulatedWindow(hwnd, pid, class_name, title, rect, visible)
+        self.windows[hwnd] = window
+        self._emit(CREATED, hwnd)
+        if visible:
+            self.foreground = hwnd
+            self._emit(SHOWN, hwnd)
+        return hwnd
+
+    def show_window(self, hwnd):
+        """Make a hidden window visible"""
+        window = self.windows[hwnd]
+        window.visible = True
+        if window.shown_rect is None:
+            window.shown_rect = window.rect
+        self.foreground = hwnd
+        self._emit(SHOWN, hwnd)
+
+    def set_title(self, hwnd, title):
+        """Change the title of a window"""
+        self.windows[hwnd].title = title
+        self._emit(NAME_CHANGED, hwnd)
+
+    def hang_window(self, hwnd, hung=True):
+        """Make the owner of a window stop (or start) responding"""
+        self.windows[hwnd].hung = hung
+
+    def resize_itself(self, hwnd, rect, duration):
+        """Make a window's app undo moves for the next duration seconds"""
+        window = self.windows[hwnd]
+        window.own_rect = rect
+        window.settles_at = time.monotonic() + duration
+
+    def destroy_window(self, hwnd):
+        """Close a window"""
+        del self.windows[hwnd]
+        if self.foreground == hwnd:
+            self.foreground = 0
+        self._emit(DESTROYED, hwnd)
+
+    def populate(self, count, profiles):
+        """Open count windows, each from a random (process, class, title)"""
+        hwnds = []
+        for i in range(count):
+            process_name, class_name, title = self.random.choice(profiles)
+            hwnds.append(self.create_window(process_name, class_name, f"{title} {i}"))
+        return hwnds
+
+    def churn(self, count, profiles):
+        """Close count random windows and open as many new ones"""
+        closing = min(count, len(self.windows))
+        for hwnd in self.random.sample(list(self.windows), closing):
+            self.destroy_window(hwnd)
+        return self.populate(count, profiles)
+
+    def _emit(self, kind, hwnd):
+        if self.events is not None:
+            self.events.emit(kind, hwnd)
+
+    def enum_windows(self):
+        return list(self.windows)
+
+    def is_window(self, hwnd):
+        return hwnd in self.windows
+
+    def is_visible(self, hwnd):
+        window = self.windows.get(hwnd)
+        return window is not None and window.visible
+
+    def is_minimized(self, hwnd):
+        window = self.windows.get(hwnd)
+        return window is not None and window.minimized
+
+    def get_title(self, hwnd):
+        window = self.windows.get(hwnd)
+        return window.title if window else ""
+
+    def get_class_name(self, hwnd):
+        return self.windows[hwnd].class_name
+
+    def get_pid(self, hwnd):
+        return self.windows[hwnd].pid
+
+    def get_rect(self, hwnd):
+        return self.windows[hwnd].rect
+
+    def move_window(self, hwnd, x, y, width, height):
+        self.native_calls += 1
+        self._move(hwnd, x, y, width, height)
+
+    def move_windows(self, moves):
+        self.native_calls += 1
+        for hwnd, x, y, width, height in moves:
+            self._move(hwnd, x, y, width, height)
+
+    def _move(self, hwnd, x, y, width, height):
+        self.moves += 1
+        window = self.windows.get(hwnd)
+        if window is not None:
+            if window.hung:
+                time.sleep(self.hang_time)
+            window.rect = (x, y, width, height)
+            if window.own_rect is not None and time.monotonic() < window.settles_at:
+                window.rect = window.own_rect
+
+    def is_hung(self, hwnd):
+        window = self.windows.get(hwnd)
+        return window is not None and window.hung
+
+    def flash_window(self, hwnd):
+        self.native_calls += 1
+        self.flashes += 1
+
+    def get_foreground_window(self):
+        return self.foreground
+
+    def get_screen_size(self):
+        return self.screen_size
+
+    def create_event_source(self):
+        if self.events is None:
+            self.events = SimulatedEventSource()
+        return self.events
+
+    def create_signal_source(self):
+        if self.signals is None:
+            self.signals = SimulatedSignalSource()
+        return self.signals
@@ -0,0 +1,120 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import auto_resize
+from app_core import WindowTagger
+from tagger_log import configure
+
+CLASS_NAME = "TaggerSmoke"
+ZONE = {"name": "centered", "x": 0, "y": 10, "width": 400, "height": 300}
+OFFSETS = {"x_offset": -8, "y_offset": -20, "width_offset": 16, "height_offset": 0}
+
+
+def start_xvfb():
+    """Start Xvfb on a free display; get (process, display name)"""
+    read_fd, write_fd = os.pipe()
+    process = subprocess.Popen(
+        ["Xvfb", "-displayfd", str(write_fd), "-screen", "0", "1280x800x24"],
+        pass_fds=(write_fd,),
+        stderr=subprocess.DEVNULL,
+    )
+    os.close(write_fd)
+    with os.fdopen(read_fd) as f:
+        number = f.readline().strip()
+    if not number:
+        process.kill()
+        raise RuntimeError("Xvfb didn't report a display")
+    return process, f":{number}"
+
+
+def write_config(config_dir):
+    files = {
+        "tag_definitions.json": [{"name": "smoke", "class_name": CLASS_NAME}],
+        "tag_offsets.json": {"smoke": OFFSETS},
+        "zones.json": {"centered": ZONE},
+        "tag_zones.json": {"smoke": {"default_zone": "centered"}},
+    }
+    for name, data in files.items():
+        with open(os.path.join(config_dir, name), "w") as f:
+            json.dump(data, f)
+
+
+def open_window(display_name):
+    """Map a top-level window the way an app would; get (display, window)"""
+    from Xlib import X, Xatom, display
+
+    connection = display.Display(display_name)
+    screen = connection.screen()
+    window = screen.root.create_window(
+        50, 60, 200, 100, 0, screen.root_depth, X.InputOutput, X.CopyFromParent
+    )
+    window.set_wm_class("smoke", CLASS_NAME)
+    window.set_wm_name("Smoke test")
+    window.change_property(
+        connection.intern_atom("_NET_WM_PID"), Xatom.CARDINAL, 32, [os.getpid()]
+    )
+    window.map()
+    connection.sync()
+    return connection, window
+
+
+def main():
+    """Tag a window on a private Xvfb and place it at negative coordinates
+
+    Prints "skipped" when Xvfb isn't installed.
+    """
+    if shutil.which("Xvfb") is None:
+        print("X11 smoke check: skipped, Xvfb not installed")
+        return 0
+
+    from x11_backend import X11Backend
+
+    configure("WARNING")
+    process, display_name = start_xvfb()
+    config_dir = tempfile.mkdtemp()
+    try:
+        write_config(config_dir)
+        connection, window = open_window(display_name)
+
+        backend = X11Backend(display_name)
+        tagger = WindowTagger(backend=backend, config_dir=config_dir)
+        auto_resize.checkpoint_file = os.path.join(config_dir, "checkpoint.json")
+        auto_resize.stats_file = os.path.join(config_dir, "stats.json")
+        auto_resize.reset_window_state()
+
+        auto_resize.scan_all_windows(tagger)
+        auto_resize.drain_placements(tagger)
+        record = auto_resize.window_table.get(window.id)
+        assert record is not None and record.tag_name == "smoke", record
+
+        expected = (
+            ZONE["x"] + OFFSETS["x_offset"],
+            ZONE["y"] + OFFSETS["y_offset"],
+            ZONE["width"] + OFFSETS["width_offset"],
+            ZONE["height"] + OFFSETS["height_offset"],
+        )
+        assert expected[0] < 0 and expected[1] < 0, expected
+        rect = tuple(backend.get_rect(window.id))
+        assert rect == expected, (rect, expected)
+
+        # A bare Xvfb has no window manager to take _NET_MOVERESIZE_WINDOW,
+        # so the message only has to pack and send
+        backend.can_moveresize = True
+        backend.move_window(window.id, *expected)
+        backend.display.sync()
+
+        connection.close()
+        print(f"X11 smoke check: tagged and placed at {rect} on {display_name}")
+        return 0
+    finally:
+        process.terminate()
+        process.wait()
+        shutil.rmtree(config_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,379 @@
+import re
+import threading
+from collections import OrderedDict
+
+from tagger_log import get_logger
+
+log = get_logger("tag_matcher")
+
+# Relative cost of the attribute each extra predicate reads. Predicates run
+# cheapest first so the costly process lookups only happen for rules that
+# survived everything else.
+TITLE_COST = 0  # already in hand
+PARENT_COST = 1  # ppid plus a name lookup
+EXE_COST = 2  # opens the process
+CMDLINE_COST = 3  # reads the process memory
+
+# Attributes that are not known until the process is inspected
+PROCESS_ATTRIBUTES = ("parent_process_name", "exe_path", "cmdline")
+
+
+class TagRule:
+    """A single compiled tag definition"""
+
+    __slots__ = (
+        "index",
+        "name",
+        "process_name",
+        "class_name",
+        "title_substring",
+        "predicates",
+        "needs_process",
+        "uses_title",
+    )
+
+    def __init__(self, index, definition):
+        self.index = index
+        self.name = definition.get("name")
+        # Empty or missing fields act as wildcards, same as the original scan
+        process_name = definition.get("process_name")
+        self.process_name = process_name.lower() if process_name else None
+        self.class_name = definition.get("class_name") or None
+        title_substring = definition.get("title_substring")
+        self.title_substring = title_substring.lower() if title_substring else None
+
+        # Extra predicates as (cost, attribute, test)
+        self.predicates = []
+        title_regex = definition.get("title_regex")
+        if title_regex:
+            pattern = re.compile(title_regex, re.IGNORECASE)
+            self.predicates.append(
+                (TITLE_COST, "window_title", lambda value: pattern.search(value))
+            )
+        parent_process_name = definition.get("parent_process_name")
+        if parent_process_name:
+            parent_process_name = parent_process_name.lower()
+            self.predicates.append(
+                (
+                    PARENT_COST,
+                    "parent_process_name",
+                    lambda value: value.lower() == parent_process_name,
+                )
+            )
+        exe_path = definition.get("exe_path")
+        if exe_path:
+            exe_path = exe_path.lower()
+            self.predicates.append(
+                (EXE_COST, "exe_path", lambda value: value.lower() == exe_path)
+            )
+        cmdline_substring = definition.get("cmdline_substring")
+        if cmdline_substring:
+            cmdline_substring = cmdline_substring.lower()
+            self.predicates.append(
+                (
+                    CMDLINE_COST,
+                    "cmdline",
+                    lambda value: cmdline_substring in value.lower(),
+                )
+            )
+        self.predicates.sort(key=lambda predicate: predicate[0])
+        self.needs_process = any(
+            attribute in PROCESS_ATTRIBUTES for _, attribute, _ in self.predicates
+        )
+        self.uses_title = self.title_substring is not None or any(
+            attribute == "window_title" for _, attribute, _ in self.predicates
+        )
+
+    def check_predicates(self, window_title, attributes):
+        """Check the extra predicates, fetching attributes only as needed"""
+        for _, attribute, test in self.predicates:
+            if attribute == "window_title":
+                value = window_title
+            elif attributes is not None:
+                value = attributes.get(attribute)
+            else:
+                value = None
+            if value is None or not test(value):
+                return False
+        return True
+
+
+class TitleAutomaton:
+    """Aho-Corasick automaton over the title substrings of a ruleset
+
+    One pass over a lowercased window title finds every rule whose
+    title_substring occurs in it, no matter how many title rules exist.
+    """
+
+    def __init__(self, rules):
+        self.goto = [{}]  # node -> {char: node}
+        self.fail = [0]
+
+        outputs = [[]]  # node -> rule indices ending here
+        for rule in rules:
+            if rule.title_substring is None:
+                continue
+            node = 0
+            for char in rule.title_substring:
+                next_node = self.goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self.goto)
+                    self.goto[node][char] = next_node
+                    self.goto.append({})
+                    self.fail.append(0)
+                    outputs.append([])
+                node = next_node
+            outputs[node].append(rule.index)
+
+        # Breadth-first pass to wire failure links and merge outputs along them
+        queue = list(self.goto[0].values())
+        for node in queue:
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[child] = target if target != child else 0
+                outputs[child].extend(outputs[self.fail[child]])
+
+        self.output = [tuple(indices) for indices in outputs]
+
+    def search(self, text):
+        """Get the indices of all rules whose substring occurs in text"""
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        found = set()
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                found.update(output[node])
+        return found
+
+
+class TagMatcher:
+    """Index over tag definitions that keeps first-match order
+
+    Rules are bucketed by lowercased process name and by class name, with
+    wildcard buckets for rules that leave either field unset. A lookup only
+    visits the rules that could possibly apply to the window's
+    (process, class) pair instead of the whole definition list.
+    """
+
+    def __init__(self, definitions):
+        self.rules = []
+        self.by_pair = {}  # (process, class) -> rules
+        self.by_process = {}  # process -> rules with any class
+        self.by_class = {}  # class -> rules with any process
+        self.wildcard = []  # rules with any process and any class
+        self._candidates = {}  # (process, class) -> merged candidate list
+
+        for index, definition in enumerate(definitions):
+            if not isinstance(definition, dict) or not definition.get("name"):
+                continue
+            try:
+                rule = TagRule(index, definition)
+            except re.error as e:
+                log.warning(
+                    "Invalid title_regex in tag '%s': %s", definition["name"], e
+                )
+                continue
+            self.rules.append(rule)
+
+            if rule.process_name and rule.class_name:
+                key = (rule.process_name, rule.class_name)
+                self.by_pair.setdefault(key, []).append(rule)
+            elif rule.process_name:
+                self.by_process.setdefault(rule.process_name, []).append(rule)
+            elif rule.class_name:
+                self.by_class.setdefault(rule.class_name, []).append(rule)
+            else:
+                self.wildcard.append(rule)
+
+        self.titles = TitleAutomaton(self.rules)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def candidates(self, process_name, class_name):
+        """Get the rules that could match a (process, class) pair, in order"""
+        key = (process_name.lower(), class_name)
+        candidates = self._candidates.get(key)
+        if candidates is None:
+            # Each bucket is already in definition order, so sorting the
+            # union by index restores the original first-match order
+            candidates = (
+                self.by_pair.get(key, [])
+                + self.by_process.get(key[0], [])
+                + self.by_class.get(class_name, [])
+                + self.wildcard
+            )
+            candidates.sort(key=lambda rule: rule.index)
+            self._candidates[key] = candidates
+        return candidates
+
+    def uses_process_attributes(self, process_name, class_name):
+        """Check if any candidate rule for the pair inspects the process
+
+        Results for such pairs depend on more than (process, class, title)
+        and must not be cached under that key.
+        """
+        return any(
+            rule.needs_process
+            for rule in self.candidates(process_name, class_name or "")
+        )
+
+    def has_conditional_rules(self, process_name, class_name):
+        """Check if any candidate rule for the pair depends on more than the pair
+
+        A pair whose candidates are all unconditional either always matches
+        or never does, so a miss for it can be remembered for good.
+        """
+        return any(
+            rule.title_substring is not None or rule.predicates
+            for rule in self.candidates(process_name, class_name or "")
+        )
+
+    def has_title_rules(self, process_name, class_name):
+        """Check if the outcome for the pair can change with the window title"""
+        return any(
+            rule.uses_title for rule in self.candidates(process_name, class_name or "")
+        )
+
+    def match_title_independent(self, process_name, class_name, attributes=None):
+        """Get the first candidate rule that does not look at the title
+
+        This part of a window's match never changes while the window lives,
+        so it can be computed once and reused on every title change.
+        """
+        if not process_name:
+            return None
+
+        for rule in self.candidates(process_name, class_name or ""):
+            if rule.uses_title:
+                continue
+            if not rule.predicates or rule.check_predicates("", attributes):
+                return rule
+        return None
+
+    def match_title_rules(
+        self, process_name, class_name, window_title, attributes=None, before=None
+    ):
+        """Get the first title rule matching the window, or None
+
+        Only rules that look at the title are evaluated. Rules at or after
+        the index given in before are skipped since they could not win over
+        the title independent match anyway.
+        """
+        if not process_name:
+            return None
+
+        window_title = window_title or ""
+        title_hits = None
+        for rule in self.candidates(process_name, class_name or ""):
+            if before is not None and rule.index >= before:
+                break
+            if not rule.uses_title:
+                continue
+            if rule.title_substring is not None and title_hits is None:
+                title_hits = self.titles.search(window_title.lower())
+            if self._rule_matches(rule, window_title, title_hits, attributes):
+                return rule
+        return None
+
+    def _rule_matches(self, rule, window_title, title_hits, attributes):
+        if rule.title_substring is not None and rule.index not in title_hits:
+            return False
+        return not rule.predicates or rule.check_predicates(window_title, attributes)
+
+    def match(self, process_name, class_name, window_title, attributes=None):
+        """Get the first rule matching the window, or None
+
+        attributes is an optional mapping that supplies process attributes
+        (parent_process_name, exe_path, cmdline) on demand, such as a
+        LazyWindowInfo. Rules needing an attribute it can't provide fail.
+        """
+        if not process_name:
+            return None
+
+        window_title = window_title or ""
+        title_hits = None
+        for rule in self.candidates(process_name, class_name or ""):
+            # The title is only scanned once a title rule is actually reached
+            if rule.title_substring is not None and title_hits is None:
+                title_hits = self.titles.search(window_title.lower())
+            if self._rule_matches(rule, window_title, title_hits, attributes):
+                return rule
+        return None
+
+    def match_all(self, process_name, class_name, window_title, attributes=None):
+        """Get every rule matching the window, in definition order"""
+        if not process_name:
+            return []
+
+        window_title = window_title or ""
+        title_hits = self.titles.search(window_title.lower())
+        return [
+            rule
+            for rule in self.candidates(process_name, class_name or "")
+            if self._rule_matches(rule, window_title, title_hits, attributes)
+        ]
+
+
+class MatchCache:
+    """Bounded LRU cache of match results tagged with a ruleset version
+
+    Entries stored under an older version are treated as misses and dropped
+    when they are next looked up, so bumping the version is all it takes to
+    invalidate the cache after the rules or offsets change. The monitor
+    loop and the hotkey thread share it, so lookups and stores are locked.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (version, result)
+        self._lock = threading.Lock()
+
+    def bump_version(self):
+        """Invalidate every cached result"""
+        self.version += 1
+
+    def get(self, key):
+        """Get (found, result) for a key, counting the hit or miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == self.version:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, entry[1]
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, result):
+        """Store a result under the current version"""
+        with self._lock:
+            self._entries[key] = (self.version, result)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        """Get the cache counters"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "version": self.version,
+        }
@@ -0,0 +1,323 @@
+import json
+import os
+from tag_matcher import MatchCache, TagMatcher
+from tagger_log import get_logger, match_trace
+
+log = get_logger("tagger_config")
+
+# Used for the default zone when the screen size isn't known
+DEFAULT_SCREEN_SIZE = (1920, 1080)
+
+# Where the auto-resize daemon puts tagged windows without a default zone
+FALLBACK_ZONE = "centered"
+
+
+class TagConfig:
+    """Tag definitions, offsets and zones, plus the matching built on them
+
+    Nothing here touches the desktop, so matching and placement math can be
+    run anywhere. WindowTagger adds the platform side on top. With
+    save_defaults=False a missing zones.json is filled in memory only, so
+    a config directory can be read without being written to.
+    """
+
+    def __init__(self, config_dir="", save_defaults=True):
+        self.definitions_file = os.path.join(config_dir, "tag_definitions.json")
+        self.offsets_file = os.path.join(config_dir, "tag_offsets.json")
+        self.zones_file = os.path.join(config_dir, "zones.json")
+        self.tag_zones_file = os.path.join(config_dir, "tag_zones.json")
+        self.save_defaults = save_defaults
+        self.match_cache = MatchCache()
+        self.untagged_pairs = set()  # (process, class) pairs no rule can match
+        self.reload()
+
+    def reload(self):
+        """Reload all configuration files and drop cached match results"""
+        self.definitions = self.load_definitions()
+        self.matcher = TagMatcher(self.definitions)
+        self.offsets = self.load_offsets()
+        self.zones = self.load_zones()
+        self.tag_zones = self.load_tag_zones()
+        self.match_cache.bump_version()
+        self.untagged_pairs.clear()
+
+    def load_definitions(self):
+        """Load window definitions from JSON file"""
+        if os.path.exists(self.definitions_file):
+            try:
+                with open(self.definitions_file, "r") as f:
+                    data = json.load(f)
+                    # Ensure the data is a list
+                    if isinstance(data, list):
+                        return data
+                    else:
+                        log.warning(
+                            "%s does not contain a valid list. Using empty list.",
+                            self.definitions_file,
+                        )
+                        return []
+            except json.JSONDecodeError:
+                log.warning(
+                    "%s contains invalid JSON. Using empty list.", self.definitions_file
+                )
+                return []
+            except Exception as e:
+                log.error("Error loading definitions: %s", e)
+                return []
+        return []
+
+    def load_offsets(self):
+        """Load window offsets from JSON file"""
+        if os.path.exists(self.offsets_file):
+            try:
+                with open(self.offsets_file, "r") as f:
+                    data = json.load(f)
+                    # Ensure the data is a dictionary
+                    if isinstance(data, dict):
+                        return data
+                    else:
+                        log.warning(
+                            "%s does not contain a valid dictionary. Using empty dict.",
+                            self.offsets_file,
+                        )
+                        return {}
+            except json.JSONDecodeError:
+                log.warning(
+                    "%s contains invalid JSON. Using empty dict.", self.offsets_file
+                )
+                return {}
+            except Exception as e:
+                log.error("Error loading offsets: %s", e)
+                return {}
+        return {}
+
+    def load_zones(self):
+        """Load window zones from JSON file"""
+        if os.path.exists(self.zones_file):
+            try:
+                with open(self.zones_file, "r") as f:
+                    return json.load(f)
+            except json.JSONDecodeError:
+                log.warning(
+                    "%s contains invalid JSON. Creating default zone.", self.zones_file
+                )
+                return self.create_default_zone()
+            except Exception as e:
+                log.error("Error loading zones: %s", e)
+                return self.create_default_zone()
+        else:
+            return self.create_default_zone()
+
+    def create_default_zone(self):
+        """Create default centered zone"""
+        # Get screen dimensions
+        screen_width, screen_height = self.get_screen_size()
+
+        # Default centered zone with margins
+        centered_zone = {
+            "name": "Centered",
+            "x": screen_width // 6,
+            "y": screen_height // 12,
+            "width": 2 * screen_width // 3,
+            "height": 5 * screen_height // 6,
+            "description": "Centered window with margins",
+        }
+
+        zones = {"centered": centered_zone}
+        if not self.save_defaults:
+            return zones
+
+        # Save the default zone
+        dirname = os.path.dirname(self.zones_file)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        with open(self.zones_file, "w") as f:
+            json.dump(zones, f, indent=2)
+
+        return zones
+
+    def get_screen_size(self):
+        """Get the (width, height) of the screen"""
+        return DEFAULT_SCREEN_SIZE
+
+    def save_definitions(self):
+        """Save window definitions to JSON file"""
+        # Only create directory if the file path contains a directory
+        dirname = os.path.dirname(self.definitions_file)
+        if dirname:  # Only create directory if there is a path component
+            os.makedirs(dirname, exist_ok=True)
+        with open(self.definitions_file, "w") as f:
+            json.dump(self.definitions, f, indent=2)
+
+    def save_offsets(self):
+        """Save window offsets to JSON file"""
+        # Only create directory if the file path contains a directory
+        dirname = os.path.dirname(self.offsets_file)
+        if dirname:  # Only create directory if there is a path component
+            os.makedirs(dirname, exist_ok=True)
+        with open(self.offsets_file, "w") as f:
+            json.dump(self.offsets, f, indent=2)
+
+    def get_centered_zone(self):
+        """Get the centered zone dimensions"""
+        # Get the centered zone from zones.json
+        centered = self.zones.get("centered", {})
+        if not centered:
+            # Fallback to default centered zone if not found
+            return self.create_default_zone()["centered"]
+        return centered
+
+    def save_tag_definition(self, tag_definition):
+        """Save a new tag definition"""
+        self.save_tag_definitions([tag_definition])
+
+    def save_tag_definitions(self, tag_definitions):
+        """Save several tag definitions with a single rebuild and write"""
+        for tag_definition in tag_definitions:
+            tag_name = tag_definition["name"]
+
+            # Check if tag with this name already exists
+            tag_exists = False
+            for i, existing_tag in enumerate(self.definitions):
+                if existing_tag.get("name") == tag_name:
+                    # Update existing tag instead of adding a new one
+                    self.definitions[i] = tag_definition
+                    tag_exists = True
+                    break
+
+            # Only add if tag doesn't already exist
+            if not tag_exists:
+                self.definitions.append(tag_definition)
+
+        self.matcher = TagMatcher(self.definitions)
+        self.match_cache.bump_version()
+        self.untagged_pairs.clear()
+        self.save_definitions()
+
+    def save_offset(self, tag_name, x_offset, y_offset, width_offset, height_offset):
+        """Save window offsets for a tag"""
+        self.offsets[tag_name] = {
+            "x_offset": x_offset,
+            "y_offset": y_offset,
+            "width_offset": width_offset,
+            "height_offset": height_offset,
+        }
+        self.match_cache.bump_version()
+        self.save_offsets()
+
+    def is_known_untagged(self, process_name, class_name):
+        """Check if a (process, class) pair is known to match no tag"""
+        return (process_name.lower(), class_name) in self.untagged_pairs
+
+    def get_existing_tag_info(self, window_info):
+        """Get existing tag information for a window"""
+        # First try to match based on process name
+        process_name = window_info.get("process_name", "")
+        if not process_name:
+            return None
+
+        log.debug("Looking for tag matching process: %s", process_name)
+
+        class_name = window_info.get("class_name", "")
+        window_title = window_info.get("window_title", "")
+
+        if self.is_known_untagged(process_name, class_name):
+            return None
+
+        # The same few windows are looked up over and over on wake and Win+C.
+        # Rules that inspect the process itself can't be keyed this way.
+        cacheable = not self.matcher.uses_process_attributes(process_name, class_name)
+        key = (process_name, class_name, window_title)
+        if cacheable:
+            found, tag_info = self.match_cache.get(key)
+            if found:
+                self.trace_match("cache", window_info, key, tag_info)
+                return tag_info
+
+        # Only the rules indexed under this window's process and class are checked
+        rule = self.matcher.match(process_name, class_name, window_title, window_info)
+        if rule is None:
+            tag_info = None
+            # Pairs with title or process dependent rules must be re-checked
+            if not self.matcher.has_conditional_rules(process_name, class_name):
+                self.untagged_pairs.add((process_name.lower(), class_name))
+        else:
+            log.debug("Found matching tag: %s", rule.name)
+            tag_info = rule.name, self.offsets.get(rule.name, {})
+
+        if cacheable:
+            self.match_cache.put(key, tag_info)
+        self.trace_match("match", window_info, key, tag_info)
+        return tag_info
+
+    def trace_match(self, source, window_info, key, tag_info):
+        """Record a match decision in the trace ring buffer"""
+        match_trace.record(
+            source,
+            window_info.get("hwnd"),
+            key[0],
+            key[1],
+            key[2],
+            tag_info[0] if tag_info else None,
+        )
+
+    def load_tag_zones(self):
+        """Load tag zones from JSON file"""
+        if os.path.exists(self.tag_zones_file):
+            try:
+                with open(self.tag_zones_file, "r") as f:
+                    return json.load(f)
+            except json.JSONDecodeError:
+                log.warning(
+                    "%s contains invalid JSON. Using empty dict.", self.tag_zones_file
+                )
+                return {}
+            except Exception as e:
+                log.error("Error loading tag zones: %s", e)
+                return {}
+        return {}
+
+    def save_tag_zones(self):
+        """Save tag zones to JSON file"""
+        dirname = os.path.dirname(self.tag_zones_file)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        with open(self.tag_zones_file, "w") as f:
+            json.dump(self.tag_zones, f, indent=2)
+
+    def save_tag_zone(self, tag_name, zone_name):
+        """Save the default zone for a tag"""
+        self.save_tag_zones_for([tag_name], zone_name)
+
+    def save_tag_zones_for(self, tag_names, zone_name):
+        """Save the same default zone for several tags in one write"""
+        for tag_name in tag_names:
+            if tag_name not in self.tag_zones:
+                self.tag_zones[tag_name] = {}
+            self.tag_zones[tag_name]["default_zone"] = zone_name
+        self.save_tag_zones()
+
+    def get_tag_zone(self, tag_name):
+        """Get the default zone for a tag. Returns None if no zone is set."""
+        if tag_name in self.tag_zones:
+            return self.tag_zones[tag_name].get("default_zone")
+        return None
+
+    def get_target_rect(self, tag_name, offsets, fallback_zone=None):
+        """Get (zone_name, (x, y, width, height)) for a tag, or None
+
+        The rect is the tag's default zone with its offsets applied. Tags
+        without a default zone use fallback_zone, or are left where they
+        are and get None if there is none.
+        """
+        zone_name = self.get_tag_zone(tag_name) or fallback_zone
+        if zone_name is None:
+            return None
+
+        zone = self.zones.get(zone_name) or self.get_centered_zone()
+        return zone_name, (
+            zone.get("x", 0) + offsets.get("x_offset", 0),
+            zone.get("y", 0) + offsets.get("y_offset", 0),
+            zone.get("width", 0) + offsets.get("width_offset", 0),
+            zone.get("height", 0) + offsets.get("height_offset", 0),
+        )
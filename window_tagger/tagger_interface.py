@@ -26,6 +26,10 @@ class TaggerInterface:
         - process_name: Optional[str] - The process name to match
         - class_name: Optional[str] - The window class name to match
         - title_substring: Optional[str] - A substring to match in the window title
+        - title_regex: Optional[str] - A regular expression searched in the title
+        - parent_process_name: Optional[str] - The parent process name to match
+        - exe_path: Optional[str] - The full executable path to match
+        - cmdline_substring: Optional[str] - A substring to match in the command line
         """
         raise NotImplementedError()
     
@@ -41,8 +45,11 @@ class TaggerInterface:
         1. Process name (if specified)
         2. Class name (if specified)
         3. Title substring (if specified)
+        4. Title regex, parent process, executable path, command line
+           (if specified, cheapest first)
         
         All specified criteria must match for a tag to be considered a match.
+        Process attributes are only looked up when a candidate rule needs them.
         """
         raise NotImplementedError()
     
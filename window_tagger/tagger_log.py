@@ -0,0 +1,90 @@
+import logging
+import os
+import time
+from collections import deque
+
+# Set to DEBUG to see per-window matching details, or WARNING to quiet down
+LOG_LEVEL_ENV = "WINDOW_TAGGER_LOG"
+TRACE_SIZE = 512
+
+_configured = False
+
+
+def configure(level=None):
+    """Set up console logging for all window_tagger loggers
+
+    Messages are printed bare, like the print() calls they replace. The
+    level comes from the argument, then WINDOW_TAGGER_LOG, then INFO.
+    Disabled levels cost one cached level check per call. Calls pass
+    their arguments separately, so nothing is formatted for them.
+    """
+    global _configured
+    level = level or os.environ.get(LOG_LEVEL_ENV, "INFO")
+
+    root = logging.getLogger("window_tagger")
+    if not _configured:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        root.addHandler(handler)
+        root.propagate = False
+        _configured = True
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+
+
+def get_logger(name):
+    """Get the logger for a window_tagger module"""
+    if not _configured:
+        configure()
+    return logging.getLogger(f"window_tagger.{name}")
+
+
+class MatchTrace:
+    """Ring buffer of recent match decisions
+
+    Recording is a single deque append of a tuple, cheap enough to stay on
+    in the always-on daemon regardless of the log level.
+    """
+
+    def __init__(self, size=TRACE_SIZE):
+        self.entries = deque(maxlen=size)
+
+    def record(self, source, hwnd, process_name, class_name, window_title, tag_name):
+        """Remember one match decision"""
+        self.entries.append(
+            (
+                time.time(),
+                source,
+                hwnd,
+                process_name,
+                class_name,
+                window_title,
+                tag_name,
+            )
+        )
+
+    def format(self):
+        """Get the recorded decisions as text lines, oldest first"""
+        lines = []
+        for timestamp, source, hwnd, process, class_name, title, tag in self.entries:
+            stamp = time.strftime("%H:%M:%S", time.localtime(timestamp))
+            lines.append(
+                f"{stamp} [{source}] hwnd={hwnd} process={process} "
+                f"class={class_name} title={title!r} -> {tag or '-'}"
+            )
+        return lines
+
+    def dump(self, path=None):
+        """Write the recorded decisions to a file, or log them if no path"""
+        lines = self.format()
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        else:
+            log = get_logger("trace")
+            for line in lines:
+                log.info(line)
+        return len(lines)
+
+
+# Shared by everything that makes match decisions in this process
+match_trace = MatchTrace()
@@ -0,0 +1,156 @@
+import ctypes
+from ctypes import wintypes
+
+import win32api
+import win32con
+import win32gui
+import win32process
+
+from backend import DesktopBackend
+from tagger_log import get_logger
+from win32_events import Win32SignalSource, WinEventHookSource
+
+log = get_logger("win32_backend")
+
+# Post the move to the window's thread instead of waiting for it
+MOVE_FLAGS = (
+    win32con.SWP_ASYNCWINDOWPOS | win32con.SWP_NOZORDER | win32con.SWP_NOACTIVATE
+)
+DEFER_FLAGS = win32con.SWP_NOZORDER | win32con.SWP_NOACTIVATE
+
+user32 = ctypes.windll.user32
+user32.BeginDeferWindowPos.restype = wintypes.HANDLE
+user32.BeginDeferWindowPos.argtypes = [ctypes.c_int]
+user32.DeferWindowPos.restype = wintypes.HANDLE
+user32.DeferWindowPos.argtypes = [
+    wintypes.HANDLE,
+    wintypes.HWND,
+    wintypes.HWND,
+    ctypes.c_int,
+    ctypes.c_int,
+    ctypes.c_int,
+    ctypes.c_int,
+    wintypes.UINT,
+]
+user32.EndDeferWindowPos.argtypes = [wintypes.HANDLE]
+
+
+class Win32Backend(DesktopBackend):
+    """The Windows desktop, through pywin32"""
+
+    def __init__(self):
+        self.taskbar_window = None
+        self.taskbar_hidden = False
+
+    def enum_windows(self):
+        hwnds = []
+        win32gui.EnumWindows(lambda hwnd, param: hwnds.append(hwnd), None)
+        return hwnds
+
+    def is_window(self, hwnd):
+        return bool(win32gui.IsWindow(hwnd))
+
+    def is_visible(self, hwnd):
+        return bool(win32gui.IsWindowVisible(hwnd))
+
+    def is_minimized(self, hwnd):
+        return bool(win32gui.IsIconic(hwnd))
+
+    def get_title(self, hwnd):
+        return win32gui.GetWindowText(hwnd)
+
+    def get_class_name(self, hwnd):
+        return win32gui.GetClassName(hwnd)
+
+    def get_pid(self, hwnd):
+        _, pid = win32process.GetWindowThreadProcessId(hwnd)
+        return pid
+
+    def get_rect(self, hwnd):
+        left, top, right, bottom = win32gui.GetWindowRect(hwnd)
+        return left, top, right - left, bottom - top
+
+    def move_window(self, hwnd, x, y, width, height):
+        win32gui.SetWindowPos(hwnd, 0, x, y, width, height, MOVE_FLAGS)
+
+    def move_windows(self, moves):
+        # DeferWindowPos has no async flag, so EndDeferWindowPos waits on
+        # every window's thread and one app that hangs after the is_hung
+        # check would hold up the whole batch. Only windows of this thread
+        # are batched; the rest are posted one at a time
+        thread_id = win32api.GetCurrentThreadId()
+        batched = []
+        for move in moves:
+            owner, _ = win32process.GetWindowThreadProcessId(move[0])
+            if owner == thread_id:
+                batched.append(move)
+            else:
+                self.move_window(*move)
+        if batched:
+            self._defer_windows(batched)
+
+    def _defer_windows(self, moves):
+        # One DeferWindowPos transaction repositions them all in a single
+        # pass, with one repaint instead of one per window
+        hdwp = user32.BeginDeferWindowPos(len(moves))
+        for hwnd, x, y, width, height in moves:
+            if not hdwp:
+                break
+            hdwp = user32.DeferWindowPos(
+                hdwp, hwnd, None, x, y, width, height, DEFER_FLAGS
+            )
+        if hdwp and user32.EndDeferWindowPos(hdwp):
+            return
+
+        # A failed DeferWindowPos drops the whole transaction
+        log.debug("DeferWindowPos failed, moving %s windows one by one", len(moves))
+        for hwnd, x, y, width, height in moves:
+            self.move_window(hwnd, x, y, width, height)
+
+    def is_hung(self, hwnd):
+        return bool(user32.IsHungAppWindow(hwnd))
+
+    def flash_window(self, hwnd):
+        win32gui.FlashWindow(hwnd, True)
+
+    def get_foreground_window(self):
+        return win32gui.GetForegroundWindow()
+
+    def get_screen_size(self):
+        return (
+            win32api.GetSystemMetrics(win32con.SM_CXSCREEN),
+            win32api.GetSystemMetrics(win32con.SM_CYSCREEN),
+        )
+
+    def create_event_source(self):
+        return WinEventHookSource()
+
+    def create_signal_source(self):
+        return Win32SignalSource()
+
+    def toggle_taskbar(self):
+        """Toggle the visibility of the Windows taskbar"""
+        # Find taskbar window if not already found
+        if not self.taskbar_window:
+            self.taskbar_window = win32gui.FindWindow("Shell_TrayWnd", None)
+            if not self.taskbar_window:
+                log.info("Taskbar window not found")
+                return
+
+        # Toggle visibility
+        if self.taskbar_hidden:
+            win32gui.ShowWindow(self.taskbar_window, win32con.SW_SHOW)
+            self.taskbar_hidden = False
+            log.info("Taskbar shown")
+        else:
+            win32gui.ShowWindow(self.taskbar_window, win32con.SW_HIDE)
+            self.taskbar_hidden = True
+            log.info("Taskbar hidden")
+
+    def hide_taskbar(self):
+        """Hide the taskbar, e.g. when the application starts"""
+        self.taskbar_window = win32gui.FindWindow("Shell_TrayWnd", None)
+        if self.taskbar_window:
+            win32gui.ShowWindow(self.taskbar_window, win32con.SW_HIDE)
+            self.taskbar_hidden = True
+            log.info("Taskbar hidden on startup")
@@ -0,0 +1,265 @@
+import ctypes
+import threading
+from ctypes import wintypes
+
+from window_events import (
+    CREATED,
+    DESTROYED,
+    DISPLAY_CHANGE,
+    NAME_CHANGED,
+    SHOWN,
+    UNLOCK,
+    WAKE,
+    SystemSignalSource,
+    WindowEventSource,
+)
+from tagger_log import get_logger
+
+log = get_logger("win32_events")
+
+user32 = ctypes.windll.user32
+kernel32 = ctypes.windll.kernel32
+wtsapi32 = ctypes.windll.wtsapi32
+
+EVENT_OBJECT_CREATE = 0x8000
+EVENT_OBJECT_DESTROY = 0x8001
+EVENT_OBJECT_SHOW = 0x8002
+EVENT_OBJECT_NAMECHANGE = 0x800C
+WINEVENT_OUTOFCONTEXT = 0x0000
+WINEVENT_SKIPOWNPROCESS = 0x0002
+OBJID_WINDOW = 0
+CHILDID_SELF = 0
+GA_ROOT = 2
+WM_QUIT = 0x0012
+WM_DISPLAYCHANGE = 0x007E
+WM_POWERBROADCAST = 0x0218
+WM_WTSSESSION_CHANGE = 0x02B1
+PBT_APMRESUMESUSPEND = 0x0007
+PBT_APMRESUMEAUTOMATIC = 0x0012
+WTS_SESSION_UNLOCK = 0x0008
+NOTIFY_FOR_THIS_SESSION = 0
+
+EVENT_KINDS = {
+    EVENT_OBJECT_CREATE: CREATED,
+    EVENT_OBJECT_SHOW: SHOWN,
+    EVENT_OBJECT_NAMECHANGE: NAME_CHANGED,
+    EVENT_OBJECT_DESTROY: DESTROYED,
+}
+
+WinEventProc = ctypes.WINFUNCTYPE(
+    None,
+    wintypes.HANDLE,
+    wintypes.DWORD,
+    wintypes.HWND,
+    wintypes.LONG,
+    wintypes.LONG,
+    wintypes.DWORD,
+    wintypes.DWORD,
+)
+
+WNDPROC = ctypes.WINFUNCTYPE(
+    wintypes.LPARAM, wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM
+)
+
+
+class WNDCLASSW(ctypes.Structure):
+    _fields_ = [
+        ("style", wintypes.UINT),
+        ("lpfnWndProc", WNDPROC),
+        ("cbClsExtra", ctypes.c_int),
+        ("cbWndExtra", ctypes.c_int),
+        ("hInstance", wintypes.HINSTANCE),
+        ("hIcon", wintypes.HICON),
+        ("hCursor", wintypes.HANDLE),
+        ("hbrBackground", wintypes.HBRUSH),
+        ("lpszMenuName", wintypes.LPCWSTR),
+        ("lpszClassName", wintypes.LPCWSTR),
+    ]
+
+
+user32.DefWindowProcW.restype = wintypes.LPARAM
+user32.DefWindowProcW.argtypes = [
+    wintypes.HWND,
+    wintypes.UINT,
+    wintypes.WPARAM,
+    wintypes.LPARAM,
+]
+user32.CreateWindowExW.restype = wintypes.HWND
+user32.SetWinEventHook.restype = wintypes.HANDLE
+user32.SetWinEventHook.argtypes = [
+    wintypes.DWORD,
+    wintypes.DWORD,
+    wintypes.HMODULE,
+    WinEventProc,
+    wintypes.DWORD,
+    wintypes.DWORD,
+    wintypes.DWORD,
+]
+user32.UnhookWinEvent.argtypes = [wintypes.HANDLE]
+user32.GetAncestor.restype = wintypes.HWND
+user32.GetAncestor.argtypes = [wintypes.HWND, wintypes.UINT]
+
+
+class WinEventHookSource(WindowEventSource):
+    """Window events from out-of-context WinEvent hooks
+
+    The hooks live on a dedicated thread with its own message loop, which
+    is where Windows delivers the callbacks. Only events for top-level
+    windows themselves (not their child objects) are passed on.
+    """
+
+    delivers_events = True
+
+    def __init__(self):
+        super().__init__()
+        self._thread = None
+        self._thread_id = None
+        # Keep a reference so the callback isn't garbage collected
+        self._callback = WinEventProc(self._on_event)
+
+    def start(self):
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(ready,), daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def stop(self):
+        if self._thread_id:
+            user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+            self._thread.join(timeout=1)
+            self._thread_id = None
+
+    def _run(self, ready):
+        self._thread_id = kernel32.GetCurrentThreadId()
+        flags = WINEVENT_OUTOFCONTEXT | WINEVENT_SKIPOWNPROCESS
+        hooks = [
+            user32.SetWinEventHook(
+                EVENT_OBJECT_CREATE,
+                EVENT_OBJECT_SHOW,
+                None,
+                self._callback,
+                0,
+                0,
+                flags,
+            ),
+            user32.SetWinEventHook(
+                EVENT_OBJECT_NAMECHANGE,
+                EVENT_OBJECT_NAMECHANGE,
+                None,
+                self._callback,
+                0,
+                0,
+                flags,
+            ),
+        ]
+        if not all(hooks):
+            log.error("Error installing WinEvent hooks")
+            self.delivers_events = False
+        ready.set()
+
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+
+        for hook in hooks:
+            if hook:
+                user32.UnhookWinEvent(hook)
+
+    def _on_event(self, hook, event, hwnd, id_object, id_child, thread, time_ms):
+        if id_object != OBJID_WINDOW or id_child != CHILDID_SELF or not hwnd:
+            return
+        kind = EVENT_KINDS.get(event)
+        if kind is None:
+            return
+        # A destroyed window can't be checked anymore; the monitor ignores
+        # destroy events for windows it never knew about
+        if kind != DESTROYED and user32.GetAncestor(hwnd, GA_ROOT) != hwnd:
+            return
+        self.emit(kind, hwnd)
+
+
+class Win32SignalSource(SystemSignalSource):
+    """Wake, session unlock and display change signals from Windows
+
+    These are broadcast to top-level windows, so a hidden one is created
+    on a dedicated thread to receive them.
+    """
+
+    CLASS_NAME = "WindowTaggerSignals"
+
+    def __init__(self):
+        self.callback = None
+        self._thread = None
+        self._thread_id = None
+        # Keep a reference so the window procedure isn't garbage collected
+        self._wndproc = WNDPROC(self._on_message)
+
+    def start(self, callback):
+        self.callback = callback
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(ready,), daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def stop(self):
+        if self._thread_id:
+            user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+            self._thread.join(timeout=1)
+            self._thread_id = None
+
+    def _run(self, ready):
+        self._thread_id = kernel32.GetCurrentThreadId()
+        instance = kernel32.GetModuleHandleW(None)
+        window_class = WNDCLASSW()
+        window_class.lpfnWndProc = self._wndproc
+        window_class.hInstance = instance
+        window_class.lpszClassName = self.CLASS_NAME
+        user32.RegisterClassW(ctypes.byref(window_class))
+
+        # Never shown, but top-level so it gets the broadcasts
+        hwnd = user32.CreateWindowExW(
+            0,
+            self.CLASS_NAME,
+            self.CLASS_NAME,
+            0,
+            0,
+            0,
+            0,
+            0,
+            None,
+            None,
+            instance,
+            None,
+        )
+        if not hwnd:
+            log.error("Error creating the signal window")
+        elif not wtsapi32.WTSRegisterSessionNotification(hwnd, NOTIFY_FOR_THIS_SESSION):
+            log.warning("Session unlock notifications unavailable")
+        ready.set()
+
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+
+        if hwnd:
+            wtsapi32.WTSUnRegisterSessionNotification(hwnd)
+            user32.DestroyWindow(hwnd)
+        user32.UnregisterClassW(self.CLASS_NAME, instance)
+
+    def _on_message(self, hwnd, message, wparam, lparam):
+        signal = None
+        if message == WM_POWERBROADCAST and wparam in (
+            PBT_APMRESUMESUSPEND,
+            PBT_APMRESUMEAUTOMATIC,
+        ):
+            signal = WAKE
+        elif message == WM_WTSSESSION_CHANGE and wparam == WTS_SESSION_UNLOCK:
+            signal = UNLOCK
+        elif message == WM_DISPLAYCHANGE:
+            signal = DISPLAY_CHANGE
+
+        if signal is not None and self.callback is not None:
+            self.callback(signal)
+        return user32.DefWindowProcW(hwnd, message, wparam, lparam)
@@ -0,0 +1,83 @@
+import json
+import os
+import time
+
+from tagger_log import get_logger
+
+log = get_logger("window_checkpoint")
+
+CHECKPOINT_VERSION = 1
+
+
+class CheckpointEntry:
+    """What a restarted daemon needs to know about a window it had handled
+
+    The pid and process create time tell a window from a later one that
+    reuses its handle. rect is the last rect we applied, or None.
+    """
+
+    __slots__ = ("hwnd", "pid", "create_time", "tag_name", "title", "rect")
+
+    def __init__(self, hwnd, pid, create_time, tag_name, title, rect):
+        self.hwnd = hwnd
+        self.pid = pid
+        self.create_time = create_time
+        self.tag_name = tag_name
+        self.title = title
+        self.rect = rect
+
+    def to_row(self):
+        return [
+            self.hwnd,
+            self.pid,
+            self.create_time,
+            self.tag_name,
+            self.title,
+            list(self.rect) if self.rect else None,
+        ]
+
+    @classmethod
+    def from_row(cls, row):
+        hwnd, pid, create_time, tag_name, title, rect = row
+        rect = tuple(rect) if rect else None
+        return cls(hwnd, pid, create_time, tag_name, title, rect)
+
+
+def write_checkpoint(path, entries, rules):
+    """Write entries to path, replacing the previous checkpoint atomically
+
+    rules identifies the configuration the tags were matched under.
+    """
+    data = {
+        "version": CHECKPOINT_VERSION,
+        "saved_at": time.time(),
+        "rules": rules,
+        "windows": [entry.to_row() for entry in entries],
+    }
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(temp_path, path)
+
+
+def read_checkpoint(path, rules):
+    """Get the entries saved at path, or [] if they can't be trusted
+
+    A missing or unreadable file, another format version or a checkpoint
+    taken under different rules all count as no checkpoint.
+    """
+    if not os.path.exists(path):
+        return []
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+        if data.get("version") != CHECKPOINT_VERSION:
+            log.info("Ignoring checkpoint with version %s", data.get("version"))
+            return []
+        if data.get("rules") != rules:
+            log.info("Ignoring checkpoint taken under different rules")
+            return []
+        return [CheckpointEntry.from_row(row) for row in data["windows"]]
+    except Exception as e:
+        log.error("Error reading checkpoint: %s", e)
+        return []
@@ -0,0 +1,121 @@
+import queue
+import time
+from collections import namedtuple
+
+# Event kinds delivered by every WindowEventSource
+CREATED = "create"
+SHOWN = "show"
+NAME_CHANGED = "name_change"
+DESTROYED = "destroy"
+# Posted by the rescan scheduler, not by a window
+RESCAN = "rescan"
+
+# System signals that call for a rescan
+WAKE = "wake"
+UNLOCK = "unlock"
+DISPLAY_CHANGE = "display_change"
+
+WindowEvent = namedtuple("WindowEvent", ["kind", "hwnd", "timestamp"])
+
+
+class WindowEventSource:
+    """Source of top-level window create/show/name-change/destroy events
+
+    Implementations push events from whatever thread they run on with
+    emit(); the monitor loop pulls them with get(). The base class is
+    inert, which is what a pure polling setup uses.
+    """
+
+    # Whether events actually arrive; the monitor polls when they don't
+    delivers_events = False
+
+    def __init__(self):
+        self.queue = queue.Queue()
+
+    def start(self):
+        """Start delivering events"""
+
+    def stop(self):
+        """Stop delivering events"""
+
+    def emit(self, kind, hwnd):
+        """Queue an event for the monitor loop"""
+        self.queue.put(WindowEvent(kind, hwnd, time.perf_counter()))
+
+    def get(self, timeout=None):
+        """Wait up to timeout seconds for the next event, or return None"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def drain(self):
+        """Get every event that is already queued without waiting"""
+        events = []
+        while True:
+            try:
+                events.append(self.queue.get_nowait())
+            except queue.Empty:
+                return events
+
+
+class SimulatedEventSource(WindowEventSource):
+    """Event source driven by hand, for runs without a real desktop
+
+    Call create(), show(), rename() and destroy() to feed the monitor the
+    same event stream a window manager would.
+    """
+
+    delivers_events = True
+
+    def create(self, hwnd):
+        self.emit(CREATED, hwnd)
+
+    def show(self, hwnd):
+        self.emit(SHOWN, hwnd)
+
+    def rename(self, hwnd):
+        self.emit(NAME_CHANGED, hwnd)
+
+    def destroy(self, hwnd):
+        self.emit(DESTROYED, hwnd)
+
+
+class SystemSignalSource:
+    """Source of wake, session unlock and display change signals
+
+    start() is given a callback that is called with the signal from
+    whatever thread notices it. The base class is inert.
+    """
+
+    def start(self, callback):
+        """Start calling callback(signal)"""
+
+    def stop(self):
+        """Stop calling back"""
+
+
+class SimulatedSignalSource(SystemSignalSource):
+    """Signal source driven by hand, for runs without a real desktop"""
+
+    def __init__(self):
+        self.callback = None
+
+    def start(self, callback):
+        self.callback = callback
+
+    def stop(self):
+        self.callback = None
+
+    def send(self, signal):
+        if self.callback is not None:
+            self.callback(signal)
+
+    def wake(self):
+        self.send(WAKE)
+
+    def unlock(self):
+        self.send(UNLOCK)
+
+    def display_change(self):
+        self.send(DISPLAY_CHANGE)
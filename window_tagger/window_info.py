@@ -0,0 +1,59 @@
+from process_cache import process_cache
+
+
+def _exe_path(process):
+    return process.exe()
+
+
+def _cmdline(process):
+    return " ".join(process.cmdline())
+
+
+def _parent_process_name(process):
+    parent = process.parent()
+    return parent.name() if parent else None
+
+
+# Attributes that need a process lookup, resolved only when first read.
+# process_name comes straight from the process cache entry.
+ATTRIBUTE_RESOLVERS = {
+    "process_name": None,
+    "exe_path": _exe_path,
+    "cmdline": _cmdline,
+    "parent_process_name": _parent_process_name,
+}
+
+
+class LazyWindowInfo(dict):
+    """Window info dict whose process attributes are fetched on first access
+
+    Cheap window facts (hwnd, title, class, rect) are passed in up front.
+    Anything that needs psutil is looked up through the shared process
+    cache the first time a caller or a tag rule reads it, so each window
+    pays at most once for the attributes it actually needs. A backend
+    with its own process table passes it as processes.
+    """
+
+    def __init__(self, pid, processes=process_cache, **fields):
+        super().__init__(fields)
+        self.pid = pid
+        self.processes = processes
+
+    def __missing__(self, key):
+        if key not in ATTRIBUTE_RESOLVERS:
+            raise KeyError(key)
+        # Windows of the same process share one cache entry
+        entry = self.processes.lookup(self.pid)
+        if entry is None:
+            value = "unknown" if key == "process_name" else None
+        elif key == "process_name":
+            value = entry.name
+        else:
+            value = entry.get_attribute(key, ATTRIBUTE_RESOLVERS[key])
+        self[key] = value
+        return value
+
+    def get(self, key, default=None):
+        if key in self or key in ATTRIBUTE_RESOLVERS:
+            return self[key]
+        return default
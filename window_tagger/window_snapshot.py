@@ -0,0 +1,49 @@
+from array import array
+
+
+def diff_sorted(old, new):
+    """Get (added, removed) between two sorted hwnd arrays"""
+    added = []
+    removed = []
+    i = j = 0
+    old_len = len(old)
+    new_len = len(new)
+    while i < old_len and j < new_len:
+        a = old[i]
+        b = new[j]
+        if a == b:
+            i += 1
+            j += 1
+        elif a < b:
+            removed.append(a)
+            i += 1
+        else:
+            added.append(b)
+            j += 1
+    removed.extend(old[i:])
+    added.extend(new[j:])
+    return added, removed
+
+
+class WindowSnapshot:
+    """The hwnds seen by the last enumeration, as a compact sorted array
+
+    update() diffs a new enumeration against it. An unchanged desktop is
+    detected with a single array comparison, so the per-window work of a
+    poll is left to the windows that actually came or went.
+    """
+
+    def __init__(self):
+        self.hwnds = array("Q")
+
+    def __len__(self):
+        return len(self.hwnds)
+
+    def update(self, hwnds):
+        """Replace the snapshot and get the (added, removed) hwnds"""
+        current = array("Q", sorted(hwnds))
+        if current == self.hwnds:
+            return [], []
+        added, removed = diff_sorted(self.hwnds, current)
+        self.hwnds = current
+        return added, removed
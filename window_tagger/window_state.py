@@ -0,0 +1,99 @@
+import time
+
+
+class WindowRecord:
+    """What the daemon knows about one top-level window
+
+    pid and class_name never change for a window, so they are read once.
+    checked is cleared to make the next scan examine the window again
+    (after a wake, say) while still reusing those facts.
+    """
+
+    __slots__ = (
+        "hwnd",
+        "pid",
+        "class_name",
+        "last_title",
+        "tag_name",
+        "applied_rect",
+        "checked",
+        "title_watch",
+        "created_at",
+        "updated_at",
+        "detected_at",
+    )
+
+    def __init__(self, hwnd, pid, class_name):
+        self.hwnd = hwnd
+        self.pid = pid
+        self.class_name = class_name
+        self.last_title = ""
+        self.tag_name = None
+        self.applied_rect = None  # (x, y, width, height) last set by us
+        self.checked = False
+        self.title_watch = None  # TitleWatch if a title change can re-tag it
+        self.created_at = self.updated_at = time.time()
+        self.detected_at = None  # event time, until the first placement
+
+    def touch(self):
+        self.updated_at = time.time()
+
+
+class WindowTable:
+    """Per-window records for every window the daemon is tracking
+
+    Records are dropped when their window is destroyed or stops showing up
+    in enumeration, so the table only ever holds live windows.
+    """
+
+    def __init__(self):
+        self._records = {}  # hwnd -> WindowRecord
+        self._watched = set()  # hwnds with a title watch
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, hwnd):
+        return hwnd in self._records
+
+    def __iter__(self):
+        return iter(list(self._records.values()))
+
+    def get(self, hwnd):
+        return self._records.get(hwnd)
+
+    def add(self, hwnd, pid, class_name):
+        """Start tracking a window, replacing any stale record for the hwnd"""
+        record = WindowRecord(hwnd, pid, class_name)
+        self._records[hwnd] = record
+        self._watched.discard(hwnd)
+        return record
+
+    def remove(self, hwnd):
+        """Forget a window"""
+        self._watched.discard(hwnd)
+        return self._records.pop(hwnd, None)
+
+    def set_title_watch(self, record, title_watch):
+        """Attach or clear the title watch of a record"""
+        record.title_watch = title_watch
+        if title_watch is None:
+            self._watched.discard(record.hwnd)
+        else:
+            self._watched.add(record.hwnd)
+
+    def watched(self):
+        """Get the records whose title is being watched"""
+        return [self._records[hwnd] for hwnd in list(self._watched)]
+
+    def uncheck_all(self):
+        """Make the next scan examine every known window again"""
+        for record in self._records.values():
+            record.checked = False
+
+    def prune(self, live_hwnds):
+        """Drop records for windows not in live_hwnds; returns how many"""
+        dead = [hwnd for hwnd in self._records if hwnd not in live_hwnds]
+        for hwnd in dead:
+            self.remove(hwnd)
+        return len(dead)
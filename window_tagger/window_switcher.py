@@ -9,113 +9,111 @@ from tkinter import ttk
 import win32con
 import win32api
 import time
+from tag_matcher import TagMatcher
+from window_info import LazyWindowInfo
+from process_cache import process_cache
+from tagger_log import get_logger
+
+log = get_logger("window_switcher")
 
 
 class WindowSwitcher:
     def __init__(self):
-        print("Initializing WindowSwitcher...")
+        log.debug("Initializing WindowSwitcher...")
         self.definitions_file = "tag_definitions.json"
         self.definitions = self.load_definitions()
-        print(f"Loaded {len(self.definitions)} definitions")
+        self.matcher = TagMatcher(self.definitions)
+        log.info("Loaded %s definitions", len(self.definitions))
 
         # Register hotkeys
-        print("Registering hotkeys...")
+        log.debug("Registering hotkeys...")
         try:
             # Test hotkey first
-            keyboard.add_hotkey("ctrl+alt+t", lambda: print("Test hotkey works!"))
-            print("Test hotkey (Ctrl+Alt+T) registered")
+            keyboard.add_hotkey("ctrl+alt+t", lambda: log.info("Test hotkey works!"))
+            log.debug("Test hotkey (Ctrl+Alt+T) registered")
 
             # Main hotkey
             keyboard.add_hotkey("ctrl+alt+j", self.show_switcher)
-            print("Main hotkey (Ctrl+Alt+J) registered")
+            log.debug("Main hotkey (Ctrl+Alt+J) registered")
 
             # List all registered hotkeys
-            print("Currently registered hotkeys:")
+            log.debug("Currently registered hotkeys:")
             for hotkey in keyboard._hotkeys:
-                print(f"  {hotkey}")
+                log.debug("  %s", hotkey)
 
         except Exception as e:
-            print(f"Error registering hotkeys: {e}")
+            log.error("Error registering hotkeys: %s", e)
 
     def load_definitions(self):
         """Load window definitions from JSON file"""
-        print(f"Loading definitions from {self.definitions_file}")
+        log.debug("Loading definitions from %s", self.definitions_file)
         if os.path.exists(self.definitions_file):
             try:
                 with open(self.definitions_file, "r") as f:
                     return json.load(f)
             except Exception as e:
-                print(f"Error loading definitions: {e}")
+                log.error("Error loading definitions: %s", e)
                 return []
-        print("Definitions file not found")
+        log.warning("Definitions file not found")
         return []
 
     def find_window_by_tag(self, tag_name):
         """Find a window that matches the given tag"""
-        print(f"Finding window for tag: {tag_name}")
-        for tag in self.definitions:
-            if tag["name"] == tag_name:
-                # Get all windows
-                def callback(hwnd, windows):
-                    if win32gui.IsWindowVisible(hwnd):
-                        windows.append(hwnd)
-                    return True
-
-                windows = []
-                win32gui.EnumWindows(callback, windows)
-                print(f"Found {len(windows)} visible windows")
-
-                # Check each window
-                for hwnd in windows:
-                    try:
-                        # Get window info
-                        title = win32gui.GetWindowText(hwnd)
-                        class_name = win32gui.GetClassName(hwnd)
-                        _, pid = win32process.GetWindowThreadProcessId(hwnd)
-                        process = psutil.Process(pid)
-                        process_name = process.name()
-
-                        # Check if window matches tag criteria
-                        match = True
-
-                        if (
-                            "process_name" in tag
-                            and tag["process_name"].lower() != process_name.lower()
-                        ):
-                            match = False
-
-                        if "class_name" in tag and tag["class_name"] != class_name:
-                            match = False
-
-                        if (
-                            "title_substring" in tag
-                            and tag["title_substring"].lower() not in title.lower()
-                        ):
-                            match = False
-
-                        if match:
-                            print(f"Found matching window: {title} ({process_name})")
-                            return hwnd
-
-                    except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
-                        print(f"Error processing window: {e}")
-                        continue
-
-        print("No matching window found")
+        log.debug("Finding window for tag: %s", tag_name)
+        if not any(rule.name == tag_name for rule in self.matcher.rules):
+            log.info("No matching window found")
+            return None
+
+        # Get all windows
+        def callback(hwnd, windows):
+            if win32gui.IsWindowVisible(hwnd):
+                windows.append(hwnd)
+            return True
+
+        windows = []
+        win32gui.EnumWindows(callback, windows)
+        log.debug("Found %s visible windows", len(windows))
+
+        # One sweep of the process table instead of a lookup per window
+        process_cache.refresh()
+
+        # Check each window
+        for hwnd in windows:
+            try:
+                # Get window info
+                title = win32gui.GetWindowText(hwnd)
+                class_name = win32gui.GetClassName(hwnd)
+                _, pid = win32process.GetWindowThreadProcessId(hwnd)
+                window_info = LazyWindowInfo(pid, window_title=title)
+                process_name = window_info["process_name"]
+
+                # One pass over the title yields every rule the window matches
+                rules = self.matcher.match_all(
+                    process_name, class_name, title, window_info
+                )
+                if any(rule.name == tag_name for rule in rules):
+                    log.debug("Found matching window: %s (%s)", title, process_name)
+                    return hwnd
+
+            except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
+                log.error("Error processing window: %s", e)
+                continue
+
+        log.info("No matching window found")
         return None
 
     def show_switcher(self):
         """Show the window switcher dialog"""
-        print("Showing window switcher...")
+        log.debug("Showing window switcher...")
         try:
             # Create root window
             root = tk.Tk()
-            print("Created root window")
+            log.debug("Created root window")
             root.title("Window Switcher")
 
             # Make it float above other windows
             root.attributes("-topmost", True)
-            print("Set window to topmost")
+            log.debug("Set window to topmost")
 
             # Create search box
             search_var = tk.StringVar()
@@ -126,27 +124,27 @@ class WindowSwitcher:
 
             search_entry = ttk.Entry(root, textvariable=search_var)
             search_entry.pack(fill=tk.X, padx=5, pady=5)
-            print("Created search box")
+            log.debug("Created search box")
 
             # Create listbox
             listbox = tk.Listbox(root, height=10)
             listbox.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-            print("Created listbox")
+            log.debug("Created listbox")
 
             # Add tags to listbox
             for tag in self.definitions:
                 listbox.insert(tk.END, tag["name"])
-            print(f"Added {len(self.definitions)} tags to listbox")
+            log.debug("Added %s tags to listbox", len(self.definitions))
 
             # Select first item by default
             if listbox.size() > 0:
                 listbox.selection_set(0)
                 listbox.see(0)
-                print("Selected first item")
+                log.debug("Selected first item")
 
             # Bind keyboard events
             def on_key(event):
-                print(f"[ROOT] Key pressed: {event.keysym}")
+                log.debug("[ROOT] Key pressed: %s", event.keysym)
                 if event.keysym == "Return":
                     self.switch_to_selected(listbox, root)
                 elif event.keysym == "Up":
@@ -167,13 +165,13 @@ class WindowSwitcher:
                     root.destroy()
 
             def on_entry_key(event):
-                print(f"[ENTRY] Key pressed: {event.keysym}")
+                log.debug("[ENTRY] Key pressed: %s", event.keysym)
 
             # Bind events to root window so they work anywhere
             root.bind("<Key>", on_key)
-            print("Bound keyboard events")
+            log.debug("Bound keyboard events")
             search_entry.bind("<Key>", on_entry_key)
-            print("Bound entry key events")
+            log.debug("Bound entry key events")
 
             # Center the window
             root.update_idletasks()
@@ -182,7 +180,9 @@ class WindowSwitcher:
             x = (root.winfo_screenwidth() // 2) - (width // 2)
             y = (root.winfo_screenheight() // 2) - (height // 2)
             root.geometry(f"{width}x{height}+{x}+{y}")
-            print(f"Centered window at {x},{y} with size {width}x{height}")
+            log.debug(
+                "Centered window at %s,%s with size %sx%s", x, y, width, height
+            )
 
             # Get the window handle
             hwnd = win32gui.GetParent(root.winfo_id())
@@ -200,12 +200,12 @@ class WindowSwitcher:
                     try:
                         win32gui.SetForegroundWindow(hwnd)
                     except Exception as e:
-                        print(f"SetForegroundWindow error (immediate): {e}")
+                        log.debug("SetForegroundWindow error (immediate): %s", e)
                     win32api.keybd_event(
                         win32con.VK_MENU, 0, win32con.KEYEVENTF_KEYUP, 0
                     )
                     if win32gui.GetForegroundWindow() == hwnd:
-                        print(
+                        log.debug(
                             "Tkinter window is now foreground and focused (immediate)"
                         )
                         return
@@ -220,34 +220,38 @@ class WindowSwitcher:
                         try:
                             win32gui.SetForegroundWindow(hwnd)
                         except Exception as e:
-                            print(f"SetForegroundWindow error (loop): {e}")
+                            log.debug("SetForegroundWindow error (loop): %s", e)
                         win32api.keybd_event(
                             win32con.VK_MENU, 0, win32con.KEYEVENTF_KEYUP, 0
                         )
                         if win32gui.GetForegroundWindow() == hwnd:
-                            print("Tkinter window is now foreground and focused (loop)")
+                            log.debug(
+                                "Tkinter window is now foreground and focused (loop)"
+                            )
                             break
                         time.sleep(0.05)
                     else:
-                        print("Failed to focus Tkinter window after several attempts")
+                        log.error(
+                            "Failed to focus Tkinter window after several attempts"
+                        )
                 except Exception as e:
-                    print(f"Error activating window: {e}")
+                    log.error("Error activating window: %s", e)
 
             # Call activate_window after a short delay
             root.after(100, activate_window)
 
             # Start the main loop
-            print("Starting main loop")
+            log.debug("Starting main loop")
             root.mainloop()
-            print("Main loop ended")
+            log.debug("Main loop ended")
             root.destroy()
-            print("Root window destroyed")
+            log.debug("Root window destroyed")
         except Exception as e:
-            print(f"Error in show_switcher: {e}")
+            log.error("Error in show_switcher: %s", e)
 
     def filter_list(self, search_text, listbox):
         """Filter the listbox based on search text"""
-        print(f"Filtering list with text: {search_text}")
+        log.debug("Filtering list with text: %s", search_text)
         listbox.delete(0, tk.END)
         search_text = search_text.lower()
 
@@ -259,44 +263,44 @@ class WindowSwitcher:
         if listbox.size() > 0:
             listbox.selection_set(0)
             listbox.see(0)
-        print(f"Filtered list now has {listbox.size()} items")
+        log.debug("Filtered list now has %s items", listbox.size())
 
     def switch_to_selected(self, listbox, root):
         """Switch to the selected window"""
-        print("Switching to selected window...")
+        log.debug("Switching to selected window...")
         selection = listbox.curselection()
         if selection:
             tag_name = listbox.get(selection[0])
-            print(f"Selected tag: {tag_name}")
+            log.debug("Selected tag: %s", tag_name)
             hwnd = self.find_window_by_tag(tag_name)
 
             if hwnd:
-                print(f"Found window handle: {hwnd}")
+                log.debug("Found window handle: %s", hwnd)
                 # Bring window to front
                 win32gui.ShowWindow(hwnd, win32con.SW_RESTORE)
                 win32gui.SetForegroundWindow(hwnd)
-                print("Brought window to front")
+                log.debug("Brought window to front")
             else:
-                print("No window found for tag")
+                log.info("No window found for tag")
 
             root.destroy()
-            print("Closed switcher window")
+            log.debug("Closed switcher window")
         else:
-            print("No selection made")
+            log.info("No selection made")
 
 
 def main():
-    print("Starting Window Switcher...")
+    log.info("Starting Window Switcher...")
     switcher = WindowSwitcher()
-    print("Window Switcher running in background.")
-    print("Press Ctrl+C to exit.")
-    print("Try pressing Ctrl+Alt+T to test hotkey functionality")
-    print("Try pressing Ctrl+Alt+J to open the window switcher")
+    log.info("Window Switcher running in background.")
+    log.info("Press Ctrl+C to exit.")
+    log.info("Try pressing Ctrl+Alt+T to test hotkey functionality")
+    log.info("Try pressing Ctrl+Alt+J to open the window switcher")
 
     try:
         keyboard.wait()
     except KeyboardInterrupt:
-        print("Exiting...")
+        log.info("Exiting...")
 
 
 if __name__ == "__main__":
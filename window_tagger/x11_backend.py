@@ -0,0 +1,173 @@
+# Makes every Display lock its protocol stream; without it, requests
+# from the placement workers and the monitor loop can interleave
+import Xlib.threaded  # noqa: F401
+from Xlib import X, Xatom, display
+from Xlib.error import XError
+from Xlib.protocol import event as xevent
+
+from backend import DesktopBackend
+from tagger_log import get_logger
+from x11_events import X11EventSource
+
+log = get_logger("x11_backend")
+
+ICONIC_STATE = 3
+# _NET_MOVERESIZE_WINDOW flags: x, y, width and height are set, sent by a
+# pager, with StaticGravity so x and y place the client area (as get_rect
+# reports it) rather than the frame's outer corner
+STATIC_GRAVITY = 10
+MOVERESIZE_FLAGS = 0xF00 | (2 << 12) | STATIC_GRAVITY
+
+
+class X11Backend(DesktopBackend):
+    """An X11 desktop, through python-xlib and the EWMH hints
+
+    Windows come from _NET_CLIENT_LIST, the class from WM_CLASS and the
+    process from _NET_WM_PID. Moves go through _NET_MOVERESIZE_WINDOW so
+    the window manager places the frame. Without a window manager (bare
+    Xvfb, say) the top-level windows are used and configured directly.
+    """
+
+    def __init__(self, display_name=None):
+        self.display_name = display_name
+        self.display = display.Display(display_name)
+        self.display.set_error_handler(self._on_error)
+        self.screen = self.display.screen()
+        self.root = self.screen.root
+        self.atoms = {
+            name: self.display.intern_atom(name)
+            for name in (
+                "_NET_SUPPORTED",
+                "_NET_CLIENT_LIST",
+                "_NET_ACTIVE_WINDOW",
+                "_NET_MOVERESIZE_WINDOW",
+                "_NET_WM_NAME",
+                "_NET_WM_PID",
+                "_NET_WM_STATE",
+                "_NET_WM_STATE_HIDDEN",
+                "UTF8_STRING",
+            )
+        }
+        supported = self._get_property(self.root, "_NET_SUPPORTED", Xatom.ATOM)
+        self.can_moveresize = self.atoms["_NET_MOVERESIZE_WINDOW"] in (
+            supported or []
+        )
+
+    def _on_error(self, err, request):
+        # Errors from requests without replies arrive here; a window that
+        # disappeared between enumeration and a move is not worth more
+        log.debug("X error: %s", err)
+
+    def _window(self, hwnd):
+        return self.display.create_resource_object("window", hwnd)
+
+    def _get_property(self, window, name, property_type):
+        try:
+            prop = window.get_full_property(self.atoms[name], property_type)
+        except XError:
+            return None
+        return prop.value if prop else None
+
+    def enum_windows(self):
+        clients = self._get_property(self.root, "_NET_CLIENT_LIST", Xatom.WINDOW)
+        if clients is not None:
+            return list(clients)
+        # No EWMH window manager: every top-level window is a client
+        return [child.id for child in self.root.query_tree().children]
+
+    def is_window(self, hwnd):
+        try:
+            self._window(hwnd).get_attributes()
+        except XError:
+            return False
+        return True
+
+    def is_visible(self, hwnd):
+        try:
+            attributes = self._window(hwnd).get_attributes()
+        except XError:
+            return False
+        return attributes.map_state == X.IsViewable or self.is_minimized(hwnd)
+
+    def is_minimized(self, hwnd):
+        window = self._window(hwnd)
+        state = self._get_property(window, "_NET_WM_STATE", Xatom.ATOM)
+        if state is not None:
+            return self.atoms["_NET_WM_STATE_HIDDEN"] in state
+        try:
+            wm_state = window.get_wm_state()
+        except XError:
+            return False
+        return bool(wm_state) and wm_state.state == ICONIC_STATE
+
+    def get_title(self, hwnd):
+        window = self._window(hwnd)
+        title = self._get_property(window, "_NET_WM_NAME", self.atoms["UTF8_STRING"])
+        if title:
+            return title.decode("utf-8", "replace")
+        try:
+            title = window.get_wm_name()
+        except XError:
+            return ""
+        if isinstance(title, bytes):
+            return title.decode("latin-1")
+        return title or ""
+
+    def get_class_name(self, hwnd):
+        # WM_CLASS is (instance, class); the class is the stable part
+        wm_class = self._window(hwnd).get_wm_class()
+        return wm_class[1] if wm_class else ""
+
+    def get_pid(self, hwnd):
+        pid = self._get_property(self._window(hwnd), "_NET_WM_PID", Xatom.CARDINAL)
+        return pid[0] if pid else 0
+
+    def get_rect(self, hwnd):
+        window = self._window(hwnd)
+        geometry = window.get_geometry()
+        origin = self.root.translate_coords(window, 0, 0)
+        return origin.x, origin.y, geometry.width, geometry.height
+
+    def move_window(self, hwnd, x, y, width, height):
+        self._send_move(hwnd, x, y, width, height)
+        self.display.flush()
+
+    def move_windows(self, moves):
+        # Requests are buffered, so the whole batch goes out in one write
+        for hwnd, x, y, width, height in moves:
+            self._send_move(hwnd, x, y, width, height)
+        self.display.flush()
+
+    def _send_move(self, hwnd, x, y, width, height):
+        if self.can_moveresize:
+            # Packed as unsigned 32-bit; left of the primary monitor x is
+            # negative
+            values = (MOVERESIZE_FLAGS, x, y, width, height)
+            message = xevent.ClientMessage(
+                window=self._window(hwnd),
+                client_type=self.atoms["_NET_MOVERESIZE_WINDOW"],
+                data=(32, [value & 0xFFFFFFFF for value in values]),
+            )
+            mask = X.SubstructureRedirectMask | X.SubstructureNotifyMask
+            self.root.send_event(message, event_mask=mask)
+        else:
+            self._window(hwnd).configure(x=x, y=y, width=width, height=height)
+
+    def flash_window(self, hwnd):
+        # X11 has no one-shot flash; an urgency hint would stick until the
+        # window is focused, which is too loud for every placement
+        pass
+
+    def get_foreground_window(self):
+        active = self._get_property(self.root, "_NET_ACTIVE_WINDOW", Xatom.WINDOW)
+        if active:
+            return active[0]
+        # Without a window manager, fall back to the focused window
+        focus = self.display.get_input_focus().focus
+        return getattr(focus, "id", 0)
+
+    def get_screen_size(self):
+        return self.screen.width_in_pixels, self.screen.height_in_pixels
+
+    def create_event_source(self):
+        return X11EventSource(self.display_name)
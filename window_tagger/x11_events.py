@@ -0,0 +1,122 @@
+import select
+import threading
+
+from Xlib import X, display
+from Xlib.error import XError
+
+from window_events import (
+    CREATED,
+    DESTROYED,
+    NAME_CHANGED,
+    SHOWN,
+    WindowEventSource,
+)
+from tagger_log import get_logger
+
+log = get_logger("x11_events")
+
+TITLE_ATOMS = ("_NET_WM_NAME", "WM_NAME")
+
+
+class X11EventSource(WindowEventSource):
+    """Window events from X11 structure and property notifications
+
+    Uses its own display connection on a dedicated thread. With an EWMH
+    window manager, changes to _NET_CLIENT_LIST on the root window say
+    which client windows came and went; without one, CreateNotify,
+    MapNotify and DestroyNotify of the root's children do. Title changes
+    come from PropertyNotify on each client window.
+    """
+
+    delivers_events = True
+
+    def __init__(self, display_name=None):
+        super().__init__()
+        self.display_name = display_name
+        self._thread = None
+        self._stopping = threading.Event()
+        self._clients = set()
+
+    def start(self):
+        self._display = display.Display(self.display_name)
+        self._root = self._display.screen().root
+        self._client_list = self._display.intern_atom("_NET_CLIENT_LIST")
+        self._title_atoms = {self._display.intern_atom(name) for name in TITLE_ATOMS}
+
+        self._root.change_attributes(
+            event_mask=X.SubstructureNotifyMask | X.PropertyChangeMask
+        )
+        clients = self._read_clients()
+        self._ewmh = clients is not None
+        if not self._ewmh:
+            clients = [child.id for child in self._root.query_tree().children]
+        for hwnd in clients:
+            self._watch(hwnd)
+        self._clients = set(clients)
+        self._display.flush()
+
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread:
+            self._stopping.set()
+            self._thread.join(timeout=1)
+            self._thread = None
+            self._display.close()
+
+    def _read_clients(self):
+        try:
+            prop = self._root.get_full_property(self._client_list, X.AnyPropertyType)
+        except XError:
+            return None
+        return list(prop.value) if prop else None
+
+    def _watch(self, hwnd):
+        # Title changes of a client are only reported if asked for
+        try:
+            window = self._display.create_resource_object("window", hwnd)
+            window.change_attributes(event_mask=X.PropertyChangeMask)
+        except XError:
+            pass
+
+    def _run(self):
+        while not self._stopping.is_set():
+            # Wake up now and then to notice stop()
+            readable, _, _ = select.select([self._display], [], [], 0.5)
+            if not readable:
+                continue
+            try:
+                while self._display.pending_events():
+                    self._on_event(self._display.next_event())
+            except XError as e:
+                log.debug("X error in event loop: %s", e)
+
+    def _on_event(self, event):
+        if event.type == X.PropertyNotify:
+            if event.window == self._root and event.atom == self._client_list:
+                self._on_client_list_changed()
+            elif event.atom in self._title_atoms:
+                self.emit(NAME_CHANGED, event.window.id)
+        elif self._ewmh:
+            # The root's children are frames; clients come from the list
+            return
+        elif event.type == X.CreateNotify and event.parent == self._root:
+            self._watch(event.window.id)
+            self.emit(CREATED, event.window.id)
+        elif event.type == X.MapNotify and event.event == self._root:
+            self.emit(SHOWN, event.window.id)
+        elif event.type == X.DestroyNotify and event.event == self._root:
+            self.emit(DESTROYED, event.window.id)
+
+    def _on_client_list_changed(self):
+        clients = set(self._read_clients() or [])
+        for hwnd in clients - self._clients:
+            self._watch(hwnd)
+            self.emit(CREATED, hwnd)
+            self.emit(SHOWN, hwnd)
+        for hwnd in self._clients - clients:
+            self.emit(DESTROYED, hwnd)
+        self._clients = clients
+        self._display.flush()
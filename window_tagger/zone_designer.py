@@ -7,6 +7,9 @@ import win32con
 import win32gui
 import ctypes
 from ctypes import wintypes
+from tagger_log import get_logger
+
+log = get_logger("zone_designer")
 
 
 class ZoneDesigner:
@@ -251,7 +254,7 @@ class ZoneDesigner:
 
             return hwnd
         except Exception as e:
-            print(f"Error creating overlay: {e}")
+            log.error("Error creating overlay: %s", e)
             return None
 
     def destroy_overlay(self):